@@ -15,6 +15,7 @@ A general central radial scanning (or dwelling) instrument class.
     _gate_edge_data_factory
     _gate_lon_lat_data_factory
     _gate_altitude_data_factory
+    _unpack_field_data
 
 .. autosummary::
     :toctree: generated/
@@ -911,6 +912,23 @@ def _gate_altitude_data_factory(radar):
     return _gate_altitude_data
 
 
+def _unpack_field_data(fdic, data=None):
+    """
+    Return the data of a field unpacked when stored as packed integers.
+
+    Integer data is unpacked using the 'scale_factor' and 'add_offset' keys
+    of the field dictionary when present, other data is returned unchanged.
+    The data of the field dictionary is used when data is None.
+    """
+    if data is None:
+        data = fdic['data']
+    if data.dtype.kind in 'iu' and ('scale_factor' in fdic or
+                                    'add_offset' in fdic):
+        data = (data * np.float32(fdic.get('scale_factor', 1)) +
+                np.float32(fdic.get('add_offset', 0)))
+    return data
+
+
 def is_vpt(radar, offset=0.5):
     """
     Determine if a Radar appears to be a vertical pointing scan.
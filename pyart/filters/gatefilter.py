@@ -21,6 +21,7 @@ corrections routines in Py-ART.
 import numpy as np
 
 from ..config import get_field_name
+from ..core.radar import _unpack_field_data
 
 
 def moment_based_gate_filter(
@@ -189,7 +190,8 @@ class GateFilter(object):
     def _get_fdata(self, field):
         """ Check that the field exists and retrieve field data. """
         self._radar.check_field_exists(field)
-        return self._radar.fields[field]['data']
+        # unpack fields stored as packed integers
+        return _unpack_field_data(self._radar.fields[field])
 
     def _merge(self, marked, op, exclude_masked):
         """ Merge an array of marked gates with the exclude array. """
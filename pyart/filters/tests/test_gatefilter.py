@@ -19,6 +19,11 @@ fdata2[4, 4] = np.PINF
 fdata2[5, 5] = np.NINF
 radar.add_field('test_field2', {'data': fdata2})
 
+# a field stored as packed integers, values of 0 to 9
+fdata3 = np.tile(np.arange(10, dtype='uint8') * 2 + 10, 36).reshape(36, 10)
+radar.add_field('test_field3', {'data': fdata3, 'scale_factor': 0.5,
+                                'add_offset': -5.0})
+
 
 def test_gatefilter_init():
     gfilter = pyart.correct.GateFilter(radar)
@@ -35,6 +40,14 @@ def test_gatefilter_exclude_below():
     assert gfilter.gate_excluded[0, -1] is np.True_
 
 
+def test_gatefilter_exclude_below_packed():
+    gfilter = pyart.correct.GateFilter(radar)
+    gfilter.exclude_below('test_field3', 5)
+    gfilter2 = pyart.correct.GateFilter(radar)
+    gfilter2.exclude_below('test_field', 5)
+    assert np.all(gfilter.gate_excluded == gfilter2.gate_excluded)
+
+
 def test_gatefilter_exclude_above():
     gfilter = pyart.correct.GateFilter(radar)
     gfilter.exclude_above('test_field', 5)
@@ -29,6 +29,15 @@ for the format in question should be used.
     read_nexrad_level3
     read_uf
 
+Reading real-time radar data
+============================
+
+.. autosummary::
+    :toctree: generated/
+
+    NEXRADLevel2Stream
+    read_nexrad_stream
+
 Writing radar data
 ==================
 
@@ -37,6 +46,7 @@ Writing radar data
 
     write_cfradial
     write_uf
+    CFRadialWriter
 
 Reading grid data
 =================
@@ -72,8 +82,9 @@ from .rsl import read_rsl
 from .mdv_radar import read_mdv
 from .sigmet import read_sigmet
 from .chl import read_chl
-from .cfradial import read_cfradial, write_cfradial
-from .nexrad_archive import read_nexrad_archive
+from .cfradial import read_cfradial, write_cfradial, CFRadialWriter
+from .nexrad_archive import read_nexrad_archive, read_nexrad_stream
+from .nexrad_level2 import NEXRADLevel2Stream
 from .nexrad_cdm import read_nexrad_cdm
 from .nexradl3_read import read_nexrad_level3
 from .uf import read_uf
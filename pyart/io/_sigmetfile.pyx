@@ -67,11 +67,15 @@ cdef class SigmetFile:
     _raw_product_bhdrs : list
         List of raw_product_bhdr structure dictionaries seperated by sweep.
         None when data has not yet been read.
+    _sweep_offsets : list
+        File offsets of the first record of each sweep read by
+        :py:func:`read_data`.  Used by :py:func:`read_data_type` to return
+        to the sweeps when converting a single data type.
 
     """
     cdef public debug, product_hdr, ingest_header, ingest_data_headers, \
         data_types, data_type_names, ndata_types,
-    cdef public _fh, _raw_product_bhdrs
+    cdef public _fh, _raw_product_bhdrs, _sweep_offsets
 
     cdef np.ndarray _rbuf
     cdef np.int16_t * _rbuf_p   # hack for fast indexing of _rbuf
@@ -102,6 +106,7 @@ cdef class SigmetFile:
         self._fh = fh
         self._record_number = 2
         self._raw_product_bhdrs = []
+        self._sweep_offsets = []
 
     def _determine_data_types(self):
         """ Determine the available data types in the file. """
@@ -118,7 +123,7 @@ cdef class SigmetFile:
         """ Close the file. """
         self._fh.close()
 
-    def read_data(self, full_xhdr=False):
+    def read_data(self, full_xhdr=False, data_type_names=None):
         """
         Read all data from the file.
 
@@ -129,12 +134,19 @@ cdef class SigmetFile:
             ones.  False will return a length 1 extended header converted to
             int32.  This is useful when the file contains a customer specified
             extended header (for example aircraft radar).
+        data_type_names : list of str or None, optional
+            Names of the data types to convert and return in `data`.  Data
+            types not in this list are decoded from the file, as all data
+            types are interleaved in the records, but are not converted.  An
+            empty list will read only the metadata, the data types can later
+            be converted using :py:func:`read_data_type`.  None, the default,
+            converts all data types in the file.
 
         Returns
         -------
         data : dict of ndarrays
-            Data arrays of shape=(nsweeps, nrays, nbins) for each data type.
-            Indexed by data type name (str).
+            Data arrays of shape=(nsweeps, nrays, nbins) for each requested
+            data type.  Indexed by data type name (str).
         metadata : dict of dicts
             Arrays of 'azimuth_0', 'azimuth_1', 'elevation_0', 'elevation_1',
             'nbins', and 'time' for each data type.  Indexed by data type name
@@ -143,22 +155,21 @@ cdef class SigmetFile:
 
         """
 
+        if data_type_names is None:
+            data_type_names = self.data_type_names
+        for name in data_type_names:
+            if name not in self.data_type_names:
+                raise ValueError('invalid data type name: %s' % (name))
+
         # determine size of data
         nsweeps = self.ingest_header['task_configuration'][
             'task_scan_info']['number_sweeps']
-        nbins = self.product_hdr['product_end']['number_bins']
         nrays = self.ingest_header['ingest_configuration'][
             'number_rays_sweep']
 
         # create empty outputs
-        shape = (nsweeps, nrays, nbins)
-        data = dict([(name, np.ma.empty(shape, dtype='float32'))
-                    for name in self.data_type_names])
-        if 'XHDR' in self.data_type_names:
-            if full_xhdr:
-                data['XHDR'] = np.ones(shape, dtype='int16')
-            else:
-                data['XHDR'] = np.ones((nsweeps, nrays, 1), dtype='int32')
+        data = dict([(name, self._create_data_array(name, nsweeps, full_xhdr))
+                    for name in data_type_names])
 
         metadata = {}
         for name in self.data_type_names:
@@ -176,11 +187,13 @@ cdef class SigmetFile:
                                          self.data_type_names])
 
         self._raw_product_bhdrs = []
+        self._sweep_offsets = []
 
         # read in data sweep by sweep
         for i in xrange(nsweeps):
+            self._sweep_offsets.append(self._fh.tell())
             ingest_data_hdrs, sweep_data, sweep_metadata = self._get_sweep(
-                full_xhdr=full_xhdr)
+                full_xhdr=full_xhdr, data_type_names=data_type_names)
 
             # check for a truncated file, return sweep(s) read up until error
             if ingest_data_hdrs is None:
@@ -189,8 +202,10 @@ cdef class SigmetFile:
                         (i, nsweeps))
                 warnings.warn(mess)
 
+                self._sweep_offsets.pop()
                 for name in self.data_type_names:
-                    data[name] = data[name][:i]
+                    if name in data:
+                        data[name] = data[name][:i]
                     for k in metadata[name]:
                         metadata[name][k] = metadata[name][k][:i]
                 return data, metadata
@@ -199,7 +214,8 @@ cdef class SigmetFile:
                 temp = sweep_metadata[j]
                 (az0, el0, az1, el1, ray_nbins, ray_time, prf_flag) = temp
 
-                data[name][i] = sweep_data[j]
+                if name in data:
+                    data[name][i] = sweep_data[j]
                 metadata[name]['azimuth_0'][i] = az0
                 metadata[name]['azimuth_1'][i] = az1
                 metadata[name]['elevation_0'][i] = el0
@@ -209,20 +225,90 @@ cdef class SigmetFile:
                 metadata[name]['prf_flag'][i] = prf_flag
                 self.ingest_data_headers[name].append(ingest_data_hdrs[j])
 
+        for name in data:
+            self._scale_by_nyquist(name, data[name])
+        return data, metadata
+
+    def read_data_type(self, data_type_name, full_xhdr=False):
+        """
+        Read and convert a single data type from the sweeps in the file.
+
+        The sweeps are located using the file offsets recorded by a previous
+        call to :py:func:`read_data` which must be made first.  Only the
+        requested data type is converted.  The file must not have been
+        closed.
+
+        Parameters
+        ----------
+        data_type_name : str
+            Name of the data type to read.
+        full_xhdr : bool
+            True to return the full extended headers, see
+            :py:func:`read_data`.  Only used when `data_type_name` is 'XHDR'.
+
+        Returns
+        -------
+        data : ndarray
+            Data array of shape=(nsweeps, nrays, nbins) for the data type
+            where nsweeps is the number of sweeps read by
+            :py:func:`read_data`.
+
+        """
+        if data_type_name not in self.data_type_names:
+            raise ValueError('invalid data type name: %s' % (data_type_name))
+        nsweeps = len(self._sweep_offsets)
+        data = self._create_data_array(data_type_name, nsweeps, full_xhdr)
+        index = self.data_type_names.index(data_type_name)
+
+        # store the position of the reader so that it can be restored
+        raw_product_bhdrs = self._raw_product_bhdrs
+        record_number = self._record_number
+        self._raw_product_bhdrs = []
+        try:
+            for i, offset in enumerate(self._sweep_offsets):
+                self._fh.seek(offset)
+                ingest_data_hdrs, sweep_data, _ = self._get_sweep(
+                    full_xhdr=full_xhdr, data_type_names=[data_type_name])
+                if ingest_data_hdrs is None:
+                    raise IOError('File truncated or corrupt, %i of %i '
+                                  'sweeps read' % (i, nsweeps))
+                data[i] = sweep_data[index]
+        finally:
+            self._raw_product_bhdrs = raw_product_bhdrs
+            self._record_number = record_number
+
+        self._scale_by_nyquist(data_type_name, data)
+        return data
+
+    def _create_data_array(self, data_type_name, nsweeps, full_xhdr):
+        """ Return an empty array for nsweeps sweeps of a data type. """
+        nbins = self.product_hdr['product_end']['number_bins']
+        nrays = self.ingest_header['ingest_configuration'][
+            'number_rays_sweep']
+        shape = (nsweeps, nrays, nbins)
+        if data_type_name == 'XHDR':
+            if full_xhdr:
+                return np.ones(shape, dtype='int16')
+            else:
+                return np.ones((nsweeps, nrays, 1), dtype='int32')
+        return np.ma.empty(shape, dtype='float32')
+
+    def _scale_by_nyquist(self, data_type_name, data):
+        """ Scale 1-byte velocity and width data by the Nyquist. """
         # scale 1-byte velocity by the Nyquist (section 4.3.29)
-        # this conversion is kept in this method so that the
+        # this conversion is kept in this class so that the
         # product_hdr does not need to be accessed at lower abstraction
         # layers.
-        if 'VEL' in self.data_type_names:
+        if data_type_name == 'VEL':
             wavelength_cm = self.product_hdr['product_end']['wavelength']
             prt_value = 1. / self.product_hdr['product_end']['prf']
             task_config = self.ingest_header['task_configuration']
             multi_prf_flag = task_config['task_dsp_info']['multi_prf_flag']
             multiplier = [1, 2, 3, 4][multi_prf_flag]
             nyquist = wavelength_cm / (10000.0 * 4.0 * prt_value) * multiplier
-            data['VEL'] *= nyquist
+            data *= nyquist
         # scale 1-byte width by the Nyquist
-        if 'WIDTH' in self.data_type_names:
+        if data_type_name == 'WIDTH':
             # The IRIS Programmer's Manual indicates 1-byte width format data
             # should be scaled by the unambiguous velocity, twice the nyquist,
             # (section 4.3.35) but both RSL and RadX scale this data by the
@@ -231,11 +317,11 @@ cdef class SigmetFile:
             wavelength_cm = self.product_hdr['product_end']['wavelength']
             prt_value = 1. / self.product_hdr['product_end']['prf']
             nyquist = wavelength_cm / (10000.0 * 4.0 * prt_value)
-            data['WIDTH'] *= nyquist
-
-        return data, metadata
+            data *= nyquist
+        return
 
-    def _get_sweep(self, full_xhdr=False, raw_data=False):
+    def _get_sweep(self, full_xhdr=False, raw_data=False,
+                   data_type_names=None):
         """
         Get the data and metadata from the next sweep.
 
@@ -251,6 +337,8 @@ cdef class SigmetFile:
         raw_data : bool, optional
             True to return the raw_data for the given sweep, False to
             convert the data to floating point representation.
+        data_type_names : list of str or None, optional
+            Names of the data types to convert, None converts all data types.
 
         Returns
         -------
@@ -258,7 +346,7 @@ cdef class SigmetFile:
             List of ingest_data_header structures for each data type.
         sweep_data : list of arrays
             Sweep data for each data types in the order they appear in the
-            file.
+            file.  None for data types which were not converted.
         sweep_metadata : list of tuples
             Sweep metadata for each data type in the same order as sweep_data.
 
@@ -310,7 +398,10 @@ cdef class SigmetFile:
         sweep_data = []
         sweep_metadata = []
         for i, data_type in enumerate(self.data_types):
-            if data_type == 0 and full_xhdr:
+            if (data_type_names is not None and
+                    self.data_type_names[i] not in data_type_names):
+                sweep_data.append(None)
+            elif data_type == 0 and full_xhdr:
                 sweep_data.append(raw_sweep_data[i::self.ndata_types, 6:])
             else:
                 sweep_data.append(convert_sigmet_data(
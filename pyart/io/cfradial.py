@@ -9,15 +9,24 @@ Utilities for reading CF/Radial files.
     :template: dev_template.rst
 
     _NetCDFVariableDataExtractor
+    _NetCDFVariableGateDataExtractor
+    _VariableGateIndex
+    CFRadialWriter
 
 .. autosummary::
     :toctree: generated/
 
     read_cfradial
     write_cfradial
+    _write_radar
+    _auto_field_encoding
+    _time_coverage_dics
+    _get_radar_dic
+    _append_ncvar
     _find_all_meta_group_vars
     _ncvar_to_dict
-    _unpack_variable_gate_field_dic
+    _variable_gate_index
+    _sweep_ray_slices
     _create_ncvar
 
 """
@@ -70,7 +79,8 @@ _INSTRUMENT_PARAMS_DIMS = {
 
 def read_cfradial(filename, field_names=None, additional_metadata=None,
                   file_field_names=False, exclude_fields=None,
-                  delay_field_loading=False, **kwargs):
+                  delay_field_loading=False, sweeps=None, gate_range=None,
+                  **kwargs):
     """
     Read a Cfradial netCDF file.
 
@@ -97,9 +107,17 @@ def read_cfradial(filename, field_names=None, additional_metadata=None,
         True to delay loading of field data from the file until the 'data'
         key in a particular field dictionary is accessed.  In this case
         the field attribute of the returned Radar object will contain
-        LazyLoadDict objects not dict objects.  Delayed field loading will not
-        provide any speedup in file where the number of gates vary between
-        rays (ngates_vary=True) and is not recommended.
+        LazyLoadDict objects not dict objects.  In files where the number
+        of gates vary between rays (ngates_vary=True) the field data is
+        unpacked into a 2D array when it is accessed.
+    sweeps : list or None, optional
+        Sweeps (0 based) to read from the file.  Only the rays in these
+        sweeps are read from the field variables and placed in the radar
+        object, the sweep_number of each sweep is kept.  None, the default,
+        reads all sweeps in the file.
+    gate_range : tuple or None, optional
+        Start and stop (exclusive) indices of the gates to read from the
+        field variables.  None, the default, reads all gates.
 
     Returns
     -------
@@ -175,6 +193,33 @@ def read_cfradial(filename, field_names=None, additional_metadata=None,
         warnings.warn("Warning: File violates CF/Radial convention. " +
                       "Missing sweep_number variable")
 
+    # determine the rays and gates to read
+    if sweeps is not None:
+        sweeps = list(sweeps)
+        nsweeps = len(sweep_start_ray_index['data'])
+        if len(sweeps) == 0:
+            raise ValueError('at least one sweep must be requested')
+        if min(sweeps) < 0 or max(sweeps) >= nsweeps:
+            raise ValueError('invalid sweeps, the file contains %d sweeps'
+                             % (nsweeps))
+        ray_slices = _sweep_ray_slices(
+            sweep_start_ray_index['data'], sweep_end_ray_index['data'],
+            sweeps)
+        rays = np.concatenate([np.arange(s.start, s.stop)
+                               for s in ray_slices])
+    else:
+        ray_slices = None
+        rays = None
+    if gate_range is not None:
+        ngates = len(ncvars['range'])
+        start, stop = gate_range
+        if start < 0 or stop > ngates or start >= stop:
+            raise ValueError('invalid gate_range, the file contains %d gates'
+                             % (ngates))
+        gate_slice = slice(start, stop)
+    else:
+        gate_slice = None
+
     if 'target_scan_rate' in ncvars:
         target_scan_rate = _ncvar_to_dict(ncvars['target_scan_rate'])
     else:
@@ -277,6 +322,16 @@ def read_cfradial(filename, field_names=None, additional_metadata=None,
         keys = [k for k, v in ncvars.items()
                 if v.dimensions == ('time', 'range')]
 
+    if 'ray_n_gates' in ncvars:
+        # the indices which unpack the fields are shared by all fields
+        nrays = len(ncvars['time']) if rays is None else len(rays)
+        ngates = len(ncvars['range'])
+        if gate_slice is not None:
+            ngates = gate_slice.stop - gate_slice.start
+        gate_index = _VariableGateIndex(
+            ncvars['ray_n_gates'], ncvars['ray_start_index'], rays,
+            gate_range)
+
     fields = {}
     for key in keys:
         field_name = filemetadata.get_field_name(key)
@@ -284,15 +339,16 @@ def read_cfradial(filename, field_names=None, additional_metadata=None,
             if exclude_fields is not None and key in exclude_fields:
                 continue
             field_name = key
-        fields[field_name] = _ncvar_to_dict(ncvars[key], delay_field_loading)
-
-    if 'ray_n_gates' in ncvars:
-        shape = (len(ncvars['time']), len(ncvars['range']))
-        ray_n_gates = ncvars['ray_n_gates'][:]
-        ray_start_index = ncvars['ray_start_index'][:]
-        for dic in fields.values():
-            _unpack_variable_gate_field_dic(
-                dic, shape, ray_n_gates, ray_start_index)
+        if 'ray_n_gates' in ncvars:
+            data_extractor = _NetCDFVariableGateDataExtractor(
+                ncvars[key], (nrays, ngates), gate_index)
+        elif rays is not None or gate_slice is not None:
+            data_extractor = _NetCDFVariableDataExtractor(
+                ncvars[key], ray_slices, gate_slice)
+        else:
+            data_extractor = None
+        fields[field_name] = _ncvar_to_dict(
+            ncvars[key], delay_field_loading, data_extractor)
 
     # 4.5 instrument_parameters sub-convention -> instrument_parameters dict
     # 4.6 radar_parameters sub-convention -> instrument_parameters dict
@@ -309,6 +365,43 @@ def read_cfradial(filename, field_names=None, additional_metadata=None,
     if radar_calibration == {}:
         radar_calibration = None
 
+    # keep only the rays and sweep parameters of the requested sweeps
+    if sweeps is not None:
+        for dic in [time, azimuth, elevation, scan_rate, antenna_transition,
+                    rotation, tilt, roll, drift, heading, pitch,
+                    georefs_applied]:
+            if dic is not None:
+                dic['data'] = dic['data'][rays]
+        for dic in [sweep_number, sweep_mode, fixed_angle, target_scan_rate,
+                    rays_are_indexed, ray_angle_res]:
+            if dic is not None:
+                dic['data'] = dic['data'][sweeps]
+        for params in [instrument_parameters, radar_calibration]:
+            if params is None:
+                continue
+            for key, dic in params.items():
+                dimensions = ncvars[key].dimensions
+                if dimensions[:1] == ('time', ):
+                    dic['data'] = dic['data'][rays]
+                elif dimensions[:1] == ('sweep', ):
+                    dic['data'] = dic['data'][sweeps]
+        ssri = sweep_start_ray_index['data'][sweeps]
+        seri = sweep_end_ray_index['data'][sweeps]
+        ray_count = (seri - ssri + 1).astype(ssri.dtype)
+        seri = np.cumsum(ray_count).astype(ssri.dtype) - 1
+        sweep_start_ray_index['data'] = seri - ray_count + 1
+        sweep_end_ray_index['data'] = seri
+
+    # keep only the requested gates
+    if gate_slice is not None:
+        _range['data'] = _range['data'][gate_slice]
+        # the gate spacing attributes describe the gates which were read
+        if 'meters_to_center_of_first_gate' in _range:
+            _range['meters_to_center_of_first_gate'] = _range['data'][0]
+        if 'meters_between_gates' in _range and len(_range['data']) > 1:
+            _range['meters_between_gates'] = (
+                _range['data'][1] - _range['data'][0])
+
     # do not close file is field loading is delayed
     if not delay_field_loading:
         ncobj.close()
@@ -337,12 +430,27 @@ def _find_all_meta_group_vars(ncvars, meta_group_name):
             v.meta_group == meta_group_name]
 
 
-def _ncvar_to_dict(ncvar, lazydict=False):
-    """ Convert a NetCDF Dataset variable to a dictionary. """
+def _ncvar_to_dict(ncvar, lazydict=False, data_extractor=None):
+    """
+    Convert a NetCDF Dataset variable to a dictionary.
+
+    A _NetCDFVariableDataExtractor is used to extract the data unless
+    an alternative `data_extractor` is provided.
+    """
     # copy all attribute except for scaling parameters
     d = dict((k, getattr(ncvar, k)) for k in ncvar.ncattrs()
              if k not in ['scale_factor', 'add_offset'])
-    data_extractor = _NetCDFVariableDataExtractor(ncvar)
+    # valid_min and valid_max stored in the type of a packed variable are in
+    # packed units, convert them to the units of the unpacked data
+    attrs = ncvar.ncattrs()
+    if 'scale_factor' in attrs or 'add_offset' in attrs:
+        scale = getattr(ncvar, 'scale_factor', 1.)
+        offset = getattr(ncvar, 'add_offset', 0.)
+        for key in ['valid_min', 'valid_max']:
+            if key in d and np.asarray(d[key]).dtype == ncvar.dtype:
+                d[key] = d[key] * scale + offset
+    if data_extractor is None:
+        data_extractor = _NetCDFVariableDataExtractor(ncvar)
     if lazydict:
         d = LazyLoadDict(d)
         d.set_lazy('data', data_extractor)
@@ -359,34 +467,176 @@ class _NetCDFVariableDataExtractor(object):
     ----------
     ncvar : netCDF4.Variable
         NetCDF Variable from which data will be extracted.
+    ray_slices : list of slices or None, optional
+        Slices of the first (time) dimension to read, the data from each
+        slice is concatenated.  None reads all rays.
+    gate_slice : slice or None, optional
+        Slice of the second (range) dimension to read.  None reads all gates.
 
     """
 
-    def __init__(self, ncvar):
+    def __init__(self, ncvar, ray_slices=None, gate_slice=None):
         """ initialize the object. """
         self.ncvar = ncvar
+        self.ray_slices = ray_slices
+        self.gate_slice = gate_slice
 
     def __call__(self):
         """ Return an array containing data from the stored variable. """
+        if self.ray_slices is not None or self.gate_slice is not None:
+            return self._read_hyperslabs()
         # Use atleast_1d to force the array to be at minimum one dimensional,
         # some version of netCDF return scalar or scalar arrays for scalar
         # NetCDF variables.
         return np.atleast_1d(self.ncvar[:])
 
+    def _read_hyperslabs(self):
+        """ Read and concatenate the requested rays and gates. """
+        ray_slices = self.ray_slices
+        if ray_slices is None:
+            ray_slices = [slice(None)]
+        gate_slice = self.gate_slice
+        if gate_slice is None:
+            gate_slice = slice(None)
+        data = [self.ncvar[s, gate_slice] for s in ray_slices]
+        if len(data) == 1:
+            return data[0]
+        if any(np.ma.isMaskedArray(d) for d in data):
+            return np.ma.concatenate(data)
+        return np.concatenate(data)
+
+
+class _NetCDFVariableGateDataExtractor(object):
+    """
+    Class facilitating on demand extraction of variable gate data.
 
-def _unpack_variable_gate_field_dic(
-        dic, shape, ray_n_gates, ray_start_index):
-    """ Create a 2D array from a 1D field data, dic update in place """
-    fdata = dic['data']
-    data = np.ma.masked_all(shape, dtype=fdata.dtype)
-    for i, (gates, idx) in enumerate(zip(ray_n_gates, ray_start_index)):
-        data[i, :gates] = fdata[idx:idx+gates]
-    dic['data'] = data
-    return
+    Parameters
+    ----------
+    ncvar : netCDF4.Variable
+        NetCDF Variable with dimensions of n_points from which data will be
+        extracted.
+    shape : tuple
+        Shape of the 2D (time, range) array into which the data is unpacked.
+    gate_index : _VariableGateIndex
+        Indices used to unpack the data, typically shared by all fields.
+
+    """
+
+    def __init__(self, ncvar, shape, gate_index):
+        """ initialize the object. """
+        self.ncvar = ncvar
+        self.shape = shape
+        self.gate_index = gate_index
+
+    def __call__(self):
+        """ Return a 2D array containing data from the stored variable. """
+        ray_idx, gate_idx, point_idx = self.gate_index()
+        # read only the points between the first and last points needed
+        if len(point_idx):
+            first, last = point_idx.min(), point_idx.max() + 1
+        else:
+            first, last = 0, 0
+        fdata = self.ncvar[first:last]
+        data = np.ma.masked_all(self.shape, dtype=fdata.dtype)
+        data[ray_idx, gate_idx] = fdata[point_idx - first]
+        return data
+
+
+class _VariableGateIndex(object):
+    """
+    Class which calculates and caches the indices of variable gate data.
+
+    The ray_n_gates and ray_start_index variables are only read when the
+    indices are first requested.
+
+    Parameters
+    ----------
+    ray_n_gates, ray_start_index : netCDF4.Variable
+        NetCDF Variables containing the number of gates in each ray and the
+        index of the first gate of each ray in the n_points dimension.
+    rays : array or None, optional
+        Indices of the rays to unpack, None unpacks all rays.
+    gate_range : tuple or None, optional
+        Start and stop (exclusive) indices of the gates to unpack, None
+        unpacks all gates.
+
+    """
+
+    def __init__(self, ray_n_gates, ray_start_index, rays=None,
+                 gate_range=None):
+        """ initialize the object. """
+        self.ray_n_gates = ray_n_gates
+        self.ray_start_index = ray_start_index
+        self.rays = rays
+        self.gate_range = gate_range
+        self._index = None
+
+    def __call__(self):
+        """ Return the ray, gate and point indices of the data. """
+        if self._index is None:
+            ray_n_gates = np.asarray(self.ray_n_gates[:], dtype=np.intp)
+            ray_start_index = np.asarray(
+                self.ray_start_index[:], dtype=np.intp)
+            if self.rays is not None:
+                ray_n_gates = ray_n_gates[self.rays]
+                ray_start_index = ray_start_index[self.rays]
+            if self.gate_range is not None:
+                start, stop = self.gate_range
+                ray_start_index = ray_start_index + start
+                ray_n_gates = np.clip(ray_n_gates - start, 0, stop - start)
+            self._index = _variable_gate_index(ray_n_gates, ray_start_index)
+        return self._index
+
+
+def _variable_gate_index(ray_n_gates, ray_start_index):
+    """
+    Return the indices which unpack variable gate data into a 2D array.
+
+    Parameters
+    ----------
+    ray_n_gates : array
+        Number of gates in each ray.
+    ray_start_index : array
+        Index of the first gate of each ray in the 1D data.
+
+    Returns
+    -------
+    ray_idx, gate_idx : array
+        Ray and gate index in the 2D array of each unpacked point.
+    point_idx : array
+        Index in the 1D data of each unpacked point.
+
+    """
+    ray_n_gates = np.asarray(ray_n_gates, dtype=np.intp)
+    ray_start_index = np.asarray(ray_start_index, dtype=np.intp)
+    ray_idx = np.repeat(np.arange(len(ray_n_gates)), ray_n_gates)
+    # position of each point within its ray
+    ray_offset = np.cumsum(ray_n_gates) - ray_n_gates
+    gate_idx = np.arange(len(ray_idx)) - np.repeat(ray_offset, ray_n_gates)
+    point_idx = np.repeat(ray_start_index, ray_n_gates) + gate_idx
+    return ray_idx, gate_idx, point_idx
+
+
+def _sweep_ray_slices(sweep_start_ray_index, sweep_end_ray_index, sweeps):
+    """
+    Return slices selecting the rays in a list of sweeps.
+
+    Slices of sweeps which are adjacent in the file are merged so that
+    the fewest number of reads are needed.
+    """
+    slices = []
+    for i in sweeps:
+        start = int(sweep_start_ray_index[i])
+        stop = int(sweep_end_ray_index[i]) + 1
+        if len(slices) and slices[-1].stop == start:
+            slices[-1] = slice(slices[-1].start, stop)
+        else:
+            slices.append(slice(start, stop))
+    return slices
 
 
 def write_cfradial(filename, radar, format='NETCDF4', time_reference=None,
-                   arm_time_variables=False):
+                   arm_time_variables=False, encoding=None):
     """
     Write a Radar object to a CF/Radial compliant netCDF file.
 
@@ -429,9 +679,127 @@ def write_cfradial(filename, radar, format='NETCDF4', time_reference=None,
     arm_time_variables : bool
         True to create the ARM standard time variables base_time and
         time_offset, False will not create these variables.
+    encoding : None or 'auto', optional
+        None, the default, writes the fields as specified by the keys in the
+        field dictionaries.  'auto' packs floating point fields with
+        valid_min and valid_max keys into uint8, when the valid values are
+        integers spanning no more than 254, or into int16 with the scaling
+        calculated from the valid range.  Values outside the valid range are
+        written as missing.  All fields are chunked so that each chunk
+        contains the rays of a sweep.  Keys set in the field dictionaries
+        take precedence over the automatic choices.
+
+    Returns
+    -------
+    encodings : dict or None
+        Dictionary of the packing and chunking keys chosen for each field
+        when `encoding` is 'auto', None otherwise.
 
     """
+    if encoding not in [None, 'auto']:
+        raise ValueError("encoding must be None or 'auto'")
+
+    fields = None
+    encodings = None
+    if encoding == 'auto':
+        # chunk the fields so that each sweep is read from one chunk
+        rays_per_sweep = (radar.sweep_end_ray_index['data'] -
+                          radar.sweep_start_ray_index['data'] + 1)
+        chunk_rays = max(int(rays_per_sweep.max()), 1)
+        fields = {}
+        encodings = {}
+        for field, dic in radar.fields.items():
+            fields[field], encodings[field] = _auto_field_encoding(
+                dic, (chunk_rays, max(radar.ngates, 1)))
+
     dataset = netCDF4.Dataset(filename, 'w', format=format)
+    _write_radar(dataset, radar, time_reference, arm_time_variables,
+                 radar.nsweeps, fields)
+    dataset.close()
+    return encodings
+
+
+def _auto_field_encoding(dic, chunksizes):
+    """
+    Return a copy of a field dictionary with packing and chunking keys set.
+
+    Parameters
+    ----------
+    dic : dict
+        Radar field dictionary.
+    chunksizes : tuple
+        Chunk sizes used unless the _ChunkSizes or _Continguous keys are set.
+
+    Returns
+    -------
+    dic : dict
+        Copy of the field dictionary with the chosen keys added.
+    encoding : dict
+        The keys which were chosen.
+
+    """
+    dic = dict(dic)
+    encoding = {}
+    if '_ChunkSizes' not in dic and '_Continguous' not in dic:
+        encoding['_ChunkSizes'] = chunksizes
+
+    data = dic['data']
+    packed = ('_Write_as_dtype' in dic or 'scale_factor' in dic or
+              'add_offset' in dic)
+    if (not packed and np.issubdtype(data.dtype, np.floating) and
+            'valid_min' in dic and 'valid_max' in dic):
+        valid_min = float(dic['valid_min'])
+        valid_max = float(dic['valid_max'])
+
+        # values outside the valid range can not be packed
+        data = np.ma.masked_outside(np.ma.masked_invalid(data),
+                                    valid_min, valid_max)
+        dic['data'] = data
+        values = data.compressed()
+        if (valid_max - valid_min <= 254 and valid_min % 1 == 0 and
+                np.all(np.mod(values, 1) == 0)):
+            # integer values and offset, a scale of one packs these exactly
+            dtype = np.dtype('uint8')
+            maximum = valid_min + 254
+        else:
+            dtype = np.dtype('int16')
+            maximum = valid_max
+        scale, offset, fill = _calculate_scale_and_offset(
+            dic, dtype, valid_min, maximum)
+        encoding['_Write_as_dtype'] = dtype.str
+        encoding['scale_factor'] = scale
+        encoding['add_offset'] = offset
+        encoding['_FillValue'] = fill
+
+        # valid_min and valid_max of packed data are in packed units
+        dic['valid_min'] = dtype.type(round((valid_min - offset) / scale))
+        dic['valid_max'] = dtype.type(round((valid_max - offset) / scale))
+
+    dic.update(encoding)
+    return dic, encoding
+
+
+def _write_radar(dataset, radar, time_reference, arm_time_variables,
+                 sweep_size, fields=None):
+    """
+    Create the dimensions, variables and attributes of a CF/Radial file.
+
+    Parameters
+    ----------
+    dataset : Dataset
+        NetCDF dataset to write to.
+    radar : Radar
+        Radar object.
+    time_reference, arm_time_variables : bool
+        See :py:func:`write_cfradial`.
+    sweep_size : int or None
+        Size of the sweep dimension, None for an unlimited dimension.
+    fields : dict or None, optional
+        Field dictionaries to write in place of those in the radar object.
+
+    """
+    if fields is None:
+        fields = radar.fields
 
     # determine the maximum string length
     max_str_len = len(radar.sweep_mode['data'][0])
@@ -445,7 +813,7 @@ def write_cfradial(filename, radar, format='NETCDF4', time_reference=None,
     # create time, range and sweep dimensions
     dataset.createDimension('time', None)
     dataset.createDimension('range', radar.ngates)
-    dataset.createDimension('sweep', radar.nsweeps)
+    dataset.createDimension('sweep', sweep_size)
     dataset.createDimension('string_length', str_len)
 
     # global attributes
@@ -475,7 +843,7 @@ def write_cfradial(filename, radar, format='NETCDF4', time_reference=None,
         dataset.setncattr('Conventions', "CF/Radial")
 
     if 'field_names' not in dataset.ncattrs():
-        dataset.setncattr('field_names', ', '.join(radar.fields.keys()))
+        dataset.setncattr('field_names', ', '.join(fields.keys()))
 
     # history should be the last attribute, ARM standard
     dataset.setncattr('history', history)
@@ -516,7 +884,7 @@ def write_cfradial(filename, radar, format='NETCDF4', time_reference=None,
                       'antenna_transition', ('time', ))
 
     # fields
-    for field, dic in radar.fields.items():
+    for field, dic in fields.items():
         _create_ncvar(dic, dataset, field, ('time', 'range'))
 
     # sweep parameters
@@ -585,22 +953,8 @@ def write_cfradial(filename, radar, format='NETCDF4', time_reference=None,
 
     # time_coverage_start and time_coverage_end variables
     time_dim = ('string_length', )
-    units = radar.time['units']
-    start_dt = netCDF4.num2date(radar.time['data'][0], units)
-    if start_dt.microsecond != 0:
-        # truncate to nearest second
-        start_dt -= datetime.timedelta(microseconds=start_dt.microsecond)
-    end_dt = netCDF4.num2date(radar.time['data'][-1], units)
-    if end_dt.microsecond != 0:
-        # round up to next second
-        end_dt += (datetime.timedelta(seconds=1) -
-                   datetime.timedelta(microseconds=end_dt.microsecond))
-    start_dic = {'data': np.array(start_dt.isoformat() + 'Z', dtype='S'),
-                 'long_name': 'UTC time of first ray in the file',
-                 'units': 'unitless'}
-    end_dic = {'data': np.array(end_dt.isoformat() + 'Z', dtype='S'),
-               'long_name': 'UTC time of last ray in the file',
-               'units': 'unitless'}
+    start_dic, end_dic = _time_coverage_dics(
+        radar.time['data'][0], radar.time['data'][-1], radar.time['units'])
     _create_ncvar(start_dic, dataset, 'time_coverage_start', time_dim)
     _create_ncvar(end_dic, dataset, 'time_coverage_end', time_dim)
 
@@ -666,8 +1020,239 @@ def write_cfradial(filename, radar, format='NETCDF4', time_reference=None,
     if radar.georefs_applied is not None:
         _create_ncvar(radar.georefs_applied, dataset, 'georefs_applied',
                       ('time', ))
+    return
 
-    dataset.close()
+
+def _time_coverage_dics(start_time, end_time, units):
+    """
+    Return the time_coverage_start and time_coverage_end dictionaries.
+    """
+    start_dt = netCDF4.num2date(start_time, units)
+    if start_dt.microsecond != 0:
+        # truncate to nearest second
+        start_dt -= datetime.timedelta(microseconds=start_dt.microsecond)
+    end_dt = netCDF4.num2date(end_time, units)
+    if end_dt.microsecond != 0:
+        # round up to next second
+        end_dt += (datetime.timedelta(seconds=1) -
+                   datetime.timedelta(microseconds=end_dt.microsecond))
+    start_dic = {'data': np.array(start_dt.isoformat() + 'Z', dtype='S'),
+                 'long_name': 'UTC time of first ray in the file',
+                 'units': 'unitless'}
+    end_dic = {'data': np.array(end_dt.isoformat() + 'Z', dtype='S'),
+               'long_name': 'UTC time of last ray in the file',
+               'units': 'unitless'}
+    return start_dic, end_dic
+
+
+class CFRadialWriter(object):
+    """
+    A class for writing CF/Radial files one or more sweeps at a time.
+
+    The file is created with unlimited time and sweep dimensions.  The
+    first call to :py:func:`write_sweeps` creates all variables and
+    attributes as :py:func:`write_cfradial` does, subsequent calls append
+    the rays, field data and sweep parameters of the radar to these
+    variables.  Data is flushed to the file after each write so the sweeps
+    written can be read while the file is still being written.  The
+    time_coverage_end variable is finalized when the file is closed.
+
+    Parameters
+    ----------
+    filename : str
+        Filename to create.
+    format : str, optional
+        NetCDF format, only 'NETCDF4' supports multiple unlimited
+        dimensions.
+    time_reference : bool
+        True to include a time_reference variable, False will not include
+        this variable. The default, None, will include the time_reference
+        variable when the first time value is non-zero.
+    arm_time_variables : bool
+        True to create the ARM standard time variables base_time and
+        time_offset, False will not create these variables.
+
+    Attributes
+    ----------
+    nrays : int
+        Number of rays written to the file.
+    nsweeps : int
+        Number of sweeps written to the file.
+
+    Notes
+    -----
+    Variables packed as integers using the _Write_as_dtype key have their
+    scale_factor and add_offset determined from the first sweeps written
+    unless these keys are set in the radar dictionaries.  Writing later
+    sweeps with values outside of the range which can be packed with this
+    scale and offset raises a ValueError.
+
+    """
+
+    def __init__(self, filename, format='NETCDF4', time_reference=None,
+                 arm_time_variables=False):
+        """ initialize the object. """
+        if format != 'NETCDF4':
+            raise ValueError(
+                'format must be NETCDF4, other formats do not support '
+                'multiple unlimited dimensions')
+        self._dataset = netCDF4.Dataset(filename, 'w', format=format)
+        self._time_reference = time_reference
+        self._arm_time_variables = arm_time_variables
+        self.nrays = 0
+        self.nsweeps = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write_sweeps(self, radar):
+        """
+        Write all sweeps in a radar object to the end of the file.
+
+        Parameters
+        ----------
+        radar : Radar
+            Radar object containing the sweeps to write.  The fields, gates,
+            and optional attributes must match those of the first radar
+            written.
+
+        """
+        dataset = self._dataset
+        if self.nsweeps == 0:
+            _write_radar(dataset, radar, self._time_reference,
+                         self._arm_time_variables, None)
+        else:
+            if radar.ngates != len(dataset.dimensions['range']):
+                raise ValueError(
+                    'radar has %d gates, the file has %d gates' %
+                    (radar.ngates, len(dataset.dimensions['range'])))
+            # find the radar dictionary of each variable before writing so
+            # that an invalid radar does not leave the file partially updated
+            appends = []
+            for name, ncvar in dataset.variables.items():
+                if ncvar.dimensions[:1] == ('time', ):
+                    index = self.nrays
+                elif ncvar.dimensions[:1] == ('sweep', ):
+                    index = self.nsweeps
+                else:
+                    continue
+                dic = _get_radar_dic(radar, name)
+                if dic is None:
+                    raise ValueError('radar does not contain %s' % (name))
+                _check_packed_range(dic['data'], ncvar)
+                appends.append((name, ncvar, index, dic))
+
+            for name, ncvar, index, dic in appends:
+                data = dic['data']
+                if name in ['time', 'time_offset']:
+                    # convert times to the units in the file
+                    if radar.time['units'] != dataset.variables['time'].units:
+                        dts = netCDF4.num2date(data, radar.time['units'])
+                        data = netCDF4.date2num(
+                            dts, dataset.variables['time'].units)
+                if name in ['sweep_start_ray_index', 'sweep_end_ray_index']:
+                    data = data + self.nrays
+                _append_ncvar(dic, data, ncvar, index)
+        self.nrays += radar.nrays
+        self.nsweeps += radar.nsweeps
+        dataset.sync()
+
+    def close(self):
+        """ Finalize and close the file. """
+        dataset = self._dataset
+        if not dataset.isopen():
+            return
+        if self.nrays != 0:
+            time = dataset.variables['time']
+            _, end_dic = _time_coverage_dics(
+                time[0], time[self.nrays - 1], time.units)
+            _append_ncvar(end_dic, end_dic['data'],
+                          dataset.variables['time_coverage_end'], 0)
+        dataset.close()
+
+
+def _get_radar_dic(radar, name):
+    """
+    Return the radar dictionary written to the variable name, or None.
+    """
+    if name in radar.fields:
+        return radar.fields[name]
+    for params in [radar.instrument_parameters, radar.radar_calibration]:
+        if params is not None and name in params:
+            return params[name]
+    if name == 'time_offset':
+        return radar.time
+    return getattr(radar, name, None)
+
+
+def _check_packed_range(data, ncvar):
+    """
+    Check that data can be packed into an integer netCDF Variable.
+
+    Raises a ValueError when the values of data packed using the
+    scale_factor and add_offset of the variable are outside of the range
+    of its integer type, these would otherwise be written incorrectly.
+    """
+    if np.dtype(ncvar.dtype).kind not in 'iu':
+        return
+    ncattrs = ncvar.ncattrs()
+    if 'scale_factor' not in ncattrs and 'add_offset' not in ncattrs:
+        return
+    data = np.ma.masked_invalid(data)
+    if data.dtype.kind in 'iu' or data.count() == 0:
+        return  # integer data is written without scaling
+    scale = getattr(ncvar, 'scale_factor', 1.0)
+    offset = getattr(ncvar, 'add_offset', 0.0)
+    packed = np.around((data - offset) / scale)
+    info = np.iinfo(ncvar.dtype)
+    minimum = info.min
+    if getattr(ncvar, '_FillValue', None) == info.min:
+        minimum += 1    # the smallest value is reserved for missing data
+    if packed.min() < minimum or packed.max() > info.max:
+        raise ValueError(
+            'values of %s from %f to %f are outside the range which can be '
+            'packed with the scale_factor and add_offset of the file: '
+            '%f to %f' % (ncvar.name, data.min(), data.max(),
+                          minimum * scale + offset, info.max * scale + offset))
+
+
+def _append_ncvar(dic, data, ncvar, index):
+    """
+    Write data to a netCDF Variable starting at a given index.
+
+    Parameters
+    ----------
+    dic : dict
+        Radar dictionary containing the variable meta-data.
+    data : array
+        Data to write.
+    ncvar : Variable
+        NetCDF variable to write to.
+    index : int
+        Index along the first dimension of ncvar at which to write.
+
+    """
+    data = np.asanyarray(data)
+    # convert string/unicode arrays to character arrays
+    if data.dtype.char == 'U':
+        data = data.astype('S')
+    if data.dtype.char == 'S' and data.dtype != 'S1':
+        data = stringarray_to_chararray(data)
+
+    if data.dtype == 'S1':  # string/char arrays
+        if ncvar.ndim == 1:
+            ncvar[:data.shape[-1]] = data[:]
+        else:
+            ncvar[index:index + len(data), :data.shape[-1]] = data[:]
+    else:
+        if data.dtype.kind in 'iu' and ('scale_factor' in dic or
+                                        'add_offset' in dic):
+            # data stored as packed integers is written without scaling
+            ncvar.set_auto_scale(False)
+        ncvar[index:index + len(data)] = data[:]
 
 
 def _create_ncvar(dic, dataset, name, dimensions):
@@ -769,6 +1354,10 @@ def _create_ncvar(dic, dataset, name, dimensions):
         else:
             ncvar[..., :data.shape[-1]] = data[:]
     else:
+        if data.dtype.kind in 'iu' and ('scale_factor' in dic or
+                                        'add_offset' in dic):
+            # data stored as packed integers is written without scaling
+            ncvar.set_auto_scale(False)
         ncvar[:] = data[:]
 
 
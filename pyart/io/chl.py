@@ -14,6 +14,7 @@ Utilities for reading CSU-CHILL CHL files.
     :toctree: generated/
 
     read_chl
+    _ChlFieldData
     _unpack_structure
 
 """
@@ -25,12 +26,15 @@ import numpy as np
 
 from ..config import FileMetadata, get_fillvalue
 from ..core.radar import Radar
+from ..lazydict import LazyLoadDict
 from .common import make_time_unit_str, _test_arguments, prepare_for_read
+from .common import _map_file
 
 
 def read_chl(filename, field_names=None, additional_metadata=None,
              file_field_names=None, exclude_fields=None,
-             use_file_field_attributes=True, **kwargs):
+             use_file_field_attributes=True, delay_field_loading=False,
+             **kwargs):
     """
     Read a CSU-CHILL CHL file.
 
@@ -63,6 +67,12 @@ def read_chl(filename, field_names=None, additional_metadata=None,
         attribute `long_name`, `units`, `valid_max`, and `valid_min`.  False
         will not set these unless they are defined in the configuration file
         or in `additional_metadata`.
+    delay_field_loading : bool, optional
+        True to delay loading of field data from the file until the 'data'
+        key in a particular field dictionary is accessed.  In this case
+        the field attribute of the returned Radar object will contain
+        LazyLoadDict objects not dict objects.  Only the offsets of the ray
+        data are recorded when the file is read and the file is left open.
 
     Returns
     -------
@@ -78,7 +88,8 @@ def read_chl(filename, field_names=None, additional_metadata=None,
                                 file_field_names, exclude_fields)
 
     # read data
-    chl_file = ChlFile(prepare_for_read(filename))
+    chl_file = ChlFile(prepare_for_read(filename),
+                       delay_field_loading=delay_field_loading)
 
     # time
     time = filemetadata('time')
@@ -99,7 +110,7 @@ def read_chl(filename, field_names=None, additional_metadata=None,
 
     # fields
     fields = {}
-    for i, fdata in chl_file.fields.items():
+    for i in chl_file.field_nums:
 
         field_info = chl_file.field_info[i]
         field_name = filemetadata.get_field_name(field_info['name'])
@@ -107,9 +118,13 @@ def read_chl(filename, field_names=None, additional_metadata=None,
             continue
 
         field_dic = filemetadata(field_name)
-        np.ma.set_fill_value(fdata, get_fillvalue())
-        field_dic['data'] = fdata
         field_dic['_FillValue'] = get_fillvalue()
+        field_data = _ChlFieldData(chl_file, i, get_fillvalue())
+        if delay_field_loading:
+            field_dic = LazyLoadDict(field_dic)
+            field_dic.set_lazy('data', field_data)
+        else:
+            field_dic['data'] = field_data()
 
         if use_file_field_attributes:
             field_dic['long_name'] = field_info['descr']
@@ -158,7 +173,8 @@ def read_chl(filename, field_names=None, additional_metadata=None,
     # instrument parameters
     instrument_parameters = None
 
-    chl_file.close()
+    if not delay_field_loading:
+        chl_file.close()
     return Radar(
         time, _range, fields, metadata, scan_type,
         latitude, longitude, altitude,
@@ -183,6 +199,11 @@ class ChlFile(object):
     debug : bool
         True to keep packet data in the _packets attribute to aid in
         debugging.
+    delay_field_loading : bool
+        True to only record the file offsets of the ray data rather than
+        reading it.  The field data is then read when requested using
+        :py:func:`get_field_data`, from a memory map of the file when
+        possible.  The fields attribute is not populated in this case.
 
     Attributes
     ----------
@@ -208,6 +229,8 @@ class ChlFile(object):
         Chill defined scan type for each sweep.
     rays_per_sweep : list of ints
         Number of rays in each sweep.
+    field_nums : list of ints
+        Field numbers available in the file.
     fields : dict
         Dictionary of field data index by field number.
     radar_info : dict
@@ -219,7 +242,8 @@ class ChlFile(object):
 
     """
 
-    def __init__(self, filename, ns_time=True, debug=False):
+    def __init__(self, filename, ns_time=True, debug=False,
+                 delay_field_loading=False):
 
         # initalize attributes
         self.ngates = None
@@ -239,7 +263,10 @@ class ChlFile(object):
         self.first_gate_offset = None
 
         # private attributes
-        self._dstring = b''     # string containing field data.
+        self._ray_data = None   # array of ray data, grown as rays are read.
+        self._nrays = 0         # number of rays read.
+        self._ray_offsets = []  # file offsets of ray data, delayed loading.
+        self._buf = None        # memory map of the file, delayed loading.
         self._bit_mask = None   # bit mask specifying fields present in file.
         self._dtype = None      # NumPy dtype for a single gate (all fields).
         self._ray_bsize = None  # size in bytes of a single ray (all fields).
@@ -248,6 +275,7 @@ class ChlFile(object):
         self._rays_in_current_sweep = None  # accumulator for counting rays.
         self._fh = None         # file handler
         self._include_ns_time = ns_time
+        self._delay_field_loading = delay_field_loading
 
         # read all blocks from the file
         if hasattr(filename, 'read'):
@@ -260,13 +288,44 @@ class ChlFile(object):
             if debug:
                 self._packets.append(packet)
 
-        self._extract_fields()
+        self.field_nums = self._field_nums
+        if delay_field_loading:
+            self._buf = _map_file(self._fh)
+        else:
+            self._extract_fields()
         self.rays_per_sweep.append(self._rays_in_current_sweep)
 
     def close(self):
         """ Close the file. """
+        if self._buf is not None:
+            self._buf.close()
+            self._buf = None
         self._fh.close()
 
+    def get_field_data(self, field_num):
+        """
+        Return the scaled and masked data for a field.
+
+        Parameters
+        ----------
+        field_num : int
+            Field number of the field.
+
+        Returns
+        -------
+        fdata : MaskedArray
+            Field data, (nrays, ngates).
+
+        """
+        if field_num in self.fields:
+            return self.fields[field_num]
+        name = np.dtype(self._dtype).names[self._field_nums.index(field_num)]
+        if self._delay_field_loading:
+            raw_data = self._read_delayed_field(name)
+        else:
+            raw_data = self._ray_data[:self._nrays][name]
+        return self._scale_field(field_num, raw_data)
+
     def _read_block(self):
         """ Read a block from an open CHL file """
         pld = self._fh.read(8)
@@ -369,7 +428,11 @@ class ChlFile(object):
                 raise NotImplementedError('number of gates vary.')
 
         # store ray data and pointing data
-        self._dstring += self._fh.read(self._ray_bsize)
+        if self._delay_field_loading:
+            self._ray_offsets.append(self._fh.tell())
+            self._fh.seek(self._ray_bsize, 1)
+        else:
+            self._store_ray_data(self._fh.read(self._ray_bsize))
         if self._include_ns_time:
             self.time.append(packet['time'] + packet['ns_time']/1e9)
         else:
@@ -380,22 +443,86 @@ class ChlFile(object):
 
         return packet
 
+    def _store_ray_data(self, ray_bytes):
+        """ Store the data from a ray in the _ray_data array. """
+        # the array is grown geometrically to avoid repeated copies
+        if self._ray_data is None:
+            self._ray_data = np.empty((256, self.ngates), dtype=self._dtype)
+        elif self._nrays == len(self._ray_data):
+            ray_data = np.empty(
+                (2 * len(self._ray_data), self.ngates), dtype=self._dtype)
+            ray_data[:self._nrays] = self._ray_data
+            self._ray_data = ray_data
+        self._ray_data[self._nrays] = np.frombuffer(ray_bytes, self._dtype)
+        self._nrays += 1
+
+    def _read_delayed_field(self, name):
+        """ Read the raw data for a field from the recorded ray offsets. """
+        dtype = np.dtype(self._dtype)
+        nrays = len(self._ray_offsets)
+        if self._buf is None:
+            # file cannot be memory-mapped, read all ray data
+            ray_data = np.empty((nrays, self.ngates), dtype=dtype)
+            for i, offset in enumerate(self._ray_offsets):
+                self._fh.seek(offset)
+                ray_data[i] = np.frombuffer(
+                    self._fh.read(self._ray_bsize), dtype)
+            return ray_data[name]
+
+        # copy only the field from a view of each ray in the memory map
+        raw_data = np.empty((nrays, self.ngates), dtype=dtype.fields[name][0])
+        for i, offset in enumerate(self._ray_offsets):
+            raw_data[i] = np.frombuffer(
+                self._buf, dtype, count=self.ngates, offset=offset)[name]
+        return raw_data
+
+    def _scale_field(self, field_num, raw_data):
+        """ Return the masked, scaled data for a field from raw data. """
+        fdata = np.ma.masked_values(raw_data, 0)
+        # apply scale and offset factors to interger data types
+        if issubclass(fdata.dtype.type, np.integer):
+            dat_factor = float(self.field_info[field_num]['dat_factor'])
+            dat_bias = float(self.field_info[field_num]['dat_bias'])
+            fld_factor = float(self.field_info[field_num]['fld_factor'])
+            fdata = (fdata * dat_factor + dat_bias) / fld_factor
+        return fdata
+
     def _extract_fields(self):
-        """ Extract field data from _dstring attribute post read. """
-        all_data = np.fromstring(self._dstring, dtype=self._dtype)
-        all_data = all_data.reshape(-1, self.ngates)
+        """ Extract field data from _ray_data attribute post read. """
+        all_data = self._ray_data[:self._nrays]
         for i, field_num in enumerate(self._field_nums):
+            self.fields[field_num] = self._scale_field(
+                field_num, all_data[all_data.dtype.names[i]])
+        return
 
-            fdata = np.ma.masked_values(all_data[all_data.dtype.names[i]], 0)
-            # apply scale and offset factors to interger data types
-            if issubclass(fdata.dtype.type, np.integer):
-                dat_factor = float(self.field_info[field_num]['dat_factor'])
-                dat_bias = float(self.field_info[field_num]['dat_bias'])
-                fld_factor = float(self.field_info[field_num]['fld_factor'])
-                fdata = (fdata * dat_factor + dat_bias) / fld_factor
 
-            self.fields[field_num] = fdata
-        return
+class _ChlFieldData(object):
+    """
+    Class facilitating on demand extraction of field data from a CHL file.
+
+    Parameters
+    ----------
+    chl_file : ChlFile
+        Open ChlFile object to extract data from.
+    field_num : int
+        Field number of data to be extracted.
+    fillvalue : float
+        Fill value to set on the returned masked array.
+
+    """
+
+    def __init__(self, chl_file, field_num, fillvalue):
+        """ initialize the object. """
+        self.chl_file = chl_file
+        self.field_num = field_num
+        self.fillvalue = fillvalue
+
+    def __call__(self):
+        """ Return a masked array containing the field data. """
+        fdata = self.chl_file.get_field_data(self.field_num)
+        np.ma.set_fill_value(fdata, self.fillvalue)
+        return fdata
+
 
 # CHL packet types
 ARCH_FORMAT_VERSION = 0x00010000
@@ -11,11 +11,14 @@ Input/output routines common to many file formats.
     stringarray_to_chararray
     _test_arguments
     make_time_unit_str
+    _map_file
 
 """
 
 import bz2
 import gzip
+import io
+import mmap
 
 import numpy as np
 import netCDF4
@@ -108,3 +111,16 @@ def _test_arguments(dic):
 def make_time_unit_str(dtobj):
     """ Return a time unit string from a datetime object. """
     return "seconds since " + dtobj.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _map_file(fh):
+    """
+    Return a read-only memory map of a regular file, None for other
+    file-like objects or files which cannot be mapped.
+    """
+    if isinstance(fh, io.BufferedReader):
+        try:
+            return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, EnvironmentError, io.UnsupportedOperation):
+            pass    # empty files and non-regular files cannot be mapped
+    return None
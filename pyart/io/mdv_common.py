@@ -22,6 +22,7 @@ import gzip
 import zlib
 from io import BytesIO
 import datetime
+from multiprocessing.pool import ThreadPool
 
 import numpy as np
 
@@ -494,7 +495,7 @@ class MdvFile(object):
             print("Writing chunk headers")
         self._write_chunk_headers(self.master_header["nchunks"])
 
-    def read_a_field(self, fnum, debug=False):
+    def read_a_field(self, fnum, debug=False, levels=None, nthreads=1):
         """
         Read a field from the MDV file.
 
@@ -504,12 +505,21 @@ class MdvFile(object):
             Field number to read.
         debug : bool
             True to print debugging information, False to supress.
+        levels : list or None
+            Vertical levels (0 based) to read.  Only the data for these levels
+            is decompressed and the returned array contains these levels in
+            the order given.  The data is not stored in the object.  None, the
+            default, reads all levels.
+        nthreads : int
+            Number of threads used to decompress the level data.  The levels
+            are compressed independently and are decompressed in parallel
+            when more than one thread is used.
 
         Returns
         -------
         field_data : array
-            Field data.  This data is also stored as a object attribute under
-            the field name.
+            Field data.  When all levels are read this data is also stored as
+            a object attribute under the field name.
 
         See Also
         --------
@@ -518,97 +528,83 @@ class MdvFile(object):
         """
 
         field_header = self.field_headers[fnum]
+        nz = field_header['nz']
+        ny = field_header['ny']
+        nx = field_header['nx']
+        if levels is not None:
+            levels = list(levels)
+            if len(levels) > 0 and (min(levels) < 0 or max(levels) >= nz):
+                raise ValueError(
+                    'invalid levels, the field contains %d levels' % (nz))
+        if nthreads < 1:
+            raise ValueError('nthreads must be a positive integer')
+
         # if the field has already been read, return it
         if self.fields_data[fnum] is not None:
             if debug:
                 print("Getting data from the object.")
+            if levels is not None:
+                return self.fields_data[fnum][levels]
             return self.fields_data[fnum]
 
         # field has not yet been read, populate the object and return
         if debug:
             print("No data found in object, populating")
 
-        nz = field_header['nz']
-        ny = field_header['ny']
-        nx = field_header['nx']
-
         # read the header
-        field_data = np.zeros([nz, ny, nx], dtype='float32')
         self.fileptr.seek(field_header['field_data_offset'])
-        self._get_levels_info(nz)  # dict not used, but need to seek.
-
-        for sw in range(nz):
+        levels_info = self._get_levels_info(nz)
+        levels_start = self.fileptr.tell()
+
+        # level offsets written by older versions of Py-ART are in native
+        # byte order, only seek to the levels when the offsets are plausible
+        volume_size = field_header['volume_size']
+        seek_levels = levels is not None and all(
+            offset + nbytes <= volume_size for offset, nbytes in
+            zip(levels_info['vlevel_offsets'], levels_info['vlevel_nbytes']))
+
+        # read the compressed level data, levels are read sequentially
+        # unless only some levels were requested
+        if levels is None:
+            read_levels = range(nz)
+        elif seek_levels:
+            read_levels = levels
+        else:
+            read_levels = range(max(levels) + 1)
+        compr_levels = []
+        for sw in read_levels:
             if debug:
                 print("doing levels ", sw)
+            if seek_levels:
+                self.fileptr.seek(
+                    levels_start + levels_info['vlevel_offsets'][sw])
+            compr_levels.append(self._get_compressed_level())
+        if levels is not None and not seek_levels:
+            compr_levels = [compr_levels[sw] for sw in levels]
+
+        # decompress the level data
+        def decode_level(compr_level):
+            """ Decode the data from a single level. """
+            return _decode_level(field_header, *compr_level)
+
+        if nthreads > 1 and len(compr_levels) > 1:
+            # zlib and gzip release the GIL while decompressing
+            pool = ThreadPool(min(nthreads, len(compr_levels)))
+            try:
+                sweeps = pool.map(decode_level, compr_levels)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            sweeps = [decode_level(c) for c in compr_levels]
 
-            # get the compressed level data
-            compr_info = self._get_compression_info()
-            if compr_info['magic_cookie'] == 0xfe0103fd:
-                # Run length encoding only has 20 bytes of compression
-                # information with slightly different order, back up
-                # 4 bytes to read all of the compressed data.
-                self.fileptr.seek(-4, 1)
-                compr_data = self.fileptr.read(compr_info['spare'][0])
-            else:
-                compr_data = self.fileptr.read(compr_info['nbytes_coded'])
-            encoding_type = field_header['encoding_type']
-            if encoding_type == ENCODING_INT8:
-                fmt = '>%iB' % (nx * ny)
-                np_form = '>B'
-            elif encoding_type == ENCODING_INT16:
-                fmt = '>%iH' % (nx * ny)
-                np_form = '>H'
-            elif encoding_type == ENCODING_FLOAT32:
-                fmt = '>%if' % (nx * ny)
-                np_form = '>f'
-            else:
-                raise NotImplementedError('encoding: ', encoding_type)
-
-            # decompress the level data
-            if compr_info['magic_cookie'] == 0xf7f7f7f7:
-                cd_fobj = BytesIO(compr_data)
-                gzip_file_handle = gzip.GzipFile(fileobj=cd_fobj)
-                decompr_data = gzip_file_handle.read(struct.calcsize(fmt))
-                gzip_file_handle.close()
-            elif compr_info['magic_cookie'] == 0xf5f5f5f5:
-                decompr_data = zlib.decompress(compr_data)
-            elif compr_info['magic_cookie'] == 0xf6f6f6f6:
-                # ZLIB_NOT_COMPRESSED
-                decompr_data = compr_data
-            elif compr_info['magic_cookie'] == 0xfe0103fd:
-                # Run length encoding of 8-bit data
-                # Compression info is in a different order, namely
-                # int32 : RL8_FLAG (0xfe0103fd)
-                # int32 : key
-                # int32 : nbytes_array (bytes of encoded data with header)
-                # int32 : nbytes_full (bytes of unencoded data, no header)
-                # int32 : nbytes_coded (bytes of encoded data, no header)
-                key = compr_info['nbytes_uncompressed']
-                decompr_size = compr_info['nbytes_coded']
-                decompr_data = _decode_rle8(compr_data, key, decompr_size)
-            else:
-                raise NotImplementedError('unsupported compression mode')
-                # With sample data it should be possible to write
-                # decompressor for other modes, the compression magic
-                # cookies for these modes are:
-                # 0x2f2f2f2f : TA_NOT_COMPRESSED
-                # 0xf8f8f8f8 : GZIP_NOT_COMPRSSED
-                # 0xf3f3f3f3 : BZIP_COMPRESSED
-                # 0xf4f4f4f4 : BZIP_NOT_COMPRESSED
-
-            # read the decompressed data, reshape and mask
-            sw_data = np.fromstring(decompr_data, np_form).astype('float32')
-            sw_data.shape = (ny, nx)
-            mask = sw_data == field_header['bad_data_value']
-            np.putmask(sw_data, mask, [np.NaN])
-
-            # scale and offset the data, store in field_data
-            scale = field_header['scale']
-            bias = field_header['bias']
-            field_data[sw, :, :] = sw_data * scale + bias
+        field_data = np.zeros([len(sweeps), ny, nx], dtype='float32')
+        for i, sw_data in enumerate(sweeps):
+            field_data[i, :, :] = sw_data
 
         # store data as object attribute and return
-        self.fields_data[fnum] = field_data
+        if levels is None:
+            self.fields_data[fnum] = field_data
         return field_data
 
     def read_all_fields(self):
@@ -987,6 +983,20 @@ class MdvFile(object):
                 self.fileptr.read(struct.calcsize(self.compression_info_fmt)))
         return self._unpack_mapped_tuple(l, self.compression_info_mapper)
 
+    def _get_compressed_level(self):
+        """ Get the compression information and data for a level. """
+        # the file pointer must be set at the correct location prior to call
+        compr_info = self._get_compression_info()
+        if compr_info['magic_cookie'] == 0xfe0103fd:
+            # Run length encoding only has 20 bytes of compression
+            # information with slightly different order, back up
+            # 4 bytes to read all of the compressed data.
+            self.fileptr.seek(-4, 1)
+            compr_data = self.fileptr.read(compr_info['spare'][0])
+        else:
+            compr_data = self.fileptr.read(compr_info['nbytes_coded'])
+        return compr_info, compr_data
+
     def _write_compression_info(self, d):
         """ Write compression infomation"""
         # the file pointer must be set at the correct location prior to call
@@ -1021,7 +1031,7 @@ class MdvFile(object):
     def _write_levels_info(self, nlevels, d):
         """ write levels information, return a dict. """
         # the file pointer must be set at the correct location prior to call
-        fmt = '%iI %iI' % (nlevels, nlevels)
+        fmt = '>%iI %iI' % (nlevels, nlevels)
         l = d['vlevel_offsets'] + d['vlevel_nbytes']
         # cast to string as Python < 2.7.7 pack does not except unicode
         fmt = str(fmt)
@@ -1137,27 +1147,93 @@ class MdvFile(object):
         return [fh[i]['field_name'] for i in range(len(fh))]
 
 
+def _decode_level(field_header, compr_info, compr_data):
+    """ Decompress, scale and mask the data from a single level. """
+    ny = field_header['ny']
+    nx = field_header['nx']
+    encoding_type = field_header['encoding_type']
+    if encoding_type == ENCODING_INT8:
+        fmt = '>%iB' % (nx * ny)
+        np_form = '>B'
+    elif encoding_type == ENCODING_INT16:
+        fmt = '>%iH' % (nx * ny)
+        np_form = '>H'
+    elif encoding_type == ENCODING_FLOAT32:
+        fmt = '>%if' % (nx * ny)
+        np_form = '>f'
+    else:
+        raise NotImplementedError('encoding: ', encoding_type)
+
+    # decompress the level data
+    if compr_info['magic_cookie'] == 0xf7f7f7f7:
+        cd_fobj = BytesIO(compr_data)
+        gzip_file_handle = gzip.GzipFile(fileobj=cd_fobj)
+        decompr_data = gzip_file_handle.read(struct.calcsize(fmt))
+        gzip_file_handle.close()
+    elif compr_info['magic_cookie'] == 0xf5f5f5f5:
+        decompr_data = zlib.decompress(compr_data)
+    elif compr_info['magic_cookie'] == 0xf6f6f6f6:
+        # ZLIB_NOT_COMPRESSED
+        decompr_data = compr_data
+    elif compr_info['magic_cookie'] == 0xfe0103fd:
+        # Run length encoding of 8-bit data
+        # Compression info is in a different order, namely
+        # int32 : RL8_FLAG (0xfe0103fd)
+        # int32 : key
+        # int32 : nbytes_array (bytes of encoded data with header)
+        # int32 : nbytes_full (bytes of unencoded data, no header)
+        # int32 : nbytes_coded (bytes of encoded data, no header)
+        key = compr_info['nbytes_uncompressed']
+        decompr_size = compr_info['nbytes_coded']
+        decompr_data = _decode_rle8(compr_data, key, decompr_size)
+    else:
+        raise NotImplementedError('unsupported compression mode')
+        # With sample data it should be possible to write
+        # decompressor for other modes, the compression magic
+        # cookies for these modes are:
+        # 0x2f2f2f2f : TA_NOT_COMPRESSED
+        # 0xf8f8f8f8 : GZIP_NOT_COMPRSSED
+        # 0xf3f3f3f3 : BZIP_COMPRESSED
+        # 0xf4f4f4f4 : BZIP_NOT_COMPRESSED
+
+    # read the decompressed data, reshape and mask
+    sw_data = np.fromstring(decompr_data, np_form).astype('float32')
+    sw_data.shape = (ny, nx)
+    mask = sw_data == field_header['bad_data_value']
+    np.putmask(sw_data, mask, [np.NaN])
+
+    # scale and offset the data
+    scale = field_header['scale']
+    bias = field_header['bias']
+    return sw_data * scale + bias
+
+
 def _decode_rle8(compr_data, key, decompr_size):
     """ Decode 8-bit MDV run length encoding. """
     # Encoding is described in section 7 of:
     # http://rap.ucar.edu/projects/IHL/RalHtml/protocols/mdv_file/
-    # This function would benefit greate by being rewritten in Cython
-    data = np.fromstring(compr_data, dtype='>B')
-    out = np.empty((decompr_size, ), dtype='uint8')
-    data_ptr = 0
-    out_ptr = 0
-    while data_ptr != len(data):
-        v = data[data_ptr]
-        if v != key:  # not encoded
-            out[out_ptr] = v
-            data_ptr += 1
-            out_ptr += 1
-        else:   # run length encoded
-            count = data[data_ptr+1]
-            value = data[data_ptr+2]
-            out[out_ptr:out_ptr+count] = value
-            data_ptr += 3
-            out_ptr += count
+    # A byte equal to the key starts a run and is followed by the count and
+    # the value of the run, all other bytes are literal values.
+    data = np.frombuffer(compr_data, dtype='>B')
+    repeats = np.ones((len(data), ), dtype='intp')
+    values = data.copy()
+
+    # the count and value bytes of a run can be equal to the key, so the
+    # candidate keys are checked in order, only these are looped over.
+    next_ptr = 0
+    for ptr in np.flatnonzero(data == key):
+        if ptr < next_ptr:
+            continue    # count or value byte of the previous run
+        if ptr + 2 >= len(data):
+            break       # truncated run
+        repeats[ptr] = data[ptr + 1]
+        values[ptr] = data[ptr + 2]
+        repeats[ptr + 1:ptr + 3] = 0
+        next_ptr = ptr + 3
+
+    decoded = np.repeat(values, repeats)[:decompr_size]
+    out = np.zeros((decompr_size, ), dtype='uint8')
+    out[:len(decoded)] = decoded
     return out.tostring()
 
 
@@ -1176,20 +1252,29 @@ class _MdvVolumeDataExtractor(object):
     two_dims : bool.
         True to combine the first and second dimension of the array when
         returning the data, False will return a three dimensional array.
+    levels : list or None
+        Vertical levels to extract, None for all levels.  Only the data for
+        these levels is decompressed.
+    nthreads : int
+        Number of threads used to decompress the level data.
 
     """
 
-    def __init__(self, mdvfile, field_num, fillvalue, two_dims=True):
+    def __init__(self, mdvfile, field_num, fillvalue, two_dims=True,
+                 levels=None, nthreads=1):
         """ initialize the object. """
         self.mdvfile = mdvfile
         self.field_num = field_num
         self.fillvalue = fillvalue
         self.two_dims = two_dims
+        self.levels = levels
+        self.nthreads = nthreads
 
     def __call__(self):
         """ Return an array containing data from the referenced volume. """
         # grab data from MDV object, mask and reshape
-        data = self.mdvfile.read_a_field(self.field_num)
+        data = self.mdvfile.read_a_field(
+            self.field_num, levels=self.levels, nthreads=self.nthreads)
         data[np.where(np.isnan(data))] = self.fillvalue
         data[np.where(data == 131072)] = self.fillvalue
         data = np.ma.masked_equal(data, self.fillvalue)
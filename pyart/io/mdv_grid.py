@@ -232,7 +232,8 @@ def write_grid_mdv(filename, grid, mdv_field_names=None,
 
 def read_grid_mdv(filename, field_names=None, additional_metadata=None,
                   file_field_names=False, exclude_fields=None,
-                  delay_field_loading=False, **kwargs):
+                  delay_field_loading=False, levels=None, nthreads=1,
+                  **kwargs):
     """
     Read a MDV file to a Grid Object.
 
@@ -266,6 +267,14 @@ def read_grid_mdv(filename, field_names=None, additional_metadata=None,
         key in a particular field dictionary is accessed.  In this case
         the field attribute of the returned Radar object will contain
         LazyLoadDict objects not dict objects.
+    levels : list or None, optional
+        Vertical levels (0 based) to read from the file.  Only these levels
+        are placed in the grid object and only the field data for these
+        levels is decompressed.  None, the default, reads all levels.
+    nthreads : int, optional
+        Number of threads used to decompress the field data.  Each level is
+        compressed independently and levels are decompressed in parallel
+        when more than one thread is used.
 
     Returns
     -------
@@ -367,6 +376,15 @@ def read_grid_mdv(filename, field_names=None, additional_metadata=None,
     z['data'] = np.array(z_line, dtype='float64')
     z['units'] = zunits
 
+    if levels is not None:
+        levels = list(levels)
+        if len(levels) == 0:
+            raise ValueError('at least one level must be requested')
+        if min(levels) < 0 or max(levels) >= nz:
+            raise ValueError('invalid levels, the file contains %d levels'
+                             % (nz))
+        z['data'] = z['data'][levels]
+
     # metadata
     metadata = filemetadata('metadata')
     for meta_key, mdv_key in mdv_common.MDV_METADATA_MAP.items():
@@ -383,7 +401,8 @@ def read_grid_mdv(filename, field_names=None, additional_metadata=None,
 
         field_dic['_FillValue'] = get_fillvalue()
         dataextractor = mdv_common._MdvVolumeDataExtractor(
-            mdv, mdv.fields.index(mdv_field), get_fillvalue(), two_dims=False)
+            mdv, mdv.fields.index(mdv_field), get_fillvalue(), two_dims=False,
+            levels=levels, nthreads=nthreads)
         if delay_field_loading:
             field_dic = LazyLoadDict(field_dic)
             field_dic.set_lazy('data', dataextractor)
@@ -23,7 +23,7 @@ from . import mdv_common
 
 def read_mdv(filename, field_names=None, additional_metadata=None,
              file_field_names=False, exclude_fields=None,
-             delay_field_loading=False, **kwargs):
+             delay_field_loading=False, sweeps=None, nthreads=1, **kwargs):
     """
     Read a MDV file.
 
@@ -58,6 +58,14 @@ def read_mdv(filename, field_names=None, additional_metadata=None,
         the field attribute of the returned Radar object will contain
         LazyLoadDict objects not dict objects. Not all file types support this
         parameter.
+    sweeps : list or None, optional
+        Sweeps (0 based) to read from the file.  Only these sweeps are placed
+        in the radar object and only the field data for these sweeps is
+        decompressed.  None, the default, reads all sweeps in the file.
+    nthreads : int, optional
+        Number of threads used to decompress the field data.  Each sweep is
+        compressed independently and sweeps are decompressed in parallel
+        when more than one thread is used.
 
     Returns
     -------
@@ -88,6 +96,20 @@ def read_mdv(filename, field_names=None, additional_metadata=None,
     if scan_type not in ['ppi', 'rhi']:
         raise NotImplementedError('No support for scan_type %s.' % scan_type)
 
+    if scan_type == 'ppi':
+        nsweeps = nele
+        rays_per_sweep = naz
+    else:
+        nsweeps = naz
+        rays_per_sweep = nele
+    if sweeps is not None:
+        sweeps = list(sweeps)
+        if len(sweeps) == 0:
+            raise ValueError('at least one sweep must be requested')
+        if min(sweeps) < 0 or max(sweeps) >= nsweeps:
+            raise ValueError('invalid sweeps, the file contains %d sweeps'
+                             % (nsweeps))
+
     # time
     time = filemetadata('time')
     units = make_time_unit_str(mdvfile.times['time_begin'])
@@ -113,7 +135,8 @@ def read_mdv(filename, field_names=None, additional_metadata=None,
         field_dic = filemetadata(field_name)
         field_dic['_FillValue'] = get_fillvalue()
         dataextractor = mdv_common._MdvVolumeDataExtractor(
-            mdvfile, mdvfile.fields.index(mdv_field), get_fillvalue())
+            mdvfile, mdvfile.fields.index(mdv_field), get_fillvalue(),
+            levels=sweeps, nthreads=nthreads)
         if delay_field_loading:
             field_dic = LazyLoadDict(field_dic)
             field_dic.set_lazy('data', dataextractor)
@@ -149,7 +172,6 @@ def read_mdv(filename, field_names=None, additional_metadata=None,
     len_time = len(time['data'])
 
     if scan_type == 'ppi':
-        nsweeps = nele
         sweep_number['data'] = np.arange(nsweeps, dtype='int32')
         sweep_mode['data'] = np.array(
             nsweeps * ['azimuth_surveillance'], dtype='S')
@@ -160,7 +182,6 @@ def read_mdv(filename, field_names=None, additional_metadata=None,
                                                 dtype='int32')
 
     elif scan_type == 'rhi':
-        nsweeps = naz
         sweep_number['data'] = np.arange(nsweeps, dtype='int32')
         sweep_mode['data'] = np.array(nsweeps * ['rhi'], dtype='S')
         fixed_angle['data'] = np.array(az_deg, dtype='float32')
@@ -220,6 +241,23 @@ def read_mdv(filename, field_names=None, additional_metadata=None,
                              'radar_beam_width_h': beam_width_h,
                              'radar_beam_width_v': beam_width_v}
 
+    if sweeps is not None:
+        # keep only the rays and sweep parameters of the requested sweeps
+        rays = np.concatenate([np.arange(
+            i * rays_per_sweep, (i + 1) * rays_per_sweep) for i in sweeps])
+        for dic in [time, azimuth, elevation, prt, unambiguous_range,
+                    nyquist_velocity]:
+            dic['data'] = dic['data'][rays]
+        for dic in [sweep_mode, fixed_angle, prt_mode]:
+            dic['data'] = dic['data'][sweeps]
+        nsweeps = len(sweeps)
+        sweep_number['data'] = np.array(sweeps, dtype='int32')
+        sweep_start_ray_index['data'] = np.arange(
+            0, nsweeps * rays_per_sweep, rays_per_sweep, dtype='int32')
+        sweep_end_ray_index['data'] = np.arange(
+            rays_per_sweep - 1, nsweeps * rays_per_sweep, rays_per_sweep,
+            dtype='int32')
+
     if not delay_field_loading:
         mdvfile.close()
     return Radar(
@@ -2,18 +2,24 @@
 pyart.io.nexrad_archive
 =======================
 
-Functions for reading NEXRAD Level II Archive files.
+Functions for reading NEXRAD Level II Archive files and real-time
+Level II data streams.
 
 .. autosummary::
     :toctree: generated/
     :template: dev_template.rst
 
     _NEXRADLevel2StagedField
+    _NEXRADLevel2PackedField
 
 .. autosummary::
     :toctree: generated/
 
     read_nexrad_archive
+    read_nexrad_stream
+    _radar_from_level2
+    _get_packed_data
+    _set_packed_field_metadata
 
 """
 
@@ -25,10 +31,16 @@ from .common import make_time_unit_str, _test_arguments, prepare_for_read
 from .nexrad_level2 import NEXRADLevel2File
 from ..lazydict import LazyLoadDict
 
+# packed value of gates which are masked when fields are stored as packed
+# integers, raw values of 0 (below threshold) and 1 (range folded) are both
+# masked.
+PACKED_FILL_VALUE = 0
+
 
 def read_nexrad_archive(filename, field_names=None, additional_metadata=None,
                         file_field_names=False, exclude_fields=None,
-                        delay_field_loading=False, **kwargs):
+                        delay_field_loading=False, nthreads=1, scans=None,
+                        packed_fields=False, **kwargs):
     """
     Read a NEXRAD Level 2 Archive file.
 
@@ -65,12 +77,32 @@ def read_nexrad_archive(filename, field_names=None, additional_metadata=None,
         key in a particular field dictionary is accessed.  In this case
         the field attribute of the returned Radar object will contain
         LazyLoadDict objects not dict objects.
+    nthreads : int, optional
+        Number of threads used to decompress the records of files whose
+        records are BZ2 compressed.  The records are independently
+        compressed and are decompressed in parallel when more than one
+        thread is used.
+    scans : list or None, optional
+        Scans (0 based) to read from the file.  Only these scans are placed
+        in the radar object and compressed records following the last
+        requested scan are not decompressed.  None, the default, reads all
+        scans in the volume.
+    packed_fields : bool, optional
+        True to keep the field data as the packed integers from the file,
+        uint8 for most moments and uint16 for differential phase, until the
+        'data' key of a field is accessed, when it is decoded into a
+        float32 masked array.  The fields of the returned Radar are
+        LazyLoadDict objects.  The encoding of the moment is stored in the
+        '_Write_as_dtype', 'scale_factor', 'add_offset' and '_FillValue'
+        keys of the field so that the field is written as packed integers
+        by :py:func:`write_cfradial`.  Fields which are not accessed stay
+        packed, reducing the memory used when only some fields are needed.
 
     Returns
     -------
     radar : Radar
-        Radar object containing all moments and sweeps/cuts in the volume.
-        Gates not collected are masked in the field data.
+        Radar object containing all moments and the requested sweeps/cuts in
+        the volume.  Gates not collected are masked in the field data.
 
     References
     ----------
@@ -86,13 +118,117 @@ def read_nexrad_archive(filename, field_names=None, additional_metadata=None,
                                 additional_metadata, file_field_names,
                                 exclude_fields)
 
+    if scans is not None:
+        scans = list(scans)
+        if len(scans) == 0:
+            raise ValueError('at least one scan must be requested')
+
     # open the file and retrieve scan information
-    nfile = NEXRADLevel2File(prepare_for_read(filename))
-    scan_info = nfile.scan_info()
+    nfile = NEXRADLevel2File(prepare_for_read(filename), nthreads=nthreads,
+                             scans=scans)
+    if scans is None:
+        scans = list(range(nfile.nscans))
+    else:
+        if min(scans) < 0 or max(scans) >= nfile.nscans:
+            raise ValueError('invalid scans, the file contains %d scans'
+                             % (nfile.nscans))
+    radar = _radar_from_level2(nfile, filemetadata, scans,
+                               delay_field_loading, packed_fields)
+    nfile.close()
+    return radar
+
+
+def read_nexrad_stream(stream, field_names=None, additional_metadata=None,
+                       file_field_names=False, exclude_fields=None,
+                       delay_field_loading=False, scans=None,
+                       packed_fields=False, **kwargs):
+    """
+    Read the scans received so far from a real-time NEXRAD Level 2 stream.
+
+    Parameters
+    ----------
+    stream : NEXRADLevel2Stream
+        Stream to which the real-time chunks of the volume have been added.
+    field_names : dict, optional
+        Dictionary mapping NEXRAD moments to radar field names. If a
+        data type found in the file does not appear in this dictionary or has
+        a value of None it will not be placed in the radar.fields dictionary.
+        A value of None, the default, will use the mapping defined in the
+        metadata configuration file.
+    additional_metadata : dict of dicts, optional
+        Dictionary of dictionaries to retrieve metadata from during this read.
+        This metadata is not used during any successive file reads unless
+        explicitly included.  A value of None, the default, will not
+        introduct any addition metadata and the file specific or default
+        metadata as specified by the metadata configuration file will be used.
+    file_field_names : bool, optional
+        True to use the NEXRAD field names for the field names. If this
+        case the field_names parameter is ignored. The field dictionary will
+        likely only have a 'data' key, unless the fields are defined in
+        `additional_metadata`.
+    exclude_fields : list or None, optional
+        List of fields to exclude from the radar object. This is applied
+        after the `file_field_names` and `field_names` parameters.
+    delay_field_loading : bool
+        True to delay loading of field data from the stream until the 'data'
+        key in a particular field dictionary is accessed.  In this case
+        the field attribute of the returned Radar object will contain
+        LazyLoadDict objects not dict objects.
+    scans : list or None, optional
+        Scans (0 based) to read from the stream.  None, the default, reads
+        the scans which have been completed.
+    packed_fields : bool, optional
+        True to keep the field data as the packed integers from the file,
+        uint8 for most moments and uint16 for differential phase, until the
+        'data' key of a field is accessed, when it is decoded into a
+        float32 masked array.  The fields of the returned Radar are
+        LazyLoadDict objects.  The encoding of the moment is stored in the
+        '_Write_as_dtype', 'scale_factor', 'add_offset' and '_FillValue'
+        keys of the field so that the field is written as packed integers
+        by :py:func:`write_cfradial`.  Fields which are not accessed stay
+        packed, reducing the memory used when only some fields are needed.
+
+    Returns
+    -------
+    radar : Radar
+        Radar object containing all moments in the requested sweeps/cuts.
+
+    """
+    # test for non empty kwargs
+    _test_arguments(kwargs)
+
+    # create metadata retrieval object
+    filemetadata = FileMetadata('nexrad_archive', field_names,
+                                additional_metadata, file_field_names,
+                                exclude_fields)
+
+    if scans is None:
+        scans = stream.completed_scans()
+        if len(scans) == 0:
+            raise ValueError('no scans have been completed in the stream')
+    else:
+        scans = list(scans)
+        if len(scans) == 0:
+            raise ValueError('at least one scan must be requested')
+        if min(scans) < 0 or max(scans) >= stream.nscans:
+            raise ValueError('invalid scans, the stream contains %d scans'
+                             % (stream.nscans))
+    return _radar_from_level2(stream, filemetadata, scans,
+                              delay_field_loading, packed_fields)
+
+
+def _radar_from_level2(nfile, filemetadata, scans, delay_field_loading,
+                       packed_fields=False):
+    """
+    Create a Radar object from scans in a NEXRADLevel2File or
+    NEXRADLevel2Stream.
+    """
+    all_scan_info = nfile.scan_info()
+    scan_info = [all_scan_info[i] for i in scans]
 
     # time
     time = filemetadata('time')
-    time_start, _time = nfile.get_times()
+    time_start, _time = nfile.get_times(scans)
     time['data'] = _time
     time['units'] = make_time_unit_str(time_start)
 
@@ -101,7 +237,7 @@ def read_nexrad_archive(filename, field_names=None, additional_metadata=None,
     i = np.argmax(scan_info[scan_max_gates]['ngates'])
     moment_max_gates = scan_info[scan_max_gates]['moments'][i]
     _range = filemetadata('range')
-    _range['data'] = nfile.get_range(scan_max_gates, moment_max_gates)
+    _range['data'] = nfile.get_range(scans[scan_max_gates], moment_max_gates)
     _range['meters_to_center_of_first_gate'] = _range['data'][0]
     _range['meters_between_gates'] = _range['data'][1] - _range['data'][0]
 
@@ -119,12 +255,25 @@ def read_nexrad_archive(filename, field_names=None, additional_metadata=None,
             continue
         dic = filemetadata(field_name)
         dic['_FillValue'] = get_fillvalue()
-        if delay_field_loading:
+        if packed_fields:
+            scale, offset = _set_packed_field_metadata(
+                dic, nfile, moment, scans)
             dic = LazyLoadDict(dic)
-            data_call = _NEXRADLevel2StagedField(nfile, moment, max_ngates)
+            if delay_field_loading:
+                packed_data = _NEXRADLevel2StagedField(
+                    nfile, moment, max_ngates, scans, packed=True)
+            else:
+                packed_data = _get_packed_data(
+                    nfile, moment, max_ngates, scans)
+            dic.set_lazy('data', _NEXRADLevel2PackedField(
+                packed_data, scale, offset))
+        elif delay_field_loading:
+            dic = LazyLoadDict(dic)
+            data_call = _NEXRADLevel2StagedField(
+                nfile, moment, max_ngates, scans)
             dic.set_lazy('data', data_call)
         else:
-            dic['data'] = nfile.get_data(moment, max_ngates)
+            dic['data'] = nfile.get_data(moment, max_ngates, scans)
         fields[field_name] = dic
 
     # metadata
@@ -151,8 +300,8 @@ def read_nexrad_archive(filename, field_names=None, additional_metadata=None,
     sweep_start_ray_index = filemetadata('sweep_start_ray_index')
     sweep_end_ray_index = filemetadata('sweep_end_ray_index')
 
-    nsweeps = int(nfile.nscans)
-    sweep_number['data'] = np.arange(nsweeps, dtype='int32')
+    nsweeps = len(scans)
+    sweep_number['data'] = np.array(scans, dtype='int32')
     sweep_mode['data'] = np.array(
         nsweeps * ['azimuth_surveillance'], dtype='S')
 
@@ -167,20 +316,20 @@ def read_nexrad_archive(filename, field_names=None, additional_metadata=None,
     azimuth = filemetadata('azimuth')
     elevation = filemetadata('elevation')
     fixed_angle = filemetadata('fixed_angle')
-    azimuth['data'] = nfile.get_azimuth_angles()
-    elevation['data'] = nfile.get_elevation_angles().astype('float32')
-    fixed_angle['data'] = nfile.get_target_angles()
+    azimuth['data'] = nfile.get_azimuth_angles(scans)
+    elevation['data'] = nfile.get_elevation_angles(scans).astype('float32')
+    fixed_angle['data'] = nfile.get_target_angles(scans)
 
     # instrument_parameters
     nyquist_velocity = filemetadata('nyquist_velocity')
     unambiguous_range = filemetadata('unambiguous_range')
-    nyquist_velocity['data'] = nfile.get_nyquist_vel().astype('float32')
-    unambiguous_range['data'] = nfile.get_unambigous_range().astype('float32')
+    nyquist_velocity['data'] = nfile.get_nyquist_vel(scans).astype('float32')
+    unambiguous_range['data'] = nfile.get_unambigous_range(
+        scans).astype('float32')
 
     instrument_parameters = {'unambiguous_range': unambiguous_range,
                              'nyquist_velocity': nyquist_velocity, }
 
-    nfile.close()
     return Radar(
         time, _range, fields, metadata, scan_type,
         latitude, longitude, altitude,
@@ -193,14 +342,80 @@ def read_nexrad_archive(filename, field_names=None, additional_metadata=None,
 class _NEXRADLevel2StagedField(object):
     """
     A class to facilitate on demand loading of field data from a Level 2 file.
+
+    Only the data blocks of the moment are decoded, and only from the
+    messages in the requested scans.
     """
 
-    def __init__(self, nfile, moment, max_ngates):
+    def __init__(self, nfile, moment, max_ngates, scans=None, packed=False):
         """ initialize. """
         self.nfile = nfile
         self.moment = moment
         self.max_ngates = max_ngates
+        self.scans = scans
+        self.packed = packed
 
     def __call__(self):
         """ Return the array containing the field data. """
-        return self.nfile.get_data(self.moment, self.max_ngates)
+        if self.packed:
+            return _get_packed_data(
+                self.nfile, self.moment, self.max_ngates, self.scans)
+        return self.nfile.get_data(self.moment, self.max_ngates, self.scans)
+
+
+class _NEXRADLevel2PackedField(object):
+    """
+    A class to decode packed moment data when the field data is accessed.
+
+    The packed data is either an array or a callable which returns the
+    array, for example a _NEXRADLevel2StagedField.
+    """
+
+    def __init__(self, packed_data, scale, offset):
+        """ initialize. """
+        self.packed_data = packed_data
+        self.scale = scale
+        self.offset = offset
+
+    def __call__(self):
+        """ Return the array containing the decoded field data. """
+        packed_data = self.packed_data
+        if callable(packed_data):
+            packed_data = packed_data()
+        mask = np.ma.getmaskarray(packed_data)
+        data = (np.ma.getdata(packed_data) - self.offset) / self.scale
+        return np.ma.array(data.astype('float32'), mask=mask)
+
+
+def _get_packed_data(nfile, moment, max_ngates, scans):
+    """
+    Return the packed integer data of a moment as a masked array.
+    """
+    data = nfile.get_data(moment, max_ngates, scans, raw_data=True)
+    mask = data <= 1
+    data[mask] = PACKED_FILL_VALUE
+    return np.ma.array(data, mask=mask)
+
+
+def _set_packed_field_metadata(dic, nfile, moment, scans):
+    """
+    Set the '_Write_as_dtype', 'scale_factor', 'add_offset' and
+    '_FillValue' of a field dictionary for a moment stored as packed
+    integers.  Returns the scale and offset of the moment.
+
+    NEXRAD moments are decoded as (raw - offset) / scale, which is expressed
+    using the CF packing attributes.
+    """
+    scale_offset = nfile.get_scale_offset(moment, scans)
+    if scale_offset is None:
+        scale, offset = np.float32(1), np.float32(0)
+    else:
+        scale, offset = scale_offset
+    if moment == 'PHI':
+        dic['_Write_as_dtype'] = 'uint16'
+    else:
+        dic['_Write_as_dtype'] = 'uint8'
+    dic['scale_factor'] = np.float32(1) / scale
+    dic['add_offset'] = -offset / scale
+    dic['_FillValue'] = PACKED_FILL_VALUE
+    return scale, offset
@@ -7,16 +7,30 @@ pyart.io.nexrad_level2
     :template: dev_template.rst
 
     NEXRADLevel2File
+    NEXRADLevel2Stream
 
 .. autosummary::
     :toctree: generated/
 
     _decompress_records
+    _decompress_buffer
+    _past_elevation
+    _locate_compressed_records
+    _decompress_record
+    _locate_records
+    _get_msg31_block_offsets
+    _merge_block_offsets
+    _msg31_block_structure
+    _max_elevation_number
+    _gather_moment_data
     _get_record_from_buf
     _get_msg31_data_block
     _structure_size
     _unpack_from_buf
     _unpack_structure
+    _unpack_from_array
+    _structure_dtype
+    _native_array
 
 
 """
@@ -77,6 +91,7 @@ OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 import bz2
 import struct
 from datetime import datetime, timedelta
+from multiprocessing.pool import ThreadPool
 
 import numpy as np
 
@@ -96,11 +111,22 @@ class NEXRADLevel2File(object):
     ----------
     filename : str
         Filename of Archive II file to read.
+    nthreads : int
+        Number of threads used to decompress the records of files with
+        compressed records.  The records are compressed independently and
+        are decompressed in parallel when more than one thread is used.
+    scans : list or None
+        Scans (0 based) which will be read.  When specified, records are
+        decompressed only until these scans have been read and the scans
+        following the last requested scan are not available.  None, the
+        default, reads all scans in the file.
 
     Attributes
     ----------
     msg31s : list
-        Message 31 message in the file.
+        Message 31 message in the file.  These are decoded into dictionaries
+        on first access, the methods of the class use the arrays in the
+        _msg31_headers and _msg31_block_offsets attributes.
     nscans : int
         Number of scans in the file.
     scan_msgs : list of arrays
@@ -111,7 +137,13 @@ class NEXRADLevel2File(object):
     vcp : dict
         VCP information dictionary.
     _records : list
-        A list of all records (message) in the file.
+        A list of all records (message) in the file, decoded on first
+        access.
+    _msg31_headers : array
+        Structured array of the headers of all message 31 records.
+    _msg31_block_offsets : dict
+        Offsets of the data blocks in the message 31 records, see
+        :py:func:`_get_msg31_block_offsets`.
     _fh : file-like
         File like object from which data is read.
 
@@ -123,7 +155,7 @@ class NEXRADLevel2File(object):
 
 
     """
-    def __init__(self, filename):
+    def __init__(self, filename, nthreads=1, scans=None):
         """ initalize the object. """
         # read in the volume header and compression_record
         if hasattr(filename, 'read'):
@@ -135,38 +167,72 @@ class NEXRADLevel2File(object):
         compression_record = fh.read(COMPRESSION_RECORD_SIZE)
 
         # read the records in the file, decompressing as needed
+        if scans is None:
+            max_elevation = None
+        else:
+            max_elevation = max(scans) + 1
         s = slice(CONTROL_WORD_SIZE, CONTROL_WORD_SIZE + 2)
         if compression_record[s] == b'BZ':
-            buf = _decompress_records(fh)
+            buf = _decompress_records(fh, nthreads, max_elevation)
         elif compression_record[s] == b'\x00\x00':
             buf = fh.read()
         else:
             raise IOError('unknown compression record')
         self._fh = fh
 
-        # read the records from the buffer
-        self._records = []
-        buf_length = len(buf)
-        pos = 0
-        while pos < buf_length:
-            pos, dic = _get_record_from_buf(buf, pos)
-            self._records.append(dic)
-
-        # pull out msg31 records which contain the moment data.
-        self.msg31s = [r for r in self._records if r['header']['type'] == 31]
-        if len(self.msg31s) == 0:
+        # locate the records in the buffer, message 31 records are decoded
+        # into arrays, all other records are decoded on demand.
+        self._buf = buf
+        self._buf_array = np.frombuffer(buf, dtype='u1')
+        self._record_offsets, msg_types = _locate_records(buf)
+        msg31_offsets = self._record_offsets[msg_types == 31]
+        if len(msg31_offsets) == 0:
             raise ValueError('No MSG31 records found, cannot read file')
-        elev_nums = np.array([m['msg31_header']['elevation_number']
-                             for m in self.msg31s])
+        headers = _unpack_from_array(
+            self._buf_array, msg31_offsets + _structure_size(MSG_HEADER),
+            MSG_31)
+        if max_elevation is not None:
+            keep = headers['elevation_number'] <= max_elevation
+            msg31_offsets = msg31_offsets[keep]
+            headers = headers[keep]
+        self._msg31_offsets = msg31_offsets
+        self._msg31_headers = headers
+        self._msg31_block_offsets = _get_msg31_block_offsets(
+            self._buf_array, msg31_offsets, headers)
+        self._cached_records = None
+        self._cached_msg31s = None
+
+        elev_nums = self._msg31_headers['elevation_number']
         self.scan_msgs = [np.where(elev_nums == i + 1)[0]
                           for i in range(elev_nums.max())]
         self.nscans = len(self.scan_msgs)
 
         # pull out the vcp record
-        self.vcp = [r for r in self._records if r['header']['type'] == 5][0]
+        vcp_offset = self._record_offsets[msg_types == 5][0]
+        self.vcp = _get_record_from_buf(buf, vcp_offset)[1]
 
         return
 
+    @property
+    def _records(self):
+        """ List of all records in the file, decoded on first access. """
+        if self._cached_records is None:
+            buf = self._buf
+            self._cached_records = [
+                _get_record_from_buf(buf, pos)[1]
+                for pos in self._record_offsets]
+        return self._cached_records
+
+    @property
+    def msg31s(self):
+        """ List of message 31 records, decoded on first access. """
+        if self._cached_msg31s is None:
+            buf = self._buf
+            self._cached_msg31s = [
+                _get_record_from_buf(buf, pos)[1]
+                for pos in self._msg31_offsets]
+        return self._cached_msg31s
+
     def close(self):
         """ Close the file. """
         self._fh.close()
@@ -185,8 +251,9 @@ class NEXRADLevel2File(object):
             Height of radar and feedhorn in meters above mean sea level.
 
         """
-        dic = self.msg31s[0]['VOL']
-        return dic['lat'], dic['lon'], dic['height'] + dic['feedhorn_height']
+        dic = self._block_header('VOL', 0)
+        return (float(dic['lat']), float(dic['lon']),
+                int(dic['height']) + int(dic['feedhorn_height']))
 
     def scan_info(self):
         """
@@ -208,11 +275,10 @@ class NEXRADLevel2File(object):
             nrays = self.get_nrays(scan)
 
             msg31_number = self.scan_msgs[scan][0]
-            msg = self.msg31s[msg31_number]
-
-            nexrad_moments = ['REF', 'VEL', 'SW', 'ZDR', 'PHI', 'RHO']
-            moments = [f for f in nexrad_moments if f in msg]
-            ngates = [msg[f]['ngates'] for f in moments]
+            moments = [f for f in MOMENTS
+                       if self._has_block(f, msg31_number)]
+            ngates = [int(self._block_header(f, msg31_number)['ngates'])
+                      for f in moments]
             info.append({
                 'nrays': nrays,
                 'ngates': ngates,
@@ -253,10 +319,10 @@ class NEXRADLevel2File(object):
             Range in meters from the antenna to the center of gate (bin).
 
         """
-        dic = self.msg31s[self.scan_msgs[scan_num][0]][moment]
-        ngates = dic['ngates']
-        first_gate = dic['first_gate']
-        gate_spacing = dic['gate_spacing']
+        dic = self._block_header(moment, self.scan_msgs[scan_num][0])
+        ngates = int(dic['ngates'])
+        first_gate = int(dic['first_gate'])
+        gate_spacing = int(dic['gate_spacing'])
         return np.arange(ngates) * gate_spacing + first_gate
 
     # helper functions for looping over scans
@@ -264,21 +330,34 @@ class NEXRADLevel2File(object):
         """ Find the all message number for a list of scans. """
         return np.concatenate([self.scan_msgs[i] for i in scans])
 
+    def _has_block(self, block_name, msg_num):
+        """ True if a message 31 record contains a given data block. """
+        block_pos = self._msg31_block_offsets.get(block_name)
+        return block_pos is not None and block_pos[msg_num] >= 0
+
+    def _block_header(self, block_name, msg_num):
+        """ Decode the header of a data block in a single message. """
+        if not self._has_block(block_name, msg_num):
+            raise KeyError(block_name)
+        block_pos = self._msg31_block_offsets[block_name][[msg_num]]
+        return _unpack_from_array(self._buf_array, block_pos,
+                                  _msg31_block_structure(block_name))[0]
+
     def _msg31_array(self, scans, key):
         """
         Return an array of msg31 header elements for all rays in scans.
         """
         msg_nums = self._msg_nums(scans)
-        t = [self.msg31s[i]['msg31_header'][key] for i in msg_nums]
-        return np.array(t)
+        return _native_array(self._msg31_headers[key][msg_nums])
 
     def _msg31_rad_array(self, scans, key):
         """
         Return an array of msg31 RAD elements for all rays in scans.
         """
         msg_nums = self._msg_nums(scans)
-        t = [self.msg31s[i]['RAD'][key] for i in msg_nums]
-        return np.array(t)
+        block_pos = self._msg31_block_offsets['RAD'][msg_nums]
+        rad = _unpack_from_array(self._buf_array, block_pos, RADIAL_DATA_BLOCK)
+        return _native_array(rad[key])
 
     def get_times(self, scans=None):
         """
@@ -458,46 +537,358 @@ class NEXRADLevel2File(object):
             data = np.ones((nrays, max_ngates), dtype='u1')
         else:
             data = np.ones((nrays, max_ngates), dtype='u2')
-        for i, msg_num in enumerate(msg_nums):
-            msg = self.msg31s[msg_num]
-            if moment not in msg.keys():
-                continue
-            ngates = msg[moment]['ngates']
-            data[i, :ngates] = msg[moment]['data']
+        # only the moment blocks in the requested messages are decoded
+        block_pos = self._msg31_block_offsets.get(moment)
+        if block_pos is None:
+            # moment is not present in any scan, mask all values
+            if raw_data:
+                return data
+            return np.ma.masked_less_equal(data, 1)
+        block_pos = block_pos[msg_nums]
+        rays = np.nonzero(block_pos >= 0)[0]
+        headers = _unpack_from_array(
+            self._buf_array, block_pos[rays], GENERIC_DATA_BLOCK)
+        _gather_moment_data(
+            self._buf_array, data, rays,
+            block_pos[rays] + _structure_size(GENERIC_DATA_BLOCK),
+            headers['ngates'].astype('int64'))
 
         # return raw data if requested
         if raw_data:
             return data
 
-        # mask, scan and offset, assume that the offset and scale
-        # are the same in all scans/gates
+        # mask, scan and offset
+        scale_offset = self.get_scale_offset(moment, scans)
+        if scale_offset is None:
+            # moment is not present in any scan, mask all values
+            return np.ma.masked_less_equal(data, 1)
+        scale, offset = scale_offset
+        # scale the unmasked and masked values together, restoring
+        # the raw values under the mask as masked arithmetic would.
+        mask = data <= 1
+        scaled = (data - offset) / scale
+        np.copyto(scaled, data, where=mask)
+        return np.ma.array(scaled, mask=mask)
+
+    def get_scale_offset(self, moment, scans=None):
+        """
+        Retrieve the scale and offset used to encode a moment.
+
+        The scale and offset are assumed to be the same in all scans and
+        gates.  Values are decoded as (raw - offset) / scale, raw values of
+        0 and 1 indicate data below threshold and range folded data.
+
+        Parameters
+        ----------
+        moment : 'REF', 'VEL', 'SW', 'ZDR', 'PHI', or 'RHO'
+            Moment for which to to retrieve the scale and offset.
+        scans : list or None.
+            Scans to search for the moment (0 based).  None (the default)
+            will search all scans in the volume.
+
+        Returns
+        -------
+        scale_offset : tuple of float32 or None
+            Scale and offset of the moment, None if the moment is not present
+            in the first message of any of the scans.
+
+        """
+        if scans is None:
+            scans = range(self.nscans)
         for scan in scans:  # find a scan which contains the moment
             msg_num = self.scan_msgs[scan][0]
-            msg = self.msg31s[msg_num]
-            if moment in msg.keys():
-                offset = np.float32(msg[moment]['offset'])
-                scale = np.float32(msg[moment]['scale'])
-                return (np.ma.masked_less_equal(data, 1) - offset) / (scale)
+            if self._has_block(moment, msg_num):
+                header = self._block_header(moment, msg_num)
+                scale = np.float32(header['scale'])
+                offset = np.float32(header['offset'])
+                return scale, offset
+        return None
+
+
+class NEXRADLevel2Stream(NEXRADLevel2File):
+    """
+    Class for incrementally reading real-time NEXRAD Level II data chunks.
+
+    Real-time NEXRAD Level II volumes are distributed as a sequence of
+    chunks: a start chunk with the volume header and metadata records
+    followed by intermediate chunks and an end chunk holding the BZ2
+    compressed radial data records.  Chunks are added in order with the
+    :py:func:`add_chunk` method, only the records in the new chunk are
+    decompressed and decoded.  At any time the object provides the same
+    methods as a :py:class:`NEXRADLevel2File` for the records received so
+    far, the :py:func:`completed_scans` method lists the scans for which
+    all radials have been received.
+
+    Parameters
+    ----------
+    nthreads : int
+        Number of threads used to decompress the records in each chunk.
+
+    Attributes
+    ----------
+    nchunks : int
+        Number of chunks added to the stream.
+    volume_complete : bool
+        True when the last radial in the volume has been received.
+
+    See :py:class:`NEXRADLevel2File` for the other attributes.
+
+    """
+
+    def __init__(self, nthreads=1):
+        """ initalize the object. """
+        if nthreads < 1:
+            raise ValueError('nthreads must be a positive integer')
+        self.nthreads = nthreads
+        self.nchunks = 0
+        self.volume_complete = False
+        self.volume_header = None
+        self.vcp = None
+        self.scan_msgs = []
+        self.nscans = 0
+        self._fh = None
+        self._storage = np.empty((0, ), dtype='u1')
+        self._buf_array = self._storage
+        self._record_offsets = np.empty((0, ), dtype='int64')
+        self._msg31_offsets = np.empty((0, ), dtype='int64')
+        self._msg31_headers = np.empty((0, ), dtype=_structure_dtype(MSG_31))
+        self._msg31_block_offsets = {}
+        self._cached_records = None
+        self._cached_msg31s = None
+
+    @property
+    def _buf(self):
+        """ Buffer containing the records received so far, not copied. """
+        return memoryview(self._buf_array)
+
+    def close(self):
+        """ Close the stream, provided for compatibility. """
+        return
+
+    def add_chunk(self, chunk):
+        """
+        Add a chunk to the stream, decoding the records in it.
+
+        Parameters
+        ----------
+        chunk : bytes, str or file-like
+            Contents of the chunk, or the filename or a file-like object
+            from which the chunk is read.  The first chunk added must be a
+            start chunk which begins with the volume header.
+
+        """
+        if hasattr(chunk, 'read'):
+            cbuf = chunk.read()
+        elif isinstance(chunk, bytes):
+            cbuf = chunk
+        else:
+            with open(chunk, 'rb') as fh:
+                cbuf = fh.read()
+
+        if self.nchunks == 0:
+            size = _structure_size(VOLUME_HEADER)
+            if len(cbuf) < size or cbuf[:4] != b'AR2V':
+                raise IOError('the first chunk must start with the volume '
+                              'header')
+            self.volume_header = _unpack_structure(cbuf[:size],
+                                                   VOLUME_HEADER)
+            bufs = _decompress_buffer(cbuf, size, self.nthreads,
+                                      skip=COMPRESSION_RECORD_SIZE)
+        else:
+            bufs = _decompress_buffer(cbuf, 0, self.nthreads)
+        self.nchunks += 1
+        self._append_records(b''.join(bufs))
 
-        # moment is not present in any scan, mask all values
-        return np.ma.masked_less_equal(data, 1)
+    def completed_scans(self):
+        """
+        Return the scans for which all radials have been received.
 
+        Returns
+        -------
+        scans : list
+            Scans (0 based) which are complete.  A scan is complete when
+            its end of elevation or end of volume radial has been received
+            or when radials from a later scan have been received.
 
-def _decompress_records(file_handler):
+        """
+        # byte 21 of the message 31 header is the radial status
+        status = self._msg31_headers['radial_spacing']
+        scans = []
+        for scan, msg_nums in enumerate(self.scan_msgs):
+            if len(msg_nums) == 0:
+                continue
+            last = scan == self.nscans - 1
+            if not last or np.any(np.in1d(status[msg_nums],
+                                          END_RADIAL_STATUS)):
+                scans.append(scan)
+        return scans
+
+    def _append_records(self, buf):
+        """ Append and decode a buffer of decompressed records. """
+        if len(buf) == 0:
+            return
+        start = len(self._buf_array)
+        end = start + len(buf)
+        if end > len(self._storage):
+            # grow the storage geometrically so appends are amortized
+            storage = np.empty((max(end, 2 * len(self._storage)), ),
+                               dtype='u1')
+            storage[:start] = self._buf_array
+            self._storage = storage
+        self._storage[start:end] = np.frombuffer(buf, dtype='u1')
+        self._buf_array = self._storage[:end]
+
+        offsets, msg_types = _locate_records(buf)
+        offsets += start
+        self._record_offsets = np.concatenate(
+            [self._record_offsets, offsets])
+
+        msg31_offsets = offsets[msg_types == 31]
+        headers = _unpack_from_array(
+            self._buf_array, msg31_offsets + _structure_size(MSG_HEADER),
+            MSG_31)
+        block_offsets = _get_msg31_block_offsets(
+            self._buf_array, msg31_offsets, headers)
+        self._msg31_block_offsets = _merge_block_offsets(
+            self._msg31_block_offsets, len(self._msg31_offsets),
+            block_offsets, len(msg31_offsets))
+        self._msg31_offsets = np.concatenate(
+            [self._msg31_offsets, msg31_offsets])
+        self._msg31_headers = np.concatenate([self._msg31_headers, headers])
+        self._cached_records = None
+        self._cached_msg31s = None
+
+        if len(self._msg31_headers):
+            elev_nums = self._msg31_headers['elevation_number']
+            self.scan_msgs = [np.where(elev_nums == i + 1)[0]
+                              for i in range(elev_nums.max())]
+            self.nscans = len(self.scan_msgs)
+            if np.any(headers['radial_spacing'] == END_OF_VOLUME):
+                self.volume_complete = True
+
+        if self.vcp is None and np.any(msg_types == 5):
+            pos = offsets[msg_types == 5][0]
+            record = self._buf_array[pos:pos + RECORD_SIZE].tobytes()
+            self.vcp = _get_record_from_buf(record, 0)[1]
+
+
+def _decompress_records(file_handler, nthreads=1, max_elevation=None):
     """
     Decompressed the records from an BZ2 compressed Archive 2 file.
+
+    The compressed records are located using their control words and then
+    decompressed, in parallel when nthreads is larger than one.  The
+    decompressed records are joined into a single buffer.  When
+    max_elevation is specified decompression stops at the first record
+    containing a message from a later elevation cut.
     """
     file_handler.seek(0)
     cbuf = file_handler.read()    # read all data from the file
-    decompressor = bz2.BZ2Decompressor()
-    skip = _structure_size(VOLUME_HEADER) + CONTROL_WORD_SIZE
-    buf = decompressor.decompress(cbuf[skip:])
-    while len(decompressor.unused_data):
-        cbuf = decompressor.unused_data
+    bufs = _decompress_buffer(
+        cbuf, _structure_size(VOLUME_HEADER), nthreads, max_elevation,
+        COMPRESSION_RECORD_SIZE)
+    return b''.join(bufs)
+
+
+def _decompress_buffer(cbuf, pos, nthreads=1, max_elevation=None, skip=0):
+    """
+    Decompress the BZ2 compressed records in a buffer starting at pos.
+
+    Returns a list of the decompressed records.  skip bytes are removed
+    from the first record.  See :py:func:`_decompress_records` for a
+    description of the other parameters.
+    """
+    if nthreads < 1:
+        raise ValueError('nthreads must be a positive integer')
+    records, pos = _locate_compressed_records(cbuf, pos)
+
+    # records are decompressed in batches, with one record per thread, so
+    # that decompression can stop once the requested cuts have been read.
+    if max_elevation is None:
+        batch_size = max(len(records), 1)
+    else:
+        batch_size = nthreads
+    pool = None
+    if nthreads > 1 and len(records) > 1:
+        # bz2 releases the GIL while decompressing
+        pool = ThreadPool(min(nthreads, len(records)))
+    bufs = []
+    finished = False
+    try:
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            if pool is None:
+                new_bufs = [_decompress_record(record) for record in batch]
+            else:
+                new_bufs = pool.map(_decompress_record, batch)
+            if start == 0:
+                # remove the compression record from the first record
+                new_bufs[0] = new_bufs[0][skip:]
+            bufs.extend(new_bufs)
+            if _past_elevation(new_bufs, max_elevation):
+                finished = True
+                break
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    # records which could not be located from the control words are
+    # decompressed sequentially.
+    while not finished and pos + CONTROL_WORD_SIZE < len(cbuf):
         decompressor = bz2.BZ2Decompressor()
-        buf += decompressor.decompress(cbuf[CONTROL_WORD_SIZE:])
+        buf = decompressor.decompress(cbuf[pos + CONTROL_WORD_SIZE:])
+        if len(bufs) == 0:
+            buf = buf[skip:]
+        bufs.append(buf)
+        finished = _past_elevation([buf], max_elevation)
+        cbuf = decompressor.unused_data
+        pos = 0
+    return bufs
+
+
+def _past_elevation(bufs, max_elevation):
+    """
+    True if any buffer of decompressed records has a message from an
+    elevation cut after max_elevation.
+    """
+    if max_elevation is None:
+        return False
+    for buf in bufs:
+        try:
+            if _max_elevation_number(buf) > max_elevation:
+                return True
+        except struct.error:
+            # records which do not hold complete messages are not checked
+            continue
+    return False
+
+
+def _locate_compressed_records(cbuf, pos):
+    """
+    Locate the BZ2 compressed records in a buffer using the control words.
+
+    Returns a list of the compressed records and the position in the buffer
+    of the first record which could not be located.  This is the length of
+    the buffer when all records were found.
+    """
+    records = []
+    while pos + CONTROL_WORD_SIZE < len(cbuf):
+        size = abs(struct.unpack(
+            '>i', cbuf[pos:pos + CONTROL_WORD_SIZE])[0])
+        start = pos + CONTROL_WORD_SIZE
+        if size == 0 or cbuf[start:start + 3] != b'BZh':
+            return records, pos
+        records.append(cbuf[start:start + size])
+        pos = start + size
+    return records, len(cbuf)
+
 
-    return buf[COMPRESSION_RECORD_SIZE:]
+def _decompress_record(record):
+    """ Decompress a single BZ2 compressed record. """
+    # a decompressor object returns the available data from truncated
+    # records rather than raising an exception
+    return bz2.BZ2Decompressor().decompress(record)
 
 
 def _get_record_from_buf(buf, pos):
@@ -509,7 +900,8 @@ def _get_record_from_buf(buf, pos):
         msg_size = dic['header']['size'] * 2 - 4
         msg_header_size = _structure_size(MSG_HEADER)
         new_pos = pos + msg_header_size + msg_size
-        mbuf = buf[pos + msg_header_size:new_pos]
+        # only the message is copied when buf is a memoryview
+        mbuf = bytes(buf[pos + msg_header_size:new_pos])
         msg_31_header = _unpack_from_buf(mbuf, 0, MSG_31)
         block_pointers = [v for k, v in msg_31_header.items()
                           if k.startswith('block_pointer') and v > 0]
@@ -562,6 +954,152 @@ def _get_msg31_data_block(buf, ptr):
     return block_name, dic
 
 
+def _locate_records(buf):
+    """
+    Locate the records in a buffer of decompressed records.
+
+    Returns arrays of the offsets and message types of all records.
+    """
+    msg_header_size = _structure_size(MSG_HEADER)
+    offsets = []
+    msg_types = []
+    buf_length = len(buf)
+    pos = 0
+    while pos < buf_length:
+        size, msg_type = struct.unpack_from('>HxB', buf, pos)
+        offsets.append(pos)
+        msg_types.append(msg_type)
+        if msg_type == 31:
+            pos += msg_header_size + size * 2 - 4
+        else:
+            pos += RECORD_SIZE
+    return np.array(offsets, dtype='int64'), np.array(msg_types)
+
+
+def _get_msg31_block_offsets(buf_array, offsets, headers):
+    """
+    Locate the data blocks of message 31 records.
+
+    Returns a dictionary keyed by block name of arrays holding the offset
+    in the buffer of the data block in each message, -1 for messages
+    without the block.
+    """
+    nmsgs = len(offsets)
+    msg_pos = offsets + _structure_size(MSG_HEADER)
+    block_offsets = {}
+    for i in range(1, 10):
+        pointers = headers['block_pointer_%d' % i].astype('int64')
+        has_block = pointers > 0
+        rows = np.nonzero(has_block)[0]
+        pos = msg_pos[has_block] + pointers[has_block]
+        names = _unpack_from_array(
+            buf_array, pos + 1, (('name', '3s'), ))['name']
+        for name in np.unique(names):
+            block_name = name.decode('ascii').strip()
+            if block_name not in block_offsets:
+                block_offsets[block_name] = np.full(nmsgs, -1, dtype='int64')
+            in_block = names == name
+            block_offsets[block_name][rows[in_block]] = pos[in_block]
+    return block_offsets
+
+
+def _merge_block_offsets(block_offsets, nmsgs, new_offsets, new_nmsgs):
+    """
+    Merge the data block offsets of two sets of message 31 records.
+    """
+    merged = {}
+    for block_name in set(block_offsets) | set(new_offsets):
+        old = block_offsets.get(block_name)
+        if old is None:
+            old = np.full(nmsgs, -1, dtype='int64')
+        new = new_offsets.get(block_name)
+        if new is None:
+            new = np.full(new_nmsgs, -1, dtype='int64')
+        merged[block_name] = np.concatenate([old, new])
+    return merged
+
+
+def _msg31_block_structure(block_name):
+    """ Return the structure of a message 31 data block. """
+    if block_name in MOMENTS:
+        return GENERIC_DATA_BLOCK
+    return DATA_BLOCKS[block_name]
+
+
+def _max_elevation_number(buf):
+    """
+    Find the largest elevation number of the message 31 records in a buffer
+    of decompressed records, 0 if there are no message 31 records.
+    """
+    offsets, msg_types = _locate_records(buf)
+    msg31_offsets = offsets[msg_types == 31]
+    if len(msg31_offsets) == 0:
+        return 0
+    msg_pos = msg31_offsets + _structure_size(MSG_HEADER)
+    field_offset = _structure_dtype(MSG_31).fields['elevation_number'][1]
+    # messages truncated before the elevation number are not checked
+    field_pos = msg_pos + field_offset
+    field_pos = field_pos[field_pos < len(buf)]
+    if len(field_pos) == 0:
+        return 0
+    return np.frombuffer(buf, dtype='u1')[field_pos].max()
+
+
+def _gather_moment_data(buf_array, data, rays, offsets, ngates):
+    """
+    Gather moment data from a buffer into rows of a data array.
+
+    Rays with the same number of gates are gathered together in chunks
+    which limit the size of the temporary index arrays.
+    """
+    word_size = data.dtype.itemsize
+    ngates = np.minimum(ngates, data.shape[1])
+    for n in np.unique(ngates):
+        if n == 0:
+            continue
+        in_group = ngates == n
+        group_rays = rays[in_group]
+        group_offsets = offsets[in_group]
+        columns = np.arange(n * word_size)
+        step = max(1, GATHER_CHUNK_SIZE // (n * word_size))
+        for start in range(0, len(group_rays), step):
+            end = start + step
+            raw = buf_array[group_offsets[start:end, np.newaxis] + columns]
+            data[group_rays[start:end], :n] = raw.view('>u%d' % word_size)
+    return
+
+
+def _unpack_from_array(buf_array, offsets, structure):
+    """ Unpack a structure at a number of offsets in a buffer array. """
+    dtype = _structure_dtype(structure)
+    index = offsets[:, np.newaxis] + np.arange(dtype.itemsize)
+    return buf_array[index].view(dtype)[:, 0]
+
+
+def _structure_dtype(structure):
+    """ Find the NumPy structured dtype equivalent to a structure. """
+    formats = []
+    for code in [i[1] for i in structure]:
+        if code.endswith('s'):
+            formats.append('S' + code[:-1])
+        else:
+            formats.append(STRUCT_TO_DTYPE[code])
+    return np.dtype({'names': [i[0] for i in structure],
+                     'formats': formats})
+
+
+def _native_array(array):
+    """
+    Convert an array of structure elements to native 64-bit types, matching
+    the values produced by unpacking the elements individually.
+    """
+    if array.dtype.kind == 'f':
+        return array.astype('float64')
+    if array.dtype.kind in 'ui':
+        return array.astype('int64')
+    return array
+
+
 def _structure_size(structure):
     """ Find the size of a structure in bytes. """
     return struct.calcsize('>' + ''.join([i[1] for i in structure]))
@@ -606,6 +1144,30 @@ SINT1 = 'b'
 SINT2 = 'h'
 SINT4 = 'i'
 
+# NumPy dtypes equivalent to the structure element formats
+STRUCT_TO_DTYPE = {
+    'B': 'u1',
+    'H': '>u2',
+    'I': '>u4',
+    'f': '>f4',
+    'd': '>f8',
+    'b': 'i1',
+    'h': '>i2',
+    'i': '>i4',
+}
+
+# radial status of message 31 records which end an elevation cut
+END_OF_ELEVATION = 2
+END_OF_VOLUME = 4
+END_RADIAL_STATUS = (END_OF_ELEVATION, END_OF_VOLUME)
+
+# moments which can be present in message 31 records
+MOMENTS = ('REF', 'VEL', 'SW', 'ZDR', 'PHI', 'RHO')
+
+# maximum number of bytes gathered from the buffer at a time when
+# extracting moment data.
+GATHER_CHUNK_SIZE = 2 ** 22
+
 # Figure 1 in Interface Control Document for the Archive II/User
 # page 7-2
 VOLUME_HEADER = (
@@ -762,3 +1324,10 @@ RADIAL_DATA_BLOCK = (
     ('nyquist_vel', SINT2),
     ('spare', '2s')
 )
+
+# message 31 data blocks, other than the moment data blocks
+DATA_BLOCKS = {
+    'VOL': VOLUME_DATA_BLOCK,
+    'ELV': ELEVATION_DATA_BLOCK,
+    'RAD': RADIAL_DATA_BLOCK,
+}
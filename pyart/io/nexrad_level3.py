@@ -14,6 +14,9 @@ Class for reading data from NEXRAD Level 3 files.
     :toctree: generated/
 
     nexrad_level3_message_code
+    stack_nexrad_level3_data
+    _unpack_radials
+    _decode_rle_radials
     _datetime_from_mdate_mtime
     _structure_size
     _unpack_from_buf
@@ -166,25 +169,8 @@ class NEXRADLevel3File(object):
         nbytes = _unpack_from_buf(buf2, 30, RADIAL_HEADER)['nbytes']
         if packet_code == 16 and nbytes != nbins:
             nbins = nbytes  # sometimes these do not match, use nbytes
-        self.raw_data = np.empty((nradials, nbins), dtype='uint8')
-        pos = 30
-
-        for radial in self.raw_data:
-            radial_header = _unpack_from_buf(buf2, pos, RADIAL_HEADER)
-            pos += 6
-            if packet_code == 16:
-                radial[:] = np.fromstring(buf2[pos:pos+nbins], '>u1')
-                pos += radial_header['nbytes']
-            else:
-                assert packet_code == AF1F
-                # decode run length encoding
-                rle_size = radial_header['nbytes'] * 2
-                rle = np.fromstring(buf2[pos:pos+rle_size], dtype='>u1')
-                colors = np.bitwise_and(rle, 0b00001111)
-                runs = np.bitwise_and(rle, 0b11110000) // 16
-                radial[:] = np.repeat(colors, runs)
-                pos += rle_size
-            self.radial_headers.append(radial_header)
+        self.radial_headers, self.raw_data = _unpack_radials(
+            buf2, 30, nradials, nbins, packet_code)
 
     def get_location(self):
         """ Return the latitude, longitude and height of the radar. """
@@ -311,6 +297,119 @@ class NEXRADLevel3File(object):
         return mdata
 
 
+def stack_nexrad_level3_data(filenames, raw=False):
+    """
+    Decode a number of NEXRAD Level 3 files into a single stacked array.
+
+    Parameters
+    ----------
+    filenames : list
+        Filenames or file-like objects of the NEXRAD Level 3 files to
+        decode.  All files must contain the same number of radials and
+        range bins, typically the same product from a single radar.
+    raw : bool
+        True to stack the raw, unscaled data from the files, False to stack
+        the scaled, masked data returned by the get_data method of
+        :py:class:`NEXRADLevel3File`.
+
+    Returns
+    -------
+    data : array or masked array
+        Array of shape (nfiles, nradials, nbins) containing the data from
+        each file in order.  A uint8 array when raw is True, otherwise a
+        float32 masked array.
+
+    """
+    filenames = list(filenames)
+    if len(filenames) == 0:
+        raise ValueError('at least one file must be provided')
+    data = None
+    for i, filename in enumerate(filenames):
+        nfile = NEXRADLevel3File(filename)
+        if raw:
+            file_data = nfile.raw_data
+        else:
+            file_data = nfile.get_data()
+        nfile.close()
+        if data is None:
+            shape = (len(filenames), ) + file_data.shape
+            if raw:
+                data = np.empty(shape, dtype=file_data.dtype)
+            else:
+                data = np.ma.empty(shape, dtype=file_data.dtype)
+                data.mask = np.ma.getmaskarray(data)
+        if file_data.shape != data.shape[1:]:
+            raise ValueError(
+                'file %i has data of shape %s, expected %s' % (
+                    i, file_data.shape, data.shape[1:]))
+        data[i] = file_data
+    return data
+
+
+def _unpack_radials(buf, pos, nradials, nbins, packet_code):
+    """
+    Unpack the radials from a radial data packet.
+
+    Returns a list of the radial headers and an array of the raw data.  The
+    radial headers are read sequentially as each radial can have a different
+    size, the data from all radials is then decoded at once.
+    """
+    radial_headers = []
+    starts = np.empty((nradials, ), dtype='int64')
+    sizes = np.empty((nradials, ), dtype='int64')
+    for i in range(nradials):
+        radial_header = _unpack_from_buf(buf, pos, RADIAL_HEADER)
+        radial_headers.append(radial_header)
+        pos += 6
+        starts[i] = pos
+        if packet_code == 16:
+            sizes[i] = radial_header['nbytes']
+        else:
+            assert packet_code == AF1F
+            sizes[i] = radial_header['nbytes'] * 2  # nbytes is in halfwords
+        pos += sizes[i]
+
+    bytes_buf = np.frombuffer(buf, dtype='u1')
+    if packet_code == 16:
+        index = starts[:, np.newaxis] + np.arange(nbins)
+        raw_data = bytes_buf[index]
+    else:
+        raw_data = _decode_rle_radials(bytes_buf, starts, sizes, nbins)
+    return radial_headers, raw_data
+
+
+def _decode_rle_radials(bytes_buf, starts, sizes, nbins):
+    """
+    Decode run length encoded radials.
+
+    Each byte of a run length encoded radial contains a run in the upper
+    four bits and a color (data level) in the lower four bits.  The runs
+    from all radials are decoded with a single repeat.
+    """
+    nradials = len(starts)
+    # gather the run length encoded bytes from all radials
+    offsets = np.cumsum(sizes) - sizes
+    index = np.arange(sizes.sum()) + np.repeat(starts - offsets, sizes)
+    rle = bytes_buf[index]
+    colors = np.bitwise_and(rle, 0b00001111)
+    runs = np.right_shift(rle, 4)
+
+    radial_number = np.repeat(np.arange(nradials), sizes)
+    radial_bins = np.bincount(radial_number, weights=runs,
+                              minlength=nradials)
+    if np.all(radial_bins == nbins):
+        return np.repeat(colors, runs).reshape(nradials, nbins)
+
+    # radials which do not decode to nbins values are truncated or
+    # padded with zeros
+    raw_data = np.zeros((nradials, nbins), dtype='uint8')
+    for i, (offset, size) in enumerate(zip(offsets, sizes)):
+        radial = np.repeat(colors[offset:offset+size],
+                           runs[offset:offset+size])[:nbins]
+        raw_data[i, :len(radial)] = radial
+    return raw_data
+
+
 def _datetime_from_mdate_mtime(mdate, mtime):
     """ Returns a datetime for a given message date and time. """
     epoch = datetime.utcfromtimestamp(0)
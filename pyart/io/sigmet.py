@@ -26,6 +26,7 @@ import numpy as np
 
 from ..config import FileMetadata, get_fillvalue
 from ..core.radar import Radar
+from ..lazydict import LazyLoadDict
 from .common import make_time_unit_str, _test_arguments, prepare_for_read
 from ._sigmetfile import SigmetFile, bin4_to_angle, bin2_to_angle
 from . import _sigmet_noaa_hh
@@ -38,7 +39,7 @@ def read_sigmet(filename, field_names=None, additional_metadata=None,
                 file_field_names=False, exclude_fields=None,
                 time_ordered='none', full_xhdr=None, noaa_hh_hdr=None,
                 debug=False, ignore_xhdr=False, ignore_sweep_start_ms=None,
-                **kwargs):
+                delay_field_loading=False, **kwargs):
     """
     Read a Sigmet (IRIS) product file.
 
@@ -66,7 +67,9 @@ def read_sigmet(filename, field_names=None, additional_metadata=None,
         `additional_metadata`.
     exclude_fields : list or None, optional
         List of fields to exclude from the radar object. This is applied
-        after the `file_field_names` and `field_names` parameters.
+        after the `file_field_names` and `field_names` parameters.  Data
+        types which are not mapped to a field or which are excluded are not
+        converted when the file is read.
     time_ordered : 'none', 'sequential', 'full', ...,  optional
         Parameter controlling if and how the rays are re-ordered by time.
         The default, 'none' keeps the rays ordered in the same manner as
@@ -106,6 +109,13 @@ def read_sigmet(filename, field_names=None, additional_metadata=None,
         When there are not extended headers ignoring the millisecond sweep
         times provides time data which is always prior to the actual
         collection time with an error from 0 to 2 seconds.
+    delay_field_loading : bool, optional
+        True to delay loading of field data from the file until the 'data'
+        key in a particular field dictionary is accessed.  In this case
+        the field attribute of the returned Radar object will contain
+        LazyLoadDict objects not dict objects.  Only the offsets of the
+        sweeps are recorded when the file is read and the file is left open,
+        each field is converted from the file when first accessed.
     debug : bool, optional
         Print debug information during read.
 
@@ -137,22 +147,43 @@ def read_sigmet(filename, field_names=None, additional_metadata=None,
         else:
             full_xhdr = False
 
+    # determine the data types to convert, fields which will not be placed
+    # in the radar object are skipped and when delaying the field loading
+    # only the extended header, which contains the ray times, is converted.
+    if delay_field_loading:
+        data_type_names = []
+    else:
+        data_type_names = [
+            name for name in sigmetfile.data_type_names if name != 'XHDR' and
+            filemetadata.get_field_name(name) is not None]
+    if 'XHDR' in sigmetfile.data_type_names and not ignore_xhdr:
+        data_type_names.append('XHDR')
+
     # read data
-    sigmet_data, sigmet_metadata = sigmetfile.read_data(full_xhdr=full_xhdr)
+    sigmet_data, sigmet_metadata = sigmetfile.read_data(
+        full_xhdr=full_xhdr, data_type_names=data_type_names)
     first_data_type = sigmetfile.data_type_names[0]
     if first_data_type == 'XHDR':   # don't use XHDR as the first data type
         first_data_type = sigmetfile.data_type_names[1]
-    sigmetfile.close()
-    nsweeps, nrays, nbins = sigmet_data[first_data_type].shape
+    if not delay_field_loading:
+        sigmetfile.close()
+    nsweeps, nrays = sigmet_metadata[first_data_type]['nbins'].shape
+    nbins = sigmetfile.product_hdr['product_end']['number_bins']
 
     if nsweeps == 0:
         raise IOError('File contains no readable sweep data.')
 
-    # ignore extended header if user requested
-    if ignore_xhdr:
-        if 'XHDR' in sigmet_data:
-            sigmet_data.pop('XHDR')
-            sigmet_metadata.pop('XHDR')
+    # only the metadata of the converted data types and of the first data
+    # type is needed
+    for name in list(sigmet_metadata.keys()):
+        if name not in sigmet_data and name != first_data_type:
+            sigmet_metadata.pop(name)
+
+    # record the location of each ray in the file so that delayed fields
+    # can be time ordered and have missing rays removed
+    if delay_field_loading:
+        ray_index = np.arange(nsweeps * nrays).reshape(nsweeps, nrays)
+        sigmet_data['_ray_index'] = ray_index
 
     # parse the extended headers for time
     if full_xhdr and 'XHDR' in sigmet_data:
@@ -172,7 +203,7 @@ def read_sigmet(filename, field_names=None, additional_metadata=None,
     rays_missing = (sigmet_metadata[first_data_type]['nbins'] == -1).sum()
     for field_name in sigmet_data.keys():
         sigmet_data[field_name] = sigmet_data[field_name][good_rays]
-        field_metadata = sigmet_metadata[field_name]
+    for field_metadata in sigmet_metadata.values():
         for key in field_metadata.keys():
             field_metadata[key] = field_metadata[key][good_rays]
     rays_per_sweep = good_rays.sum(axis=1)
@@ -296,6 +327,20 @@ def read_sigmet(filename, field_names=None, additional_metadata=None,
 
     # fields
     fields = {}
+    if delay_field_loading:
+        ray_index = sigmet_data.pop('_ray_index')
+        for data_type_name in sigmetfile.data_type_names:
+            if data_type_name == 'XHDR':
+                continue
+            field_name = filemetadata.get_field_name(data_type_name)
+            if field_name is None:
+                continue
+            field_dic = LazyLoadDict(filemetadata(field_name))
+            field_dic.set_lazy('data', _SigmetFieldData(
+                sigmetfile, data_type_name, ray_index, nbins))
+            field_dic['_FillValue'] = get_fillvalue()
+            fields[field_name] = field_dic
+
     for data_type_name, fdata in sigmet_data.items():
         if data_type_name == 'XHDR_FULL':
             continue
@@ -464,6 +509,24 @@ def read_sigmet(filename, field_names=None, additional_metadata=None,
         **extended_header_params)
 
 
+class _SigmetFieldData(object):
+    """
+    A class to facilitate delayed loading of field data from a Sigmet file.
+    """
+
+    def __init__(self, sigmetfile, data_type_name, ray_index, nbins):
+        """ initialize the object. """
+        self.sigmetfile = sigmetfile
+        self.data_type_name = data_type_name
+        self.ray_index = ray_index
+        self.nbins = nbins
+
+    def __call__(self):
+        """ Return the array containing the field data. """
+        data = self.sigmetfile.read_data_type(self.data_type_name)
+        return data.reshape(-1, self.nbins)[self.ray_index]
+
+
 def _is_time_ordered_by_reversal(data, metadata, rays_per_sweep):
     """
     Returns if volume can be time ordered by reversing some or all sweeps.
@@ -473,7 +536,7 @@ def _is_time_ordered_by_reversal(data, metadata, rays_per_sweep):
         ref_time = data['XHDR'].copy()
         ref_time.shape = ref_time.shape[:-1]
     else:
-        ref_time = metadata[metadata.keys()[0]]['time'].astype('int32')
+        ref_time = list(metadata.values())[0]['time'].astype('int32')
     start = 0
     for nrays in rays_per_sweep:
         if nrays == 0 or nrays == 1:
@@ -497,7 +560,7 @@ def _is_time_ordered_by_roll(data, metadata, rays_per_sweep):
         ref_time = data['XHDR'].copy()
         ref_time.shape = ref_time.shape[:-1]
     else:
-        ref_time = metadata[metadata.keys()[0]]['time'].astype('int32')
+        ref_time = list(metadata.values())[0]['time'].astype('int32')
     start = 0
     for nrays in rays_per_sweep:
         if nrays == 0 or nrays == 1:
@@ -525,7 +588,7 @@ def _is_time_ordered_by_reverse_roll(data, metadata, rays_per_sweep):
         ref_time = data['XHDR'].copy()
         ref_time.shape = ref_time.shape[:-1]
     else:
-        ref_time = metadata[metadata.keys()[0]]['time'].astype('int32')
+        ref_time = list(metadata.values())[0]['time'].astype('int32')
     start = 0
     for nrays in rays_per_sweep:
         if nrays == 0 or nrays == 1:
@@ -562,7 +625,7 @@ def _time_order_data_and_metadata_roll(data, metadata, rays_per_sweep):
         ref_time = data['XHDR'].copy()
         ref_time.shape = ref_time.shape[:-1]
     else:
-        ref_time = metadata[metadata.keys()[0]]['time'].astype('int32')
+        ref_time = list(metadata.values())[0]['time'].astype('int32')
 
     start = 0
     for nrays in rays_per_sweep:
@@ -581,7 +644,7 @@ def _time_order_data_and_metadata_roll(data, metadata, rays_per_sweep):
         # roll the data and metadata for each field
         for field in data.keys():
             data[field][s] = np.roll(data[field][s], shift, axis=0)
-            field_metadata = metadata[field]
+        for field_metadata in metadata.values():
             for key in field_metadata.keys():
                 field_metadata[key][s] = np.roll(field_metadata[key][s], shift)
     return
@@ -601,7 +664,7 @@ def _time_order_data_and_metadata_reverse(data, metadata, rays_per_sweep):
         ref_time = data['XHDR'].copy()
         ref_time.shape = ref_time.shape[:-1]
     else:
-        ref_time = metadata[metadata.keys()[0]]['time'].astype('int32')
+        ref_time = list(metadata.values())[0]['time'].astype('int32')
 
     start = 0
     for nrays in rays_per_sweep:
@@ -618,7 +681,7 @@ def _time_order_data_and_metadata_reverse(data, metadata, rays_per_sweep):
         # reverse the data and metadata for each field
         for field in data.keys():
             data[field][s] = data[field][s][::-1]
-            field_metadata = metadata[field]
+        for field_metadata in metadata.values():
             for key in field_metadata.keys():
                 field_metadata[key][s] = field_metadata[key][s][::-1]
     return
@@ -640,7 +703,7 @@ def _time_order_data_and_metadata_full(data, metadata, rays_per_sweep):
         ref_time = data['XHDR'].copy()
         ref_time.shape = ref_time.shape[:-1]
     else:
-        ref_time = metadata[metadata.keys()[0]]['time'].astype('int32')
+        ref_time = list(metadata.values())[0]['time'].astype('int32')
 
     start = 0
     for nrays in rays_per_sweep:
@@ -660,7 +723,7 @@ def _time_order_data_and_metadata_full(data, metadata, rays_per_sweep):
         # sort the data and metadata for each field
         for field in data.keys():
             data[field][s] = data[field][s][sort_idx]
-            field_metadata = metadata[field]
+        for field_metadata in metadata.values():
             for key in field_metadata.keys():
                 field_metadata[key][s] = field_metadata[key][s][sort_idx]
     return
@@ -435,6 +435,130 @@ def attribute_equal(class1, class2, key, allow_str_case_diff=True):
     return
 
 
+def test_cfradial_writer():
+    with pyart.testing.InTemporaryDirectory():
+        tmpfile = 'tmp_writer.nc'
+        radar = pyart.io.read_cfradial(pyart.testing.CFRADIAL_PPI_FILE)
+        writer = pyart.io.CFRadialWriter(tmpfile)
+        writer.write_sweeps(radar)
+
+        # sweeps can be read before the file is closed
+        radar2 = pyart.io.read_cfradial(tmpfile)
+        assert radar2.nsweeps == 1
+        assert radar2.nrays == 40
+
+        writer.write_sweeps(radar)
+        assert writer.nsweeps == 2
+        assert writer.nrays == 80
+        writer.close()
+
+        radar2 = pyart.io.read_cfradial(tmpfile)
+        assert radar2.nsweeps == 2
+        assert radar2.nrays == 80
+        assert radar2.ngates == radar.ngates
+        assert_array_equal(radar2.sweep_start_ray_index['data'], [0, 40])
+        assert_array_equal(radar2.sweep_end_ray_index['data'], [39, 79])
+        assert_almost_equal(radar2.time['data'][40:], radar.time['data'])
+        assert_almost_equal(radar2.azimuth['data'][40:],
+                            radar.azimuth['data'])
+        for field in radar.fields:
+            assert np.ma.allequal(radar2.fields[field]['data'][40:],
+                                  radar.fields[field]['data'])
+
+
+def test_cfradial_writer_invalid():
+    with pyart.testing.InTemporaryDirectory():
+        assert_raises(ValueError, pyart.io.CFRadialWriter, 'tmp.nc',
+                      format='NETCDF3_CLASSIC')
+        radar = pyart.io.read_cfradial(pyart.testing.CFRADIAL_PPI_FILE)
+        radar_missing = pyart.io.read_cfradial(
+            pyart.testing.CFRADIAL_PPI_FILE,
+            exclude_fields=['reflectivity_horizontal'])
+        with pyart.io.CFRadialWriter('tmp_writer.nc') as writer:
+            writer.write_sweeps(radar)
+            assert_raises(ValueError, writer.write_sweeps, radar_missing)
+
+
+def test_cfradial_writer_packed_range():
+    radar = pyart.io.read_cfradial(pyart.testing.CFRADIAL_PPI_FILE)
+    refl = radar.fields['reflectivity_horizontal']
+    refl['_Write_as_dtype'] = 'uint8'
+    radar2 = pyart.io.read_cfradial(pyart.testing.CFRADIAL_PPI_FILE)
+    refl2 = radar2.fields['reflectivity_horizontal']
+    refl2['data'] = refl2['data'] + refl['data'].ptp() + 10.
+
+    with pyart.testing.InTemporaryDirectory():
+        with pyart.io.CFRadialWriter('tmp_writer.nc') as writer:
+            writer.write_sweeps(radar)
+            # values outside of the range packed by the first sweeps
+            assert_raises(ValueError, writer.write_sweeps, radar2)
+            assert writer.nsweeps == 1
+            writer.write_sweeps(radar)
+            assert writer.nsweeps == 2
+
+
+def test_write_auto_encoding():
+    radar = pyart.io.read_cfradial(pyart.testing.CFRADIAL_PPI_FILE)
+    refl = radar.fields['reflectivity_horizontal']
+    refl['valid_min'] = -40.
+    refl['valid_max'] = 80.
+    orig_refl = refl['data'].copy()
+    # integer valued field which can be packed into a uint8
+    radar.add_field('classification', {
+        'data': np.ma.array(np.arange(radar.nrays * radar.ngates) % 11,
+                            dtype='float32').reshape(-1, radar.ngates),
+        'valid_min': 0., 'valid_max': 10.})
+
+    with pyart.testing.InTemporaryDirectory():
+        tmpfile = 'tmp_auto_encoding.nc'
+        encodings = pyart.io.write_cfradial(tmpfile, radar, encoding='auto')
+
+        assert encodings['reflectivity_horizontal']['_Write_as_dtype'] == (
+            np.dtype('int16').str)
+        assert encodings['classification']['_Write_as_dtype'] == (
+            np.dtype('uint8').str)
+        assert_almost_equal(encodings['classification']['scale_factor'], 1)
+        for field in radar.fields:
+            assert encodings[field]['_ChunkSizes'] == (40, 42)
+        # the radar is not modified
+        assert 'scale_factor' not in refl
+        assert refl['valid_min'] == -40.
+
+        dset = netCDF4.Dataset(tmpfile)
+        assert dset.variables['reflectivity_horizontal'].dtype == np.int16
+        assert dset.variables['classification'].dtype == np.uint8
+        assert dset.variables['classification'].chunking() == [40, 42]
+        dset.close()
+
+        radar2 = pyart.io.read_cfradial(tmpfile)
+        refl2 = radar2.fields['reflectivity_horizontal']
+        assert_almost_equal(refl2['valid_min'], -40., 3)
+        assert_almost_equal(refl2['valid_max'], 80., 3)
+        scale = encodings['reflectivity_horizontal']['scale_factor']
+        expected = np.ma.masked_outside(orig_refl, -40., 80.)
+        assert np.ma.allclose(refl2['data'], expected, atol=scale)
+        assert np.ma.allequal(radar2.fields['classification']['data'],
+                              radar.fields['classification']['data'])
+
+
+def test_auto_field_encoding_integer_values():
+    data = np.ma.array(np.arange(20, dtype='float32').reshape(4, 5) % 11)
+    dic = {'data': data, 'valid_min': 0., 'valid_max': 10.}
+    dic2, encoding = pyart.io.cfradial._auto_field_encoding(dic, (4, 5))
+    assert encoding['_Write_as_dtype'] == np.dtype('uint8').str
+
+    # a non-integer valid_min can not be packed exactly with a scale of one
+    dic = {'data': data, 'valid_min': -0.5, 'valid_max': 10.}
+    dic2, encoding = pyart.io.cfradial._auto_field_encoding(dic, (4, 5))
+    assert encoding['_Write_as_dtype'] == np.dtype('int16').str
+
+
+def test_write_invalid_encoding():
+    radar = pyart.io.read_cfradial(pyart.testing.CFRADIAL_PPI_FILE)
+    assert_raises(ValueError, pyart.io.write_cfradial, 'tmp.nc', radar,
+                  encoding='foo')
+
+
 def test_auto_history_and_conventions():
     # history and Conventions metadata should be created on write if
     # they do not exist in the original radar object
@@ -467,6 +591,82 @@ def test_delay_field_loading():
     assert_almost_equal(data[0, 0], -6.0, 0)
 
 
+def test_variable_gate_index():
+    ray_n_gates = np.array([2, 0, 3])
+    ray_start_index = np.array([3, 5, 0])
+    ray_idx, gate_idx, point_idx = pyart.io.cfradial._variable_gate_index(
+        ray_n_gates, ray_start_index)
+    assert_array_equal(ray_idx, [0, 0, 2, 2, 2])
+    assert_array_equal(gate_idx, [0, 1, 0, 1, 2])
+    assert_array_equal(point_idx, [3, 4, 0, 1, 2])
+
+
+def test_variable_gate_data_extractor():
+    # numpy arrays are used in place of NetCDF variables
+    fdata = np.arange(5, dtype='float32')
+    gate_index = pyart.io.cfradial._VariableGateIndex(
+        np.array([2, 0, 3]), np.array([3, 5, 0]))
+    extractor = pyart.io.cfradial._NetCDFVariableGateDataExtractor(
+        fdata, (3, 4), gate_index)
+    data = extractor()
+    assert isinstance(data, MaskedArray)
+    assert data.shape == (3, 4)
+    assert_array_equal(data[0, :2], [3, 4])
+    assert_array_equal(data[2, :3], [0, 1, 2])
+    assert np.all(data.mask[0, 2:])
+    assert np.all(data.mask[1])
+    assert data.mask[2, 3]
+
+    # the indices are shared between extractors
+    assert gate_index() is gate_index()
+
+
+def test_read_sweeps_gate_range():
+    radar = pyart.io.read_cfradial(
+        pyart.testing.CFRADIAL_PPI_FILE, sweeps=[0], gate_range=(2, 10))
+    ref = pyart.io.read_cfradial(pyart.testing.CFRADIAL_PPI_FILE)
+    assert radar.nsweeps == 1
+    assert radar.nrays == 40
+    assert radar.ngates == 8
+    assert_array_equal(radar.range['data'], ref.range['data'][2:10])
+    assert (radar.range['meters_to_center_of_first_gate'] ==
+            ref.range['data'][2])
+    assert (radar.range['meters_between_gates'] ==
+            ref.range['data'][3] - ref.range['data'][2])
+    assert_array_equal(radar.sweep_start_ray_index['data'], [0])
+    assert_array_equal(radar.sweep_end_ray_index['data'], [39])
+    data = radar.fields['reflectivity_horizontal']['data']
+    assert data.shape == (40, 8)
+    assert np.ma.allequal(
+        data, ref.fields['reflectivity_horizontal']['data'][:, 2:10])
+
+
+def test_read_sweeps_invalid():
+    assert_raises(ValueError, pyart.io.read_cfradial,
+                  pyart.testing.CFRADIAL_PPI_FILE, sweeps=[])
+    assert_raises(ValueError, pyart.io.read_cfradial,
+                  pyart.testing.CFRADIAL_PPI_FILE, sweeps=[1])
+    assert_raises(ValueError, pyart.io.read_cfradial,
+                  pyart.testing.CFRADIAL_PPI_FILE, gate_range=(10, 2))
+
+
+def test_sweep_ray_slices():
+    ssri = np.array([0, 10, 20, 30])
+    seri = np.array([9, 19, 29, 39])
+    slices = pyart.io.cfradial._sweep_ray_slices(ssri, seri, [0, 1, 3])
+    assert slices == [slice(0, 20), slice(30, 40)]
+
+
+def test_data_extractor_hyperslabs():
+    # numpy arrays are used in place of NetCDF variables
+    fdata = np.arange(40).reshape(10, 4)
+    extractor = pyart.io.cfradial._NetCDFVariableDataExtractor(
+        fdata, [slice(0, 2), slice(6, 8)], slice(1, 3))
+    data = extractor()
+    assert data.shape == (4, 2)
+    assert_array_equal(data[:, 0], [1, 5, 25, 29])
+
+
 def test_create_ncvar_different_dtype():
     # test _Write_as_dtype key handling in _create_ncvar
     with pyart.testing.InTemporaryDirectory():
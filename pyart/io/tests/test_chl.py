@@ -1,5 +1,7 @@
 """ Unit Tests for Py-ART's io/chl.py module. """
 
+from io import BytesIO
+
 import numpy as np
 from numpy.testing import assert_almost_equal
 from numpy.ma.core import MaskedArray
@@ -309,3 +311,42 @@ def test_read_chl_time():
 
     cfile = pyart.io.chl.ChlFile(pyart.testing.CHL_RHI_FILE, ns_time=False)
     assert cfile.time[1] == 1341529304
+
+
+def test_read_chl_delay_field_loading():
+    radar_delay = pyart.io.read_chl(
+        pyart.testing.CHL_RHI_FILE, delay_field_loading=True)
+    assert isinstance(radar_delay.fields['reflectivity'],
+                      pyart.lazydict.LazyLoadDict)
+    for field in radar.fields.keys():
+        data = radar.fields[field]['data']
+        delay_data = radar_delay.fields[field]['data']
+        assert type(delay_data) is MaskedArray
+        assert np.all(delay_data.mask == data.mask)
+        assert np.ma.allclose(delay_data, data)
+        assert delay_data.fill_value == data.fill_value
+
+
+def test_chl_file_delay_field_loading_file_obj():
+    fh = open(pyart.testing.CHL_RHI_FILE, 'rb')
+    cfile = pyart.io.chl.ChlFile(fh)
+    fh.seek(0)
+    cfile_delay = pyart.io.chl.ChlFile(
+        BytesIO(fh.read()), delay_field_loading=True)
+    fh.close()
+    assert cfile_delay.fields == {}
+    for field_num in cfile.field_nums:
+        data = cfile.fields[field_num]
+        delay_data = cfile_delay.get_field_data(field_num)
+        assert np.ma.allclose(delay_data, data)
+
+
+def test_chl_file_ray_data_growth():
+    cfile = pyart.io.chl.ChlFile(pyart.testing.CHL_RHI_FILE)
+    ray_bytes = cfile._ray_data[0].tostring()
+    for i in range(300):
+        cfile._store_ray_data(ray_bytes)
+    assert cfile._nrays == 302
+    assert len(cfile._ray_data) == 512
+    assert np.all(cfile._ray_data[301] == cfile._ray_data[0])
+    cfile.close()
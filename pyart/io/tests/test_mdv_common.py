@@ -2,6 +2,7 @@
 
 from __future__ import print_function
 
+import struct
 import warnings
 from datetime import datetime
 from io import BytesIO
@@ -290,6 +291,82 @@ def test_read_one_field():
     assert mdvfile.fields_data[0] is not None
 
 
+def test_read_one_field_levels():
+
+    mdvfile = MdvFile(pyart.testing.MDV_PPI_FILE)
+    # extract only some levels, data is not stored
+    sweeps = mdvfile.read_a_field(0, levels=[0], nthreads=2)
+    assert sweeps.shape == (1, 360, 110)
+    assert_almost_equal(sweeps[0, 1, 2], 13.19, 2)
+    assert mdvfile.fields_data[0] is None
+
+    # levels from stored data
+    mdvfile.read_a_field(0)
+    sweeps = mdvfile.read_a_field(0, levels=[0, 0])
+    assert sweeps.shape == (2, 360, 110)
+    assert_almost_equal(sweeps[1, 1, 2], 13.19, 2)
+
+
+def test_read_one_field_levels_written_file():
+    # levels other than the first from a file written by Py-ART
+    grid = pyart.testing.make_target_grid()
+    with pyart.testing.InTemporaryDirectory():
+        tmpfile = 'tmp_levels.mdv'
+        pyart.io.write_grid_mdv(tmpfile, grid)
+        mdvfile = MdvFile(tmpfile)
+        full = mdvfile.read_a_field(0)
+        mdvfile.close()
+        mdvfile = MdvFile(tmpfile)
+        sweeps = mdvfile.read_a_field(0, levels=[1, 0])
+        mdvfile.close()
+    assert sweeps.shape == (2, 400, 320)
+    assert np.allclose(sweeps, full[[1, 0]])
+
+
+def test_read_one_field_levels_native_offsets():
+    # older versions of Py-ART wrote the level offsets in native byte order,
+    # levels are read sequentially when the offsets are not plausible
+    grid = pyart.testing.make_target_grid()
+    tmpfile = BytesIO()
+    pyart.io.write_grid_mdv(tmpfile, grid)
+    tmpfile.seek(0)
+    mdvfile = MdvFile(tmpfile)
+    full = mdvfile.read_a_field(0)
+    field_header = mdvfile.field_headers[0]
+    nz = field_header['nz']
+    tmpfile.seek(field_header['field_data_offset'])
+    levels_info = mdvfile._get_levels_info(nz)
+    fmt = '<%iI %iI' % (nz, nz)
+    tmpfile.seek(field_header['field_data_offset'])
+    tmpfile.write(struct.pack(fmt, *(levels_info['vlevel_offsets'] +
+                                     levels_info['vlevel_nbytes'])))
+
+    tmpfile.seek(0)
+    mdvfile = MdvFile(tmpfile)
+    sweeps = mdvfile.read_a_field(0, levels=[1, 0])
+    assert sweeps.shape == (2, 400, 320)
+    assert np.allclose(sweeps, full[[1, 0]])
+
+
+def test_decode_rle8():
+    key = 0xfe
+    # literal values, a run of 4 2s, a run with a count equal to the key
+    # and a run of the key value.
+    compr_data = np.array(
+        [1, 3, key, 4, 2, key, key, 7, key, 2, key],
+        dtype='uint8').tostring()
+    decompr_data = pyart.io.mdv_common._decode_rle8(compr_data, key, 260)
+    data = np.fromstring(decompr_data, dtype='uint8')
+    assert data.shape == (260, )
+    assert np.all(data[:6] == [1, 3, 2, 2, 2, 2])
+    assert np.all(data[6:260] == 7)
+
+    decompr_data = pyart.io.mdv_common._decode_rle8(compr_data, key, 264)
+    data = np.fromstring(decompr_data, dtype='uint8')
+    assert np.all(data[260:262] == key)
+    assert np.all(data[262:] == 0)    # padded to the decompressed size
+
+
 def test_read_all_fields():
 
     mdvfile = MdvFile(pyart.testing.MDV_PPI_FILE)
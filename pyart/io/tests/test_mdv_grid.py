@@ -81,6 +81,22 @@ class Mdv_grid_Tests(object):
         for attr in attrs_to_check:
             self.check_attr_dics(grid, original_grid, attr)
 
+    def test_write_read_target_levels(self):
+        # write and read in a single level of the target grid
+        original_grid = pyart.testing.make_target_grid()
+        tmpfile = BytesIO()
+        pyart.io.write_grid_mdv(tmpfile, original_grid)
+        tmpfile.seek(0)
+        grid = pyart.io.read_grid_mdv(tmpfile, file_field_names=True,
+                                      delay_field_loading=True, levels=[1],
+                                      nthreads=2)
+
+        assert np.allclose(grid.z['data'], original_grid.z['data'][1:])
+        fdata = grid.fields['reflectivity']['data']
+        assert fdata.shape == (1, 400, 320)
+        assert np.abs(fdata[0, 0, 0] - 5.) <= 0.01
+        assert np.abs(fdata[0, 160, 130] - 35.) <= 0.01
+
     def test_write_read_target_modified(self):
         # write and read in target grid with modifications
         original_grid = pyart.testing.make_target_grid()
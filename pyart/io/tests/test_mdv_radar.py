@@ -354,3 +354,16 @@ def test_radar_exclude_fields():
     radar = pyart.io.read_mdv(
         pyart.testing.MDV_PPI_FILE, exclude_fields=['reflectivity'])
     assert 'reflectivity' not in radar.fields
+
+
+def test_read_mdv_sweeps():
+    radar = pyart.io.read_mdv(pyart.testing.MDV_PPI_FILE, sweeps=[0, 0],
+                              nthreads=2)
+    assert radar.nsweeps == 2
+    assert radar.nrays == 720
+    assert np.all(radar.sweep_number['data'] == [0, 0])
+    assert np.all(radar.sweep_start_ray_index['data'] == [0, 360])
+    assert np.all(radar.sweep_end_ray_index['data'] == [359, 719])
+    assert radar.fields['reflectivity']['data'].shape == (720, 110)
+    assert_almost_equal(radar.fields['reflectivity']['data'][360, 0],
+                        24.0, 0)
@@ -1,7 +1,9 @@
 """ Unit Tests for Py-ART's io/nexrad_archive.py module. """
 
+import netCDF4
 import numpy as np
-from numpy.testing import assert_almost_equal
+from numpy.testing import assert_almost_equal, assert_array_equal
+from numpy.testing import assert_raises
 from numpy.ma.core import MaskedArray
 
 import pyart
@@ -281,3 +283,90 @@ def test_compressed_archive():
     assert_almost_equal(rdata[2, 0], 9.5, 1)
     assert 'velocity' not in radar.fields.keys()
     assert 'spectrum_width' not in radar.fields.keys()
+
+
+def test_nexrad_archive_scans():
+    sradar = pyart.io.read_nexrad_archive(
+        pyart.testing.NEXRAD_ARCHIVE_FILE, scans=[2, 4])
+    assert sradar.nsweeps == 2
+    assert_array_equal(sradar.sweep_number['data'], [2, 4])
+    extracted = radar.extract_sweeps([2, 4])
+    assert sradar.nrays == extracted.nrays
+    assert_almost_equal(sradar.azimuth['data'], extracted.azimuth['data'])
+    assert_almost_equal(sradar.fixed_angle['data'],
+                        extracted.fixed_angle['data'])
+    assert_almost_equal(np.diff(sradar.time['data']),
+                        np.diff(extracted.time['data']))
+    assert_almost_equal(sradar.instrument_parameters['nyquist_velocity']
+                        ['data'], extracted.instrument_parameters
+                        ['nyquist_velocity']['data'])
+    ngates = sradar.ngates
+    assert_almost_equal(sradar.range['data'],
+                        extracted.range['data'][:ngates])
+    for field in extracted.fields:
+        assert_array_equal(sradar.fields[field]['data'],
+                           extracted.fields[field]['data'][:, :ngates])
+
+
+def test_nexrad_archive_scans_lazy():
+    radar = pyart.io.read_nexrad_archive(
+        pyart.testing.NEXRAD_ARCHIVE_FILE, scans=[0],
+        delay_field_loading=True)
+    assert isinstance(radar.fields['reflectivity'],
+                      pyart.lazydict.LazyLoadDict)
+    assert radar.fields['reflectivity']['data'].shape == (720, 1832)
+
+
+def test_nexrad_archive_bad_scans():
+    assert_raises(ValueError, pyart.io.read_nexrad_archive,
+                  pyart.testing.NEXRAD_ARCHIVE_FILE, scans=[16])
+    assert_raises(ValueError, pyart.io.read_nexrad_archive,
+                  pyart.testing.NEXRAD_ARCHIVE_FILE, scans=[])
+
+
+def test_nexrad_archive_packed_fields():
+    pradar = pyart.io.read_nexrad_archive(
+        pyart.testing.NEXRAD_ARCHIVE_FILE, packed_fields=True)
+    for field in radar.fields:
+        pdic = pradar.fields[field]
+        assert isinstance(pdic, pyart.lazydict.LazyLoadDict)
+        assert pdic['_FillValue'] == 0
+        # the packed data is decoded when accessed
+        data = radar.fields[field]['data']
+        assert pdic['data'].dtype == np.float32
+        assert_array_equal(np.ma.getmaskarray(pdic['data']),
+                           np.ma.getmaskarray(data))
+        assert_almost_equal(pdic['data'], data, 4)
+    pdic = pradar.fields['differential_phase']
+    assert pdic['_Write_as_dtype'] == 'uint16'
+    pdic = pradar.fields['reflectivity']
+    assert pdic['_Write_as_dtype'] == 'uint8'
+    assert_almost_equal(pdic['scale_factor'], 0.5)
+    assert_almost_equal(pdic['add_offset'], -33.0)
+    assert pdic['valid_max'] == radar.fields['reflectivity']['valid_max']
+
+
+def test_nexrad_archive_packed_fields_lazy():
+    pradar = pyart.io.read_nexrad_archive(
+        pyart.testing.NEXRAD_ARCHIVE_FILE, packed_fields=True,
+        delay_field_loading=True)
+    pdic = pradar.fields['reflectivity']
+    assert isinstance(pdic, pyart.lazydict.LazyLoadDict)
+    assert 'scale_factor' in pdic
+    assert pdic['data'].dtype == np.float32
+    assert_array_equal(pdic['data'], radar.fields['reflectivity']['data'])
+
+
+def test_nexrad_archive_packed_fields_write_cfradial():
+    pradar = pyart.io.read_nexrad_archive(
+        pyart.testing.NEXRAD_ARCHIVE_COMPRESSED_FILE, packed_fields=True)
+    fradar = pyart.io.read_nexrad_archive(
+        pyart.testing.NEXRAD_ARCHIVE_COMPRESSED_FILE)
+    with pyart.testing.InTemporaryDirectory():
+        pyart.io.write_cfradial('packed.nc', pradar)
+        with netCDF4.Dataset('packed.nc') as dataset:
+            assert dataset.variables['reflectivity'].dtype == np.uint8
+        radar2 = pyart.io.read_cfradial('packed.nc')
+    for field in ['reflectivity', 'differential_reflectivity']:
+        assert_almost_equal(radar2.fields[field]['data'],
+                            fradar.fields[field]['data'], 4)
@@ -2,6 +2,7 @@
 
 import datetime
 import bz2
+import struct
 from io import BytesIO
 
 import numpy as np
@@ -334,3 +335,179 @@ def test_bad_compression_header():
 
     # should raise IOError
     assert_raises(IOError, nexrad_level2.NEXRADLevel2File, corrupt_file)
+
+
+def test_compressed_nthreads():
+    threaded_file = nexrad_level2.NEXRADLevel2File(COMPRESSED_FILE, nthreads=2)
+    threaded_file.close()
+    assert len(threaded_file.msg31s) == len(cfile.msg31s)
+    assert_array_equal(threaded_file.get_data('REF', 1832),
+                       cfile.get_data('REF', 1832))
+
+
+def test_compressed_bad_nthreads():
+    assert_raises(ValueError, nexrad_level2.NEXRADLevel2File,
+                  COMPRESSED_FILE, nthreads=0)
+
+
+def test_locate_compressed_records():
+    f = open(COMPRESSED_FILE, 'rb')
+    cbuf = f.read()
+    f.close()
+    records, pos = nexrad_level2._locate_compressed_records(cbuf, 24)
+    assert len(records) == 2
+    assert pos == len(cbuf)
+
+
+def test_structure_dtype():
+    for structure in [nexrad_level2.MSG_HEADER, nexrad_level2.MSG_31,
+                      nexrad_level2.GENERIC_DATA_BLOCK,
+                      nexrad_level2.VOLUME_DATA_BLOCK,
+                      nexrad_level2.RADIAL_DATA_BLOCK]:
+        dtype = nexrad_level2._structure_dtype(structure)
+        assert dtype.itemsize == nexrad_level2._structure_size(structure)
+
+
+def test_max_elevation_number_truncated_message():
+    # a message 31 record truncated before the elevation number
+    buf = struct.pack('>HBB', 1000, 0, 31) + b'\x00' * 20
+    assert nexrad_level2._max_elevation_number(buf) == 0
+    assert not nexrad_level2._past_elevation([buf], 0)
+
+
+def test_msg31_arrays_match_records():
+    for msg_num in [0, 10, 3600, 7199]:
+        msg = nfile.msg31s[msg_num]
+        header = nfile._msg31_headers[msg_num]
+        assert header['azimuth_angle'] == np.float32(
+            msg['msg31_header']['azimuth_angle'])
+        assert header['collect_ms'] == msg['msg31_header']['collect_ms']
+        for moment in nexrad_level2.MOMENTS:
+            if moment not in msg:
+                assert not nfile._has_block(moment, msg_num)
+                continue
+            block = nfile._block_header(moment, msg_num)
+            assert block['ngates'] == msg[moment]['ngates']
+            assert block['scale'] == np.float32(msg[moment]['scale'])
+
+
+def test_get_data_matches_records():
+    data = nfile.get_data('PHI', 1832, [1, 0], raw_data=True)
+    msg = nfile.msg31s[nfile.scan_msgs[0][3]]
+    ngates = msg['PHI']['ngates']
+    assert_array_equal(data[720 + 3, :ngates], msg['PHI']['data'])
+    assert np.all(data[720 + 3, ngates:] == 1)
+    assert np.all(data[:720] == 1)
+
+
+def _make_record_compressed_file(rays_per_record=120):
+    # recompress the uncompressed example file with one BZ2 record for the
+    # metadata messages and one per rays_per_record message 31 records.
+    f = bz2.BZ2File(pyart.testing.NEXRAD_ARCHIVE_FILE, 'rb')
+    head = f.read(24 + 12)
+    buf = f.read()
+    f.close()
+    offsets, msg_types = nexrad_level2._locate_records(buf)
+    msg31_offsets = offsets[msg_types == 31]
+    splits = list(msg31_offsets[::rays_per_record]) + [len(buf)]
+    chunks = [head[24:] + buf[:splits[0]]]
+    chunks += [buf[a:b] for a, b in zip(splits[:-1], splits[1:])]
+    out = BytesIO()
+    out.write(head[:24])
+    for chunk in chunks:
+        cchunk = bz2.compress(chunk)
+        out.write(struct.pack('>i', len(cchunk)))
+        out.write(cchunk)
+    out.seek(0)
+    return out
+
+
+def test_record_compressed_file():
+    rfile = nexrad_level2.NEXRADLevel2File(_make_record_compressed_file())
+    assert rfile.nscans == 16
+    assert len(rfile._msg31_offsets) == 7200
+    assert_array_equal(rfile.get_data('VEL', 1832),
+                       nfile.get_data('VEL', 1832))
+
+
+def test_scans_stop_decompression():
+    rfile = nexrad_level2.NEXRADLevel2File(
+        _make_record_compressed_file(), scans=[0, 1], nthreads=2)
+    assert rfile.nscans == 2
+    assert len(rfile.scan_msgs[1]) == 720
+    assert len(rfile._buf) < len(nfile._buf) / 4
+    assert_array_equal(rfile.get_data('REF', 1832),
+                       nfile.get_data('REF', 1832, [0, 1]))
+    assert_array_equal(rfile.get_times()[1], nfile.get_times([0, 1])[1])
+
+
+def _make_chunks():
+    # split a record compressed file into real-time chunks, a start chunk
+    # with the volume header and metadata record then one record per chunk
+    cbuf = _make_record_compressed_file().read()
+    records, pos = nexrad_level2._locate_compressed_records(cbuf, 24)
+    chunks = []
+    for record in records:
+        chunks.append(struct.pack('>i', len(record)) + record)
+    chunks[0] = cbuf[:24] + chunks[0]
+    return chunks
+
+
+def test_stream():
+    chunks = _make_chunks()
+    stream = nexrad_level2.NEXRADLevel2Stream()
+    assert stream.completed_scans() == []
+    stream.add_chunk(chunks[0])
+    assert stream.volume_header['icao'] == b'KATX'
+    assert stream.vcp['msg5_header']['num_cuts'] == 16
+    assert stream.nscans == 0
+
+    # the first scan is complete once its last radial has been received
+    for chunk in chunks[1:6]:
+        stream.add_chunk(chunk)
+    assert stream.nscans == 1
+    assert stream.completed_scans() == []
+    stream.add_chunk(BytesIO(chunks[6]))
+    assert stream.completed_scans() == [0]
+    assert_array_equal(stream.get_data('REF', 1832, [0]),
+                       nfile.get_data('REF', 1832, [0]))
+
+    for chunk in chunks[7:]:
+        stream.add_chunk(chunk)
+    assert stream.volume_complete
+    assert stream.completed_scans() == list(range(16))
+    assert len(stream.msg31s) == 7200
+    assert isinstance(stream._buf, memoryview)
+    assert_array_equal(stream.msg31s[3600]['REF']['data'],
+                       nfile.msg31s[3600]['REF']['data'])
+    assert stream._records[0]['header'] == nfile._records[0]['header']
+    assert_array_equal(stream.get_data('VEL', 1832),
+                       nfile.get_data('VEL', 1832))
+    assert_array_equal(stream.get_azimuth_angles(),
+                       nfile.get_azimuth_angles())
+    assert stream.location() == nfile.location()
+
+
+def test_stream_bad_start_chunk():
+    chunks = _make_chunks()
+    stream = nexrad_level2.NEXRADLevel2Stream()
+    assert_raises(IOError, stream.add_chunk, chunks[1])
+
+
+def test_read_nexrad_stream():
+    stream = pyart.io.NEXRADLevel2Stream()
+    assert_raises(ValueError, pyart.io.read_nexrad_stream, stream)
+    for chunk in _make_chunks()[:8]:
+        stream.add_chunk(chunk)
+    sradar = pyart.io.read_nexrad_stream(stream)
+    assert sradar.nsweeps == 1
+    assert sradar.nrays == 720
+    fradar = pyart.io.read_nexrad_archive(
+        pyart.testing.NEXRAD_ARCHIVE_FILE, scans=[0])
+    assert_almost_equal(sradar.azimuth['data'], fradar.azimuth['data'])
+    assert_almost_equal(sradar.range['data'], fradar.range['data'])
+    for field in fradar.fields:
+        assert_array_equal(sradar.fields[field]['data'],
+                           fradar.fields[field]['data'])
+    assert_raises(ValueError, pyart.io.read_nexrad_stream, stream,
+                  scans=[5])
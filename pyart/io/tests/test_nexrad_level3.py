@@ -2,6 +2,7 @@
 
 import numpy as np
 from numpy.ma.core import MaskedArray
+from numpy.testing import assert_raises
 
 import pyart
 
@@ -139,3 +140,39 @@ def test_nexrad_level3_msg161_fileobj():
     assert radar.fields[field_name]['data'].shape == (360, 1200)
     assert type(radar.fields[field_name]['data']) is MaskedArray
     assert round(radar.fields[field_name]['data'][103, 170]) == 2.
+
+
+def test_stack_nexrad_level3_data():
+    filenames = [pyart.testing.NEXRAD_LEVEL3_MSG163] * 2
+    data = pyart.io.nexrad_level3.stack_nexrad_level3_data(filenames)
+    assert data.shape == (2, 360, 1200)
+    assert type(data) is MaskedArray
+    assert round(data[1, 103, 170]) == 2.
+    assert np.all(data.mask[0] == data.mask[1])
+
+    raw = pyart.io.nexrad_level3.stack_nexrad_level3_data(
+        filenames, raw=True)
+    assert raw.shape == (2, 360, 1200)
+    assert raw.dtype == np.uint8
+
+
+def test_stack_nexrad_level3_data_mismatch():
+    filenames = [pyart.testing.NEXRAD_LEVEL3_MSG19,
+                 pyart.testing.NEXRAD_LEVEL3_MSG163]
+    assert_raises(ValueError,
+                  pyart.io.nexrad_level3.stack_nexrad_level3_data, filenames)
+
+
+def test_decode_rle_radials():
+    # two radials of 4 bins, the first with a zero run padding byte
+    buf = np.array([0x21, 0x13, 0x14, 0x00, 0x45, 0x00], dtype='u1')
+    starts = np.array([0, 4])
+    sizes = np.array([4, 2])
+    raw_data = pyart.io.nexrad_level3._decode_rle_radials(
+        buf, starts, sizes, 4)
+    assert np.all(raw_data == [[1, 1, 3, 4], [5, 5, 5, 5]])
+
+    # radials with too few bins are padded with zeros
+    raw_data = pyart.io.nexrad_level3._decode_rle_radials(
+        buf, starts, sizes, 5)
+    assert np.all(raw_data == [[1, 1, 3, 4, 0], [5, 5, 5, 5, 0]])
@@ -290,6 +290,37 @@ def test_nonuniform_bin_masking():
     assert radar.fields['reflectivity']['data'][19, 24] is np.ma.masked
 
 
+def test_exclude_fields():
+    radar = pyart.io.read_sigmet(
+        pyart.testing.SIGMET_PPI_FILE, exclude_fields=['reflectivity'])
+    assert 'reflectivity' not in radar.fields
+    assert radar.nrays == 20
+    assert_almost_equal(radar.time['data'][1], 1, 0)
+
+
+def test_delay_field_loading():
+    radar = pyart.io.read_sigmet(
+        pyart.testing.SIGMET_PPI_FILE, delay_field_loading=True)
+    assert isinstance(radar.fields['reflectivity'],
+                      pyart.lazydict.LazyLoadDict)
+    data = radar.fields['reflectivity']['data']
+    assert data.shape == (20, 25)
+    assert_almost_equal(data[0, 0], 0.0, 0)
+    assert data[19, 14] == 0.0
+    assert data[19, 15] is np.ma.masked
+
+
+def test_delay_field_loading_time_ordered():
+    radar = pyart.io.read_sigmet(
+        pyart.testing.SIGMET_RHI_FILE, time_ordered='full')
+    radar_delay = pyart.io.read_sigmet(
+        pyart.testing.SIGMET_RHI_FILE, time_ordered='full',
+        delay_field_loading=True)
+    for field in radar.fields:
+        assert np.ma.allequal(radar.fields[field]['data'],
+                              radar_delay.fields[field]['data'])
+
+
 #############
 # RHI tests #
 #############
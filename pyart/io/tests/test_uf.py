@@ -9,7 +9,7 @@ import numpy as np
 from numpy.testing import assert_raises, assert_almost_equal
 
 import pyart
-from pyart.io.uffile import UFFile, UFRay
+from pyart.io.uffile import UFFile, UFBulkFile, UFRay
 
 radar = pyart.io.read_uf(pyart.testing.UF_FILE, file_field_names=True)
 
@@ -138,3 +138,57 @@ def test_range_start_nonzero():
     radar2 = pyart.io.read_uf(in_mem)
     assert_almost_equal(radar2.range['meters_to_center_of_first_gate'], 1530)
     assert_almost_equal(radar2.range['data'][0], 1530)
+
+
+def check_bulk_file(ufile, bulkfile):
+    assert bulkfile.nrays == ufile.nrays
+    assert bulkfile.nsweeps == ufile.nsweeps
+    assert np.all(bulkfile.first_ray_in_sweep == ufile.first_ray_in_sweep)
+    assert np.all(bulkfile.last_ray_in_sweep == ufile.last_ray_in_sweep)
+    assert bulkfile.get_datetimes() == ufile.get_datetimes()
+    for method in ['get_azimuths', 'get_elevations', 'get_sweep_rates',
+                   'get_pulse_widths', 'get_prts', 'get_nyquists',
+                   'get_sweep_fixed_angles', 'get_sweep_polarizations']:
+        assert np.all(getattr(bulkfile, method)() == getattr(ufile, method)())
+    for i in range(len(ufile.rays[0].field_positions)):
+        data = ufile.get_field_data(i)
+        bulk_data = bulkfile.get_field_data(i)
+        assert np.all(bulk_data.mask == data.mask)
+        assert np.allclose(bulk_data, data)
+
+
+def test_bulk_file():
+    ufile = UFFile(pyart.testing.UF_FILE)
+    bulkfile = UFBulkFile(pyart.testing.UF_FILE)
+    assert bulkfile.rays is None
+    assert bulkfile.first_ray._buf == ufile.rays[0]._buf
+    check_bulk_file(ufile, bulkfile)
+    bulkfile.close()
+    ufile.close()
+
+
+def test_bulk_file_multiple_rays():
+    with open(pyart.testing.UF_FILE, 'rb') as fh:
+        buf = fh.read()
+    ufile = UFFile(StringIO(buf * 3))
+    bulkfile = UFBulkFile(StringIO(buf * 3), debug=True)
+    assert bulkfile.nrays == 3
+    assert len(bulkfile.rays) == 3
+    check_bulk_file(ufile, bulkfile)
+
+
+def test_bulk_file_invalid():
+    assert_raises(IOError, UFBulkFile, StringIO(b'XXXXXXXXXX'))
+
+
+def test_bulk_file_invalid_record_size():
+    with open(pyart.testing.UF_FILE, 'rb') as fh:
+        buf = fh.read()
+
+    # record extends past the end of the file
+    assert_raises(IOError, UFBulkFile, StringIO(buf[:len(buf) // 2]))
+
+    # record with a size of zero
+    size_pos = buf.index(b'UF') + 2
+    buf = buf[:size_pos] + b'\x00\x00' + buf[size_pos + 2:]
+    assert_raises(IOError, UFBulkFile, StringIO(buf))
@@ -397,3 +397,29 @@ def test_range_start():
     field_header = ufile.rays[0].field_headers[0]
     assert field_header['range_start_km'] == 1
     assert field_header['range_start_m'] == 500
+
+
+def test_write_records_match_rays():
+    radar = pyart.testing.make_velocity_aliased_radar()
+    for field in radar.fields.values():
+        field['data'] = np.ma.masked_greater(field['data'], 5.)
+    radar.fields['velocity']['_UF_scale_factor'] = 10
+    field_mapping = {'reflectivity': 'DZ', 'velocity': 'VR'}
+    field_write_order = ['reflectivity', 'velocity']
+    in_mem = StringIO()
+    write_uf(in_mem, radar, uf_field_names=field_mapping,
+             field_write_order=field_write_order)
+
+    ufraycreator = UFRayCreator(radar, field_mapping, field_write_order)
+    pad = struct.pack(b'>i', ufraycreator.record_length * 2)
+    ref_file = b''.join([pad + ufraycreator.make_ray(i) + pad for i in
+                         range(radar.nrays)])
+    assert in_mem.getvalue() == ref_file
+
+    in_mem.seek(0)
+    radar2 = pyart.io.read_uf(in_mem)
+    assert radar2.nrays == 360
+    nyquist = radar2.instrument_parameters['nyquist_velocity']['data']
+    assert np.allclose(nyquist, 10.)
+    assert np.ma.allclose(radar2.fields['velocity']['data'],
+                          radar.fields['velocity']['data'])
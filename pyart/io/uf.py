@@ -18,7 +18,7 @@ from netCDF4 import date2num
 from ..config import FileMetadata, get_fillvalue
 from ..core.radar import Radar
 from .common import make_time_unit_str, _test_arguments, prepare_for_read
-from .uffile import UFFile
+from .uffile import UFBulkFile
 
 _LIGHT_SPEED = 2.99792458e8  # speed of light in meters per second
 _UF_SWEEP_MODES = {
@@ -91,8 +91,8 @@ def read_uf(filename, field_names=None, additional_metadata=None,
                                 file_field_names, exclude_fields)
 
     # Open UF file and get handle
-    ufile = UFFile(prepare_for_read(filename))
-    first_ray = ufile.rays[0]
+    ufile = UFBulkFile(prepare_for_read(filename))
+    first_ray = ufile.first_ray
 
     # time
     dts = ufile.get_datetimes()
@@ -199,7 +199,7 @@ def _get_instrument_parameters(ufile, filemetadata):
 
     # assume that the parameters in the first ray represent the beam widths,
     # bandwidth and frequency in the entire volume
-    first_ray = ufile.rays[0]
+    first_ray = ufile.first_ray
     field_header = first_ray.field_headers[0]
     beam_width_h = field_header['beam_width_h'] / 64.
     beam_width_v = field_header['beam_width_v'] / 64.
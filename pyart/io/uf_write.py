@@ -15,6 +15,7 @@ Functions for writing UF files.
 
     write_uf
     _d_to_dms
+    _round_scaled
     _pack_structure
 
 """
@@ -37,6 +38,7 @@ from .uffile import UF_FIELD_POSITION
 from .uffile import UF_FIELD_HEADER
 from .uffile import UF_FSI_VEL
 from .uffile import POLARIZATION_STR
+from .uffile import _structure_dtype
 
 
 def write_uf(filename, radar, uf_field_names=None, radar_field_names=False,
@@ -116,14 +118,9 @@ def write_uf(filename, radar, uf_field_names=None, radar_field_names=False,
         radar, field_mapping, field_write_order, volume_start=volume_start,
         templates_extra=templates_extra)
 
-    for ray_num in range(radar.nrays):
-
-        ray_bytes = raycreator.make_ray(ray_num)
-        pad = struct.pack(b'>i', raycreator.record_length * 2)
-
-        fhandle.write(pad)
-        fhandle.write(ray_bytes)
-        fhandle.write(pad)
+    # all records are built in a single buffer and written at once
+    records = raycreator.make_records()
+    fhandle.write(records.tostring())
 
     if close:
         fhandle.close()
@@ -315,6 +312,154 @@ class UFRayCreator(object):
 
         return
 
+    def _get_sweep_mode_number(self):
+        """ Return the UF sweep mode number of the radar scan type. """
+        if self.radar.scan_type in UF_SWEEP_MODES:
+            return UF_SWEEP_MODES[self.radar.scan_type]
+        warnings.warn(
+            'Unknown scan_type: %s, defaulting to PPI' %
+            (self.radar.scan_type))
+        return UF_SWEEP_MODES['ppi']
+
+    def _get_scale_factor(self, radar_field):
+        """ Return the UF scale factor for a radar field. """
+        if '_UF_scale_factor' in self.radar.fields[radar_field]:
+            return self.radar.fields[radar_field]['_UF_scale_factor']
+        return UF_DEFAULT_SCALE_FACTOR
+
+    def make_records(self):
+        """
+        Return a structured array containing all rays as padded UF records.
+
+        Each element of the array is one UF ray preceded and followed by the
+        4-byte record length padding.  The headers and field data of all rays
+        are set at once, the bytes of the array are the UF file contents.
+        """
+        radar = self.radar
+        nrays = radar.nrays
+        ngates = radar.ngates
+        field_positions = self.make_field_position_list()
+        nfields = len(field_positions)
+
+        # build the record structure
+        record_dtype = [
+            (str('pad_start'), str('>i4')),
+            (str('mandatory_header'), _structure_dtype(UF_MANDATORY_HEADER)),
+            (str('optional_header'), _structure_dtype(UF_OPTIONAL_HEADER)),
+            (str('data_header'), _structure_dtype(UF_DATA_HEADER)),
+            (str('field_positions'), _structure_dtype(UF_FIELD_POSITION),
+             (nfields, ))]
+        for i, field_info in enumerate(field_positions):
+            record_dtype.append((str('field_header_%d' % i),
+                                 _structure_dtype(UF_FIELD_HEADER)))
+            if field_info['data_type'] in UF_VEL_DATA_TYPES:
+                record_dtype.append(
+                    (str('fsi_vel_%d' % i), _structure_dtype(UF_FSI_VEL)))
+            record_dtype.append(
+                (str('field_data_%d' % i), str('>i2'), (ngates, )))
+        record_dtype.append((str('pad_end'), str('>i4')))
+        records = np.zeros((nrays, ), dtype=record_dtype)
+
+        records['pad_start'] = self.record_length * 2
+        records['pad_end'] = self.record_length * 2
+
+        # mandatory header
+        header = records['mandatory_header']
+        self._set_structure(header, self.mandatory_header_template)
+        ray_times = num2date(radar.time['data'], radar.time['units'])
+        header['year'] = [ray_time.year - 2000 for ray_time in ray_times]
+        header['month'] = [ray_time.month for ray_time in ray_times]
+        header['day'] = [ray_time.day for ray_time in ray_times]
+        header['hour'] = [ray_time.hour for ray_time in ray_times]
+        header['minute'] = [ray_time.minute for ray_time in ray_times]
+        header['second'] = [ray_time.second for ray_time in ray_times]
+
+        sweep_nums = self.ray_num_to_sweep_num
+        header['record_number'] = np.arange(1, nrays + 1)
+        header['ray_number'] = np.arange(1, nrays + 1)
+        header['sweep_number'] = sweep_nums + 1
+
+        header['azimuth'] = _round_scaled(radar.azimuth['data'], 64)
+        header['elevation'] = _round_scaled(radar.elevation['data'], 64)
+        header['fixed_angle'] = _round_scaled(
+            radar.fixed_angle['data'][sweep_nums], 64)
+        if radar.scan_rate is not None:
+            header['sweep_rate'] = _round_scaled(radar.scan_rate['data'], 64)
+        else:
+            header['sweep_rate'] = UF_MISSING_VALUE
+        header['sweep_mode'] = self._get_sweep_mode_number()
+        header['record_length'] = self.record_length
+
+        # optional and data headers, field positions
+        self._set_structure(
+            records['optional_header'], self.optional_header_template)
+        data_header = records['data_header']
+        self._set_structure(data_header, UF_DATA_HEADER_TEMPLATE)
+        data_header['ray_nfields'] = nfields
+        data_header['record_nfields'] = nfields
+        for key in ['data_type', 'offset_field_header']:
+            records['field_positions'][key] = [
+                field_info[key] for field_info in field_positions]
+
+        # parameters in the field headers which vary between rays
+        iparams = self.radar.instrument_parameters
+        if iparams is not None and 'pulse_width' in iparams:
+            pulse_width_m = _round_scaled(
+                iparams['pulse_width']['data'], _LIGHT_SPEED)
+        else:
+            pulse_width_m = UF_MISSING_VALUE
+        if iparams is not None and 'prt' in iparams:
+            prt_ms = _round_scaled(iparams['prt']['data'], 1.e6)
+        else:
+            prt_ms = UF_MISSING_VALUE
+        polarization = np.ones((radar.nsweeps, ), dtype='int16')
+        if iparams is not None and 'polarization_mode' in iparams:
+            for sweep_num in range(radar.nsweeps):
+                mode = str(iparams['polarization_mode']['data'][sweep_num])
+                if mode in POLARIZATION_STR:
+                    polarization[sweep_num] = POLARIZATION_STR.index(mode)
+        if iparams is not None and 'nyquist_velocity' in iparams:
+            nyquist = np.asarray(
+                iparams['nyquist_velocity']['data'], dtype='float64')
+        else:
+            nyquist = None
+
+        # field headers and data
+        for i, field_info in enumerate(field_positions):
+            radar_field = field_info['radar_field']
+            scale = self._get_scale_factor(radar_field)
+            data_offset = field_info['offset_field_header'] + 19
+
+            if field_info['data_type'] in UF_VEL_DATA_TYPES:
+                data_offset += 2
+                fsi_vel = records['fsi_vel_%d' % i]
+                self._set_structure(fsi_vel, UF_FSI_VEL_TEMPLATE)
+                if nyquist is not None:
+                    fsi_vel['nyquist'] = _round_scaled(nyquist, scale)
+                else:
+                    fsi_vel['nyquist'] = UF_MISSING_VALUE
+
+            field_header = records['field_header_%d' % i]
+            self._set_structure(field_header, self.field_header_template)
+            field_header['nbins'] = ngates
+            field_header['data_offset'] = data_offset
+            field_header['scale_factor'] = scale
+            field_header['pulse_width_m'] = pulse_width_m
+            field_header['prt_ms'] = prt_ms
+            field_header['polarization'] = polarization[sweep_nums]
+
+            field_data = np.ma.round(radar.fields[radar_field]['data'] * scale)
+            records['field_data_%d' % i] = np.ma.filled(
+                field_data, UF_MISSING_VALUE)
+
+        return records
+
+    @staticmethod
+    def _set_structure(array, template):
+        """ Set the elements of a structured array from a template. """
+        for name in array.dtype.names:
+            array[name] = template[name]
+
     def make_ray(self, ray_num):
         """ Return a byte string representing a complete UF ray. """
         ray = self.make_mandatory_header(ray_num)
@@ -328,10 +473,7 @@ class UFRayCreator(object):
             data_type = field_info['data_type']
             offset = field_info['offset_field_header'] + 19
             radar_field = field_info['radar_field']
-            if '_UF_scale_factor' in self.radar.fields[radar_field]:
-                scale = self.radar.fields[radar_field]['_UF_scale_factor']
-            else:
-                scale = UF_DEFAULT_SCALE_FACTOR
+            scale = self._get_scale_factor(radar_field)
 
             if data_type in UF_VEL_DATA_TYPES:
                 offset += 2
@@ -383,14 +525,7 @@ class UFRayCreator(object):
             scan_rate = UF_MISSING_VALUE / 64
         header['sweep_rate'] = int(round(scan_rate * 64))
 
-        if self.radar.scan_type in UF_SWEEP_MODES:
-            sweep_mode_number = UF_SWEEP_MODES[self.radar.scan_type]
-        else:
-            warnings.warn(
-                'Unknown scan_type: %s, defaulting to PPI' %
-                (self.radar.scan_type))
-            sweep_mode_number = UF_SWEEP_MODES['ppi']
-        header['sweep_mode'] = sweep_mode_number
+        header['sweep_mode'] = self._get_sweep_mode_number()
 
         header['record_length'] = self.record_length
 
@@ -495,6 +630,11 @@ def _d_to_dms(in_deg):
     return degrees, minutes, seconds
 
 
+def _round_scaled(data, scale):
+    """ Scale data and round to the nearest integer. """
+    return np.round(np.asarray(data, dtype='float64') * scale)
+
+
 def _pack_structure(dic, structure):
     """ Pack a structure from a dictionary """
     fmt = '>' + ''.join([i[1] for i in structure])  # UF is big-endian
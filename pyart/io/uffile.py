@@ -9,11 +9,14 @@ Low level class for reading Universal Format (UF) files.
     :template: dev_template.rst
 
     UFFile
+    UFBulkFile
     UFRay
 
 .. autosummary::
     :toctree: generated/
 
+    _structure_dtype
+    _gather_structure
     _structure_size
     _unpack_from_buf
     _unpack_structure
@@ -75,11 +78,14 @@ OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
+import mmap
 import struct
 import datetime
 
 import numpy as np
 
+from .common import _map_file
+
 
 class UFFile(object):
     """
@@ -281,6 +287,227 @@ class UFFile(object):
         return [ray.get_datetime() for ray in self.rays]
 
 
+class UFBulkFile(UFFile):
+    """
+    A class for reading data from Universal Format (UF) files in bulk.
+
+    The file is memory-mapped when possible and the record offsets are
+    located in a single pass.  Headers from all records are decoded at once
+    using NumPy structured dtypes and field data is gathered by fancy
+    indexing.  UFRay objects are only created for every record in debug
+    mode.  The methods return the same values as a :py:class:`UFFile`.
+
+    Parameters
+    ----------
+    filename : str or file-like
+        Filename or file-like object containing data in Universal format (UF).
+    debug : bool
+        True to create a UFRay object for each record in the rays attribute.
+
+    Attributes
+    ----------
+    rays : list of UFRay objects or None
+        List of rays within the UF file when in debug mode, otherwise None.
+    first_ray : UFRay
+        First ray in the file.
+    nrays, nsweeps : int
+        Number of rays and sweep in the file.
+    ray_sweep_numbers : array
+        Sweep number of each ray in the file.
+    first_ray_in_sweep, last_ray_in_sweep : array
+        Indices of the first and last ray in each sweep.
+    mandatory_headers : array
+        Structured array of the mandatory header of each ray.
+    field_positions : array
+        Structured array of the field positions, (nrays, nfields).
+    field_headers : array
+        Structured array of the field headers, (nrays, nfields).
+
+    """
+
+    def __init__(self, filename, debug=False):
+        """ initialize. """
+
+        # open the file if file object not passed
+        if hasattr(filename, 'read'):
+            fobj = filename
+        else:
+            fobj = open(filename, 'rb')
+        self._fh = fobj
+        # regular files are memory-mapped, other file-like objects are read
+        # into memory
+        self._buf = _map_file(fobj)
+        if self._buf is None:
+            self._buf, pos = fobj.read(), 0
+        else:
+            pos = fobj.tell()
+        self._bytes = np.frombuffer(self._buf, dtype='u1')
+
+        # determine padding around records, see UFFile for details
+        try:
+            padding = self._buf[pos:pos+8].index(b'UF')
+        except ValueError:
+            raise IOError('file in not a valid UF file')
+
+        # locate the records
+        record_starts = []
+        record_sizes = []
+        while pos + 8 <= len(self._buf):  # read until EOF reached
+            record_size = struct.unpack(
+                '>h', self._buf[pos+padding+2:pos+padding+4])[0] * 2
+            if (record_size <= 0 or
+                    pos + padding + record_size > len(self._buf)):
+                raise IOError('invalid UF record size at byte %d' % pos)
+            record_starts.append(pos + padding)
+            record_sizes.append(record_size)
+            pos += record_size + 2 * padding
+        self._record_starts = np.array(record_starts, dtype='int64')
+        self.nrays = len(record_starts)
+
+        # decode the headers
+        starts = self._record_starts
+        self.mandatory_headers = _gather_structure(
+            self._bytes, starts, UF_MANDATORY_HEADER)
+        data_header_offsets = (
+            starts + (self.mandatory_headers['offset_data_header'] - 1) * 2)
+        data_headers = _gather_structure(
+            self._bytes, data_header_offsets, UF_DATA_HEADER)
+
+        # the number and order of the fields are assumed to be identical
+        # between rays
+        nfields = data_headers['record_nfields'][0]
+        position_offsets = (data_header_offsets[:, np.newaxis] + 6 +
+                            np.arange(nfields) * 4)
+        self.field_positions = _gather_structure(
+            self._bytes, position_offsets, UF_FIELD_POSITION)
+        field_header_offsets = (
+            starts[:, np.newaxis] +
+            (self.field_positions['offset_field_header'] - 1) * 2)
+        self.field_headers = _gather_structure(
+            self._bytes, field_header_offsets, UF_FIELD_HEADER)
+        self._field_data_offsets = (
+            starts[:, np.newaxis] +
+            (self.field_headers['data_offset'] - 1) * 2)
+
+        # velocity fields may contain a nyquist velocity
+        vel_types = [b'VF', b'VE', b'VR', b'VT', b'VP']
+        self._has_nyquist = (
+            np.in1d(self.field_positions['data_type'],
+                    vel_types).reshape(self.field_positions.shape) &
+            (self._field_data_offsets - field_header_offsets == 42))
+        self._nyquists = _gather_structure(
+            self._bytes, field_header_offsets + 38, UF_FSI_VEL)['nyquist']
+
+        # UFRay objects
+        self.first_ray = UFRay(
+            self._buf[record_starts[0]:record_starts[0] + record_sizes[0]])
+        if debug:
+            self.rays = [UFRay(self._buf[start:start + size]) for start, size
+                         in zip(record_starts, record_sizes)]
+        else:
+            self.rays = None
+
+        # determine sweep information
+        self.ray_sweep_numbers = self._get_ray_sweep_numbers()
+        self.nsweeps = len(np.unique(self.ray_sweep_numbers))
+        first_ray_in_sweep, last_ray_in_sweep = self._get_sweep_limits()
+        self.first_ray_in_sweep = first_ray_in_sweep
+        self.last_ray_in_sweep = last_ray_in_sweep
+
+    def close(self):
+        """ Close the file. """
+        # remove the views into the buffer before closing a memory map
+        self._bytes = None
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+        self._fh.close()
+
+    def _get_ray_sweep_numbers(self):
+        """ Return an array of the sweep_number stored in each ray. """
+        return self.mandatory_headers['sweep_number'].astype('int32')
+
+    def get_field_data(self, field_number):
+        """ Return a 2D array of scale/masked field data for the volume. """
+        # Assumes that no rays contain more gates than the first ray and
+        # that the missing_data_value and scale_factor are identical for all
+        # rays.  Rays with more gates than the first ray are truncated.
+        field_headers = self.field_headers[:, field_number]
+        ngates = field_headers['nbins'][0]
+        missing_data_value = self.mandatory_headers['missing_data_value'][0]
+        scale_factor = field_headers['scale_factor'][0]
+
+        # read the gates of each ray directly from the buffer
+        raw_data = np.empty((self.nrays, ngates), dtype='int16')
+        raw_data.fill(missing_data_value)
+        nbins = np.clip(field_headers['nbins'], 0, ngates)
+        offsets = self._field_data_offsets[:, field_number]
+        for i, (offset, nbin) in enumerate(zip(offsets, nbins)):
+            raw_data[i, :nbin] = np.frombuffer(
+                self._buf, '>i2', count=nbin, offset=offset)
+
+        data = raw_data / float(scale_factor)
+        mask = raw_data == missing_data_value
+        return np.ma.masked_array(data, mask)
+
+    def get_azimuths(self):
+        """ Return an array of azimuth angles for each ray in degrees. """
+        return (self.mandatory_headers['azimuth'] / 64.).astype('float32')
+
+    def get_elevations(self):
+        """ Return an array of elevation angles for each ray in degrees. """
+        return (self.mandatory_headers['elevation'] / 64.).astype('float32')
+
+    def get_sweep_rates(self):
+        """ Return an array of sweep rates for each ray in degrees/sec. """
+        return (self.mandatory_headers['sweep_rate'] / 64.).astype('float32')
+
+    def get_pulse_widths(self):
+        """ Return an array of pulse widths for each ray in meters. """
+        return self.field_headers['pulse_width_m'][:, 0].astype('float32')
+
+    def get_prts(self):
+        """ Return an array of prts for each ray in microseconds. """
+        return self.field_headers['prt_ms'][:, 0].astype('float32')
+
+    def get_nyquists(self):
+        """
+        Return an array of nyquist velocities for each ray in m/s.
+
+        Returns None if nyquist velocities cannot be determined for all rays.
+        """
+        fields_with_nyquist = np.flatnonzero(self._has_nyquist[0])
+        if len(fields_with_nyquist) == 0:
+            return None
+        field_idx = fields_with_nyquist[0]
+        if not np.all(self._has_nyquist[:, field_idx]):
+            return None  # nyquist not in field header
+        scale = self.field_headers['scale_factor'][:, field_idx]
+        nyquist = self._nyquists[:, field_idx] / scale
+        return nyquist.astype('float32')
+
+    def get_sweep_fixed_angles(self):
+        """ Return an array of fixed angles for each sweep in degrees. """
+        fixed = self.mandatory_headers['fixed_angle'][self.first_ray_in_sweep]
+        return (fixed / 64.).astype('float32')
+
+    def get_sweep_polarizations(self):
+        """ Return an array of polarization modes for each sweep. """
+        polarizations = self.field_headers['polarization'][
+            self.first_ray_in_sweep, 0]
+        polarizations = np.minimum(polarizations, 3)
+        return np.array([POLARIZATION_STR[p] for p in polarizations])
+
+    def get_datetimes(self):
+        """ Return a list of datetimes for each ray. """
+        headers = self.mandatory_headers
+        years = headers['year'].astype('int32')
+        years[years < 1900] += 2000   # years after 2000, 11 -> 2011
+        return [datetime.datetime(*t) for t in zip(
+            years.tolist(), headers['month'].tolist(),
+            headers['day'].tolist(), headers['hour'].tolist(),
+            headers['minute'].tolist(), headers['second'].tolist())]
+
+
 class UFRay(object):
     """
     A class for reading data from a single ray (record) in a UF file.
@@ -392,6 +619,35 @@ class UFRay(object):
         return latitude, longitude, height
 
 
+def _structure_dtype(structure):
+    """ Return a big-endian NumPy structured dtype for a structure. """
+    formats = []
+    for _, fmt in structure:
+        if fmt == INT16:
+            formats.append('>i2')
+        else:   # strings, '2s', '8s', etc
+            formats.append('S' + fmt[:-1])
+    return np.dtype({'names': [i[0] for i in structure],
+                     'formats': formats})
+
+
+def _gather_structure(bytes_buf, offsets, structure):
+    """
+    Unpack structures at a number of offsets into a structured array.
+
+    The returned array has the same shape as offsets.  Offsets for which
+    the structure would extend past the end of the buffer give zeros.
+    """
+    dtype = _structure_dtype(structure)
+    offsets = np.asarray(offsets)
+    index = offsets[..., np.newaxis] + np.arange(dtype.itemsize)
+    valid = np.all(index < len(bytes_buf), axis=-1)
+    index[~valid] = 0
+    raw = bytes_buf[index]
+    raw[~valid] = 0
+    return raw.view(dtype).reshape(offsets.shape)
+
+
 def _structure_size(structure):
     """ Find the size of a structure in bytes. """
     return struct.calcsize('>' + ''.join([i[1] for i in structure]))
@@ -14,6 +14,12 @@ coordinates to Cartesian coordinates.
     grid_from_radars
     map_to_grid
     map_gates_to_grid
+    map_gates_to_partial_grid
+    merge_partial_grids
+    normalize_partial_grid
+    create_grid_mapping_plan
+    load_grid_mapping_plan
+    GridMappingPlan
     example_roi_func_constant
     example_roi_func_dist
     example_roi_func_dist_beam
@@ -24,6 +30,9 @@ from .grid_mapper import map_to_grid, grid_from_radars
 from .grid_mapper import example_roi_func_constant
 from .grid_mapper import example_roi_func_dist
 from .grid_mapper import example_roi_func_dist_beam
-from .gates_to_grid import map_gates_to_grid
+from .gates_to_grid import map_gates_to_grid, map_gates_to_partial_grid
+from .gates_to_grid import merge_partial_grids, normalize_partial_grid
+from .mapping_plan import GridMappingPlan, create_grid_mapping_plan
+from .mapping_plan import load_grid_mapping_plan
 
 __all__ = [s for s in dir() if not s.startswith('_')]
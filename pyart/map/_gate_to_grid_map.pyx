@@ -10,33 +10,158 @@ a uniform grid.
     :template: dev_template.rst
 
     GateToGridMapper
+    FieldBuffers
     RoIFunction
     ConstantRoI
     DistRoI
     DistBeamRoI
+    LookupRoI
 
 """
 
-from libc.math cimport sqrt, exp, ceil, floor, sin, cos, tan, asin
+from libc.math cimport sqrt, exp, ceil, floor, sin, cos, tan, asin, INFINITY
 from cython.view cimport array as cvarray
 
+import numpy as np
+
 cimport cython
 
 # constants
 cdef int BARNES = 0
 cdef int CRESSMAN = 0
+cdef int NEAREST = 2
 cdef float PI = 3.141592653589793
 cdef float R = 8494666.66666667   # 4/3 earths radius of 6371 km in meters
 
+# type flag set on classes defined in Python rather than in Cython
+cdef long HEAPTYPE = 1 << 9
+
+# field data types which can be read in place by FieldBuffers
+cdef int FLOAT32 = 0
+cdef int FLOAT64 = 1
+cdef int INT8 = 2
+cdef int UINT8 = 3
+cdef int INT16 = 4
+cdef int UINT16 = 5
+cdef int INT32 = 6
+cdef int UINT32 = 7
+cdef int INT64 = 8
+cdef int UINT64 = 9
+_DTYPE_CODES = {
+    np.dtype('float32'): FLOAT32,
+    np.dtype('float64'): FLOAT64,
+    np.dtype('int8'): INT8,
+    np.dtype('uint8'): UINT8,
+    np.dtype('int16'): INT16,
+    np.dtype('uint16'): UINT16,
+    np.dtype('int32'): INT32,
+    np.dtype('uint32'): UINT32,
+    np.dtype('int64'): INT64,
+    np.dtype('uint64'): UINT64,
+}
+
 # This definition can be added to a .pxd file so others can defined fast
 # RoI functions
 cdef class RoIFunction:
-    """ A class for storing radius of interest calculations. """
+    """
+    A class for storing radius of interest calculations.
+
+    Subclasses defined in Python always have their get_roi method called,
+    holding the GIL, even when they derive from a class implemented in
+    Cython.
+    """
+
+    cdef bint _roi_nogil
+
+    def __cinit__(self, *args, **kwargs):
+        """ Determine if the radius of influence can be found nogil. """
+        self._roi_nogil = not (type(self).__flags__ & HEAPTYPE)
+
+    def __setstate__(self, state):
+        """ Restore the attributes of Python subclasses when unpickled. """
+        self.__dict__.update(state)
 
     cpdef float get_roi(self, float z, float y, float x):
         """ Return the radius of influence for coordinates in meters. """
         return 0
 
+    cdef float _get_roi(self, float z, float y, float x) nogil:
+        """
+        Return the radius of influence without requiring the GIL.
+
+        Subclasses implemented in Cython should override this method so
+        that gates can be mapped in parallel threads.  The default
+        implementation acquires the GIL and calls get_roi.
+        """
+        with gil:
+            return self.get_roi(z, y, x)
+
+    cdef float _find_roi(self, float z, float y, float x) nogil:
+        """
+        Return the radius of influence, using the nogil _get_roi method for
+        classes implemented in Cython and get_roi for Python subclasses so
+        that overrides of get_roi are respected.
+        """
+        if self._roi_nogil:
+            return self._get_roi(z, y, x)
+        with gil:
+            return self.get_roi(z, y, x)
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    def get_roi_array(self, z, y, x):
+        """
+        Return the radius of influence for arrays of coordinates in meters.
+
+        The coordinates are broadcast against each other and the radius
+        of influence is calculated for all points in a single loop which
+        releases the GIL for RoI functions implemented in Cython.
+
+        Parameters
+        ----------
+        z, y, x : array_like
+            Coordinates in meters.
+
+        Returns
+        -------
+        roi : float32 array
+            Radius of influence at each point, shape is the broadcast shape
+            of the coordinates.
+
+        """
+        cdef int i, npoints
+        cdef float[::1] zs, ys, xs, rois
+        z, y, x = np.broadcast_arrays(z, y, x)
+        shape = z.shape
+        zs = np.ascontiguousarray(z, dtype=np.float32).ravel()
+        ys = np.ascontiguousarray(y, dtype=np.float32).ravel()
+        xs = np.ascontiguousarray(x, dtype=np.float32).ravel()
+        roi = np.empty((zs.shape[0], ), dtype=np.float32)
+        rois = roi
+        npoints = zs.shape[0]
+        with nogil:
+            for i in range(npoints):
+                rois[i] = self._find_roi(zs[i], ys[i], xs[i])
+        return roi.reshape(shape)
+
+    def max_roi(self, z_limits, y_limits, x_limits):
+        """
+        Return an upper bound of the radius of influence within a box.
+
+        Gates which lie further than this radius from the grid are skipped
+        when mapping gates to the grid.  The default implementation
+        returns -1 which indicates that no bound is known and disables
+        this culling, subclasses should override this method when a bound
+        can be calculated.
+
+        Parameters
+        ----------
+        z_limits, y_limits, x_limits : 2-tuple of floats
+            Minimum and maximum coordinates of the box in meters.
+
+        """
+        return -1.
+
 
 cdef class ConstantRoI(RoIFunction):
     """ Constant radius of influence class. """
@@ -47,8 +172,21 @@ cdef class ConstantRoI(RoIFunction):
         """ intialize. """
         self.constant_roi = constant_roi
 
+    def __reduce__(self):
+        """ Return the state needed to pickle the object. """
+        return (type(self), (self.constant_roi, ),
+                getattr(self, '__dict__', None))
+
     cpdef float get_roi(self, float z, float y, float x):
         """ Return contstant radius of influence. """
+        return self._get_roi(z, y, x)
+
+    cdef float _get_roi(self, float z, float y, float x) nogil:
+        """ Return contstant radius of influence. """
+        return self.constant_roi
+
+    def max_roi(self, z_limits, y_limits, x_limits):
+        """ Return an upper bound of the radius of influence within a box. """
         return self.constant_roi
 
 
@@ -76,11 +214,31 @@ cdef class DistRoI(RoIFunction):
             self.offsets[i, 1] = y_offset
             self.offsets[i, 2] = x_offset
 
+    def __reduce__(self):
+        """ Return the state needed to pickle the object. """
+        return (type(self), (self.z_factor, self.xy_factor,
+                             self.min_radius, np.asarray(self.offsets)),
+                getattr(self, '__dict__', None))
+
+    cpdef float get_roi(self, float z, float y, float x):
+        """ Return the radius of influence for coordinates in meters. """
+        return self._get_roi(z, y, x)
+
+    def max_roi(self, z_limits, y_limits, x_limits):
+        """ Return an upper bound of the radius of influence within a box. """
+        offsets = np.asarray(self.offsets)
+        z_term = self.z_factor * (
+            np.max(z_limits) - offsets[:, 0] if self.z_factor >= 0 else
+            np.min(z_limits) - offsets[:, 0])
+        xy_term = max(self.xy_factor, 0) * _max_corner_distance(
+            offsets, y_limits, x_limits)
+        return float(np.min(z_term + xy_term + self.min_radius))
+
     @cython.initializedcheck(False)
     @cython.cdivision(True)
     @cython.boundscheck(False)
     @cython.wraparound(False)
-    cpdef float get_roi(self, float z, float y, float x):
+    cdef float _get_roi(self, float z, float y, float x) nogil:
         """ Return the radius of influence for coordinates in meters. """
         cdef float min_roi, roi, z_offset, y_offset, x_offset
         cdef int i
@@ -104,12 +262,15 @@ cdef class DistBeamRoI(RoIFunction):
     """
 
     cdef float h_factor, min_radius, beam_factor
+    cdef double nb, bsp
     cdef int num_offsets
     cdef float[:, :] offsets
 
     def __init__(self, h_factor, nb, bsp, min_radius, offsets):
         """ initalize. """
         self.h_factor = h_factor
+        self.nb = nb
+        self.bsp = bsp
         self.min_radius = min_radius
         self.beam_factor = tan(nb * bsp * PI / 180.)
 
@@ -124,11 +285,31 @@ cdef class DistBeamRoI(RoIFunction):
             self.offsets[i, 1] = y_offset
             self.offsets[i, 2] = x_offset
 
+    def __reduce__(self):
+        """ Return the state needed to pickle the object. """
+        return (type(self), (self.h_factor, self.nb, self.bsp,
+                             self.min_radius, np.asarray(self.offsets)),
+                getattr(self, '__dict__', None))
+
+    cpdef float get_roi(self, float z, float y, float x):
+        """ Return the radius of influence for coordinates in meters. """
+        return self._get_roi(z, y, x)
+
+    def max_roi(self, z_limits, y_limits, x_limits):
+        """ Return an upper bound of the radius of influence within a box. """
+        offsets = np.asarray(self.offsets)
+        z_term = self.h_factor * (
+            np.max(z_limits) - offsets[:, 0] if self.h_factor >= 0 else
+            np.min(z_limits) - offsets[:, 0]) / 20.0
+        xy_term = max(self.beam_factor, 0) * _max_corner_distance(
+            offsets, y_limits, x_limits)
+        return float(np.min(z_term + xy_term + self.min_radius))
+
     @cython.initializedcheck(False)
     @cython.cdivision(True)
     @cython.boundscheck(False)
     @cython.wraparound(False)
-    cpdef float get_roi(self, float z, float y, float x):
+    cdef float _get_roi(self, float z, float y, float x) nogil:
         """ Return the radius of influence for coordinates in meters. """
 
         cdef float min_roi, roi, z_offset, y_offset, x_offset
@@ -147,6 +328,233 @@ cdef class DistBeamRoI(RoIFunction):
         return min_roi
 
 
+cdef class LookupRoI(RoIFunction):
+    """
+    Radius of influence sampled from a precomputed 3D lookup volume.
+
+    The radius of influence at a location is the value at the nearest point
+    of a regular grid, locations outside the grid use the value of the
+    nearest edge point.  A lookup volume replaces the evaluation of a
+    possibly expensive RoI function, for example one which considers the
+    distance to many radars, at every gate.
+
+    Parameters
+    ----------
+    roi_array : 3D float32 array
+        Radius of influence at each point in the grid.  Dimensions are
+        ordered as z, y, x.
+    grid_starts, grid_steps  : tuple of floats
+        Starting points and step sizes in meters of the grid along the
+        z, y and x dimensions.
+
+    """
+
+    cdef float[:, :, ::1] roi_array
+    cdef float z_start, y_start, x_start
+    cdef float z_step, y_step, x_step
+    cdef int nz, ny, nx
+
+    def __init__(self, roi_array, grid_starts, grid_steps):
+        """ initialize. """
+        self.roi_array = np.ascontiguousarray(roi_array, dtype=np.float32)
+        self.nz, self.ny, self.nx = np.shape(roi_array)
+        self.z_start, self.y_start, self.x_start = grid_starts
+        self.z_step, self.y_step, self.x_step = grid_steps
+
+    @classmethod
+    def from_roi_func(cls, roi_func, grid_shape, grid_starts, grid_steps):
+        """
+        Create a lookup volume by evaluating a RoIFunction on a grid.
+
+        Parameters
+        ----------
+        roi_func : RoIFunction
+            Radius of influence function to evaluate.
+        grid_shape : tuple of ints
+            Shape of the grid along the z, y, and x dimensions.
+        grid_starts, grid_steps  : tuple of floats
+            Starting points and step sizes in meters of the grid along the
+            z, y and x dimensions.
+
+        """
+        roi_array = _find_grid_roi(
+            roi_func, grid_shape, grid_starts, grid_steps)
+        return cls(roi_array, grid_starts, grid_steps)
+
+    def __reduce__(self):
+        """ Return the state needed to pickle the object. """
+        return (type(self), (np.asarray(self.roi_array),
+                             (self.z_start, self.y_start, self.x_start),
+                             (self.z_step, self.y_step, self.x_step)),
+                getattr(self, '__dict__', None))
+
+    cpdef float get_roi(self, float z, float y, float x):
+        """ Return the radius of influence for coordinates in meters. """
+        return self._get_roi(z, y, x)
+
+    @cython.initializedcheck(False)
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef float _get_roi(self, float z, float y, float x) nogil:
+        """ Return the radius of influence for coordinates in meters. """
+        return self.roi_array[
+            nearest_index(z, self.z_start, self.z_step, self.nz),
+            nearest_index(y, self.y_start, self.y_step, self.ny),
+            nearest_index(x, self.x_start, self.x_step, self.nx)]
+
+    def max_roi(self, z_limits, y_limits, x_limits):
+        """ Return an upper bound of the radius of influence within a box. """
+        return float(np.max(self.roi_array))
+
+
+def _find_grid_roi(roi_func, grid_shape, grid_starts, grid_steps):
+    """ Return the radius of influence at each point in a grid. """
+    nz, ny, nx = grid_shape
+    z_start, y_start, x_start = grid_starts
+    z_step, y_step, x_step = grid_steps
+    z = np.float32(z_start) + np.float32(z_step) * np.arange(
+        nz, dtype=np.float32)
+    y = np.float32(y_start) + np.float32(y_step) * np.arange(
+        ny, dtype=np.float32)
+    x = np.float32(x_start) + np.float32(x_step) * np.arange(
+        nx, dtype=np.float32)
+    return roi_func.get_roi_array(
+        z[:, np.newaxis, np.newaxis], y[np.newaxis, :, np.newaxis],
+        x[np.newaxis, np.newaxis, :])
+
+
+def _max_corner_distance(offsets, y_limits, x_limits):
+    """
+    Return the largest horizontal distance from each offset to the corners
+    of a box.  This is the largest distance to any point in the box.
+    """
+    y_corners = np.asarray(y_limits, dtype=np.float64)
+    x_corners = np.asarray(x_limits, dtype=np.float64)
+    dy = np.abs(y_corners[np.newaxis, :] - offsets[:, 1:2]).max(axis=1)
+    dx = np.abs(x_corners[np.newaxis, :] - offsets[:, 2:3]).max(axis=1)
+    return np.sqrt(dy ** 2 + dx ** 2)
+
+
+cdef class FieldBuffers:
+    """
+    A class providing access to the data and masks of radar fields in place.
+
+    The data and mask of each field are read directly from the memory of
+    the arrays, no interleaved copies of the fields are made.  Data stored
+    as float32, float64 and 8, 16, 32 or 64 bit integers in native byte order
+    is read in place.  Data in non-native byte order is swapped to native
+    order and other data types are unpacked to float32 before being read.
+
+    Parameters
+    ----------
+    field_data : list of 2D arrays
+        Data for each field, dimensions are ordered as nrays, ngates.
+    field_mask : list of 2D bool arrays or None
+        Mask for each field, True for gates which are masked.  None
+        indicates that no gates in the field are masked.
+    scales, add_offsets : list of floats
+        Scale factor and offset applied to the data of each field, values
+        are calculated as data * scale + add_offset.
+
+    """
+
+    cdef int nfields
+    cdef list arrays
+    cdef int[::1] dtype_code
+    cdef double[::1] scale
+    cdef double[::1] add_offset
+    cdef Py_ssize_t[::1] data_ptr
+    cdef Py_ssize_t[::1] data_ray_stride
+    cdef Py_ssize_t[::1] data_gate_stride
+    cdef Py_ssize_t[::1] mask_ptr
+    cdef Py_ssize_t[::1] mask_ray_stride
+    cdef Py_ssize_t[::1] mask_gate_stride
+
+    def __init__(self, field_data, field_mask, scales, add_offsets):
+        """ initialize. """
+        cdef int i
+        self.nfields = len(field_data)
+        self.arrays = []    # references which keep the buffers alive
+        self.dtype_code = np.empty((self.nfields, ), dtype=np.intc)
+        self.scale = np.array(scales, dtype=np.float64)
+        self.add_offset = np.array(add_offsets, dtype=np.float64)
+        self.data_ptr = np.zeros((self.nfields, ), dtype=np.intp)
+        self.data_ray_stride = np.zeros((self.nfields, ), dtype=np.intp)
+        self.data_gate_stride = np.zeros((self.nfields, ), dtype=np.intp)
+        self.mask_ptr = np.zeros((self.nfields, ), dtype=np.intp)
+        self.mask_ray_stride = np.zeros((self.nfields, ), dtype=np.intp)
+        self.mask_gate_stride = np.zeros((self.nfields, ), dtype=np.intp)
+
+        for i in range(self.nfields):
+            data = np.asarray(field_data[i])
+            if not data.dtype.isnative:
+                data = data.astype(data.dtype.newbyteorder('='))
+            if data.dtype not in _DTYPE_CODES:
+                # unpack the data, the unpacked values are used as is
+                data = (data * self.scale[i] + self.add_offset[i]).astype(
+                    np.float32)
+                self.scale[i] = 1.0
+                self.add_offset[i] = 0.0
+            self.arrays.append(data)
+            self.dtype_code[i] = _DTYPE_CODES[data.dtype]
+            self.data_ptr[i] = data.ctypes.data
+            self.data_ray_stride[i] = data.strides[0]
+            self.data_gate_stride[i] = data.strides[1]
+
+            mask = field_mask[i]
+            if mask is None:
+                continue
+            mask = np.asarray(mask)
+            if mask.dtype.itemsize != 1:
+                mask = mask.astype(np.uint8)
+            self.arrays.append(mask)
+            self.mask_ptr[i] = mask.ctypes.data
+            self.mask_ray_stride[i] = mask.strides[0]
+            self.mask_gate_stride[i] = mask.strides[1]
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef int is_masked(self, int i, int nray, int ngate) nogil:
+        """ Return 1 if a gate is masked in a given field, 0 otherwise. """
+        cdef char *ptr
+        if self.mask_ptr[i] == 0:
+            return 0
+        ptr = (<char *>self.mask_ptr[i] + nray * self.mask_ray_stride[i] +
+               ngate * self.mask_gate_stride[i])
+        return ptr[0] != 0
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef float get_value(self, int i, int nray, int ngate) nogil:
+        """ Return the value of a gate in a given field. """
+        cdef char *ptr
+        cdef double raw
+        cdef int code = self.dtype_code[i]
+        ptr = (<char *>self.data_ptr[i] + nray * self.data_ray_stride[i] +
+               ngate * self.data_gate_stride[i])
+        if code == FLOAT32:
+            return (<float *>ptr)[0]
+        elif code == FLOAT64:
+            return <float>(<double *>ptr)[0]
+        elif code == INT8:
+            raw = (<signed char *>ptr)[0]
+        elif code == UINT8:
+            raw = (<unsigned char *>ptr)[0]
+        elif code == INT16:
+            raw = (<short *>ptr)[0]
+        elif code == UINT16:
+            raw = (<unsigned short *>ptr)[0]
+        elif code == INT32:
+            raw = (<int *>ptr)[0]
+        elif code == UINT32:
+            raw = (<unsigned int *>ptr)[0]
+        elif code == INT64:
+            raw = (<long long *>ptr)[0]
+        else:   # UINT64
+            raw = (<unsigned long long *>ptr)[0]
+        return <float>(raw * self.scale[i] + self.add_offset[i])
+
+
 cdef class GateToGridMapper:
     """
     A class for efficient mapping of radar gates to a regular grid by
@@ -212,16 +620,10 @@ cdef class GateToGridMapper:
             Object whose get_roi method returns the radius of influence.
 
         """
-        cdef int ix, iy, iz
-        cdef float x, y, z, roi
-        for ix in range(self.nx):
-            for iy in range(self.ny):
-                for iz in range(self.nz):
-                    x = self.x_start + self.x_step * ix
-                    y = self.y_start + self.y_step * iy
-                    z = self.z_start + self.z_step * iz
-                    roi = roi_func.get_roi(z, y, x)
-                    roi_array[iz, iy, ix] = roi
+        np.asarray(roi_array)[...] = _find_grid_roi(
+            roi_func, (self.nz, self.ny, self.nx),
+            (self.z_start, self.y_start, self.x_start),
+            (self.z_step, self.y_step, self.x_step))
         return
 
     @cython.cdivision(True)
@@ -229,14 +631,17 @@ cdef class GateToGridMapper:
     @cython.wraparound(False)
     def map_gates_to_grid(
             self, float[::1] elevations, float[::1] azimuths,
-            float[::1] ranges, float[:, :, ::1] field_data,
-            char[:, :, ::1] field_mask, char[:, ::1] excluded_gates,
-            offset, float toa, RoIFunction roi_func, int weighting_function):
+            float[::1] ranges, FieldBuffers fields,
+            char[:, ::1] excluded_gates,
+            offset, float toa, RoIFunction roi_func, int weighting_function,
+            int y_min_index=0, int y_max_index=-1):
         """
         Map radar gates unto the regular grid.
 
         The grid_sum and grid_wsum arrays used to initalize the class
-        are update with the mapped gate data.
+        are update with the mapped gate data.  The GIL is released while
+        mapping so multiple threads can call this method concurrently as
+        long as each thread updates a disjoint range of y indices.
 
         Parameters
         ----------
@@ -244,12 +649,9 @@ cdef class GateToGridMapper:
             Elevation and azimuth angles in degrees for each ray in the radar.
         ranges : 1D float32 array
             Gate ranges in meters for each bin in the radar.
-        field_data : 3D float32 array
-            Array containing field data for the radar, dimension are ordered
-            as nrays, ngates, nfields.
-        field_mask : 3D uint8 array
-            Array containing masking of the field data for the radar,
-            dimension are ordered as nrays, ngates, nfields.
+        fields : FieldBuffers
+            Data and masks of the radar fields, the number of fields must
+            match the last dimension of grid_sum and grid_wsum.
         excluded_gates : 2D uint8 array
             Array containing gate masking information.  Gates with non-zero
             values will not be included in the mapping.
@@ -262,70 +664,230 @@ cdef class GateToGridMapper:
             Object whose get_roi method returns the radius of influence.
         weighting_function : int
             Function to use for weighting gates based upon distance.
-            0 for Barnes, 1 for Cressman weighting.
+            0 for Barnes, 1 for Cressman weighting.  2 maps each gate only
+            to the nearest grid point, keeping the closest gate, in this
+            case grid_sum holds the gate values and grid_wsum the closeness
+            of the gates.
+        y_min_index, y_max_index : int
+            Range of y indices (inclusive) of the grid which will be updated.
+            Gates only contribute to grid points within this range.  A
+            negative y_max_index updates all grid points up to the last
+            y index.
 
         """
 
-        cdef int nrays, ngates
+        cdef int nrays, ngates, nray, ngate, gate_start, gate_end
         cdef float elevation, azimuth, r, s
-        cdef float value, roi
-        cdef float[:] values
-        cdef char[:] masks
+        cdef float roi, max_roi
         cdef float x, y, z
         cdef float x_offset, y_offset, z_offset
+        cdef int i
+        cdef float[::1] values = np.empty((self.nfields, ), dtype=np.float32)
+        cdef char[::1] masks = np.empty((self.nfields, ), dtype=np.int8)
+
+        if fields.nfields != self.nfields:
+            raise ValueError('number of fields does not match the grid')
+        if y_max_index < 0 or y_max_index > self.ny - 1:
+            y_max_index = self.ny - 1
+        if y_min_index < 0:
+            y_min_index = 0
 
         nrays = len(elevations)
         ngates = len(ranges)
         z_offset, y_offset, x_offset = offset
-        for nray in range(nrays):
-            # elevation and azimuth angles in radians
-            elevation = elevations[nray] * PI / 180.0
-            azimuth = azimuths[nray] * PI / 180.0
-            for ngate in range(ngates):
-
-                # continue if gate excluded
-                if excluded_gates[nray, ngate]:
-                    continue
-
-                # calculate cartesian coordinate assuming 4/3 earth radius
-                r = ranges[ngate]
-                z = (r**2 + R**2 + 2.0*r*R*sin(elevation))**0.5 - R
-                if z + z_offset >= toa:
-                    continue    # above top of atmosphere
-                s = R * asin(r * cos(elevation) / (R + z))  # arc length in m.
-                x = s * sin(azimuth)
-                y = s * cos(azimuth)
-
-                # add offsets
-                x += x_offset
-                y += y_offset
-                z += z_offset
-
-                # Region of influence
-                roi = roi_func.get_roi(z, y, x)
-
-                values = field_data[nray, ngate]
-                masks = field_mask[nray, ngate]
-                self.map_gate(x, y, z, roi, values, masks, weighting_function)
+        max_roi = self.find_max_roi(roi_func, ranges, y_min_index, y_max_index)
+        with nogil:
+            for nray in range(nrays):
+                # elevation and azimuth angles in radians
+                elevation = elevations[nray] * PI / 180.0
+                azimuth = azimuths[nray] * PI / 180.0
+
+                # skip the gates which cannot contribute to the grid
+                self.find_gate_range(
+                    elevation, azimuth, ranges, x_offset, y_offset, z_offset,
+                    max_roi, y_min_index, y_max_index,
+                    &gate_start, &gate_end)
+                for ngate in range(gate_start, gate_end):
+
+                    # continue if gate excluded
+                    if excluded_gates[nray, ngate]:
+                        continue
+
+                    # calculate cartesian coordinate assuming 4/3 earth radius
+                    r = ranges[ngate]
+                    z = (r**2 + R**2 + 2.0*r*R*sin(elevation))**0.5 - R
+                    if z + z_offset >= toa:
+                        continue    # above top of atmosphere
+                    s = R * asin(r * cos(elevation) / (R + z))  # arc length
+                    x = s * sin(azimuth)
+                    y = s * cos(azimuth)
+
+                    # add offsets
+                    x += x_offset
+                    y += y_offset
+                    z += z_offset
+
+                    # Region of influence
+                    roi = roi_func._find_roi(z, y, x)
+
+                    # field values and masks for the gate
+                    for i in range(self.nfields):
+                        masks[i] = fields.is_masked(i, nray, ngate)
+                        if not masks[i]:
+                            values[i] = fields.get_value(i, nray, ngate)
+
+                    self.map_gate(x, y, z, roi, values, masks,
+                                  weighting_function,
+                                  y_min_index, y_max_index)
+
+    def find_max_roi(self, RoIFunction roi_func, float[::1] ranges,
+                     int y_min_index, int y_max_index):
+        """
+        Find the largest radius of influence of gates which can contribute
+        to grid points between y_min_index and y_max_index.
+
+        The box containing these grid points is expanded by the bound
+        returned by the max_roi method of roi_func until the bound no longer
+        grows.  A negative value is returned when no bound can be found or
+        when the gate ranges are not increasing, gates should not be culled
+        in these cases.
+        """
+        cdef int i
+        for i in range(1, len(ranges)):
+            if ranges[i] <= ranges[i - 1]:
+                return -1.
+
+        z_limits = (self.z_start, self.z_start + self.z_step * (self.nz - 1))
+        y_limits = (self.y_start + self.y_step * y_min_index,
+                    self.y_start + self.y_step * y_max_index)
+        x_limits = (self.x_start, self.x_start + self.x_step * (self.nx - 1))
+        max_roi = roi_func.max_roi(z_limits, y_limits, x_limits)
+        for i in range(10):
+            if max_roi < 0:
+                return -1.
+            # pad the bound to account for rounding and to converge quickly
+            max_roi = max_roi * 1.01 + 1.
+            bound = roi_func.max_roi(
+                (z_limits[0] - max_roi, z_limits[1] + max_roi),
+                (y_limits[0] - max_roi, y_limits[1] + max_roi),
+                (x_limits[0] - max_roi, x_limits[1] + max_roi))
+            if bound <= max_roi:
+                return max_roi
+            max_roi = bound
+        return -1.
+
+    @cython.cdivision(True)
+    cdef int find_gate_range(
+            self, float elevation, float azimuth, float[::1] ranges,
+            float x_offset, float y_offset, float z_offset, float max_roi,
+            int y_min_index, int y_max_index,
+            int *gate_start, int *gate_end) nogil:
+        """
+        Find the range of gates in a ray which can contribute to the grid.
+
+        Gates before gate_start and from gate_end onward lie further than
+        max_roi from all grid points between y_min_index and y_max_index.
+        The horizontal arc length and, for non-negative elevations, the
+        height of the gates increase with range so the range is found by a
+        bisection over the gates.  All gates are included when max_roi is
+        negative.
+        """
+        cdef double s_lo, s_hi, t1, t2, d, lo, hi, a_offset
+        cdef double z_lo, z_hi
+        cdef int axis, check_z, low, high, mid
+        cdef int ngates = ranges.shape[0]
+
+        gate_start[0] = 0
+        gate_end[0] = ngates
+        if max_roi < 0 or ngates == 0:
+            return 0
+
+        # interval of arc lengths for which the horizontal path of the ray
+        # lies within the grid extent expanded by max_roi
+        s_lo = 0
+        s_hi = INFINITY
+        for axis in range(2):
+            if axis == 0:
+                d = sin(azimuth)
+                a_offset = x_offset
+                lo = self.x_start - max_roi
+                hi = self.x_start + self.x_step * (self.nx - 1) + max_roi
+            else:
+                d = cos(azimuth)
+                a_offset = y_offset
+                lo = self.y_start + self.y_step * y_min_index - max_roi
+                hi = self.y_start + self.y_step * y_max_index + max_roi
+            if d > 1e-9:
+                t1 = (lo - a_offset) / d
+                t2 = (hi - a_offset) / d
+            elif d < -1e-9:
+                t1 = (hi - a_offset) / d
+                t2 = (lo - a_offset) / d
+            else:
+                if a_offset < lo or a_offset > hi:
+                    gate_end[0] = 0
+                    return 0
+                continue
+            if t1 > s_lo:
+                s_lo = t1
+            if t2 < s_hi:
+                s_hi = t2
+        if s_lo > s_hi:
+            gate_end[0] = 0
+            return 0
+        s_lo -= 1.
+        s_hi += 1.
+
+        z_lo = self.z_start - max_roi - z_offset - 1.
+        z_hi = self.z_start + self.z_step * (self.nz - 1) + max_roi
+        z_hi = z_hi - z_offset + 1.
+        check_z = elevation >= 0
+
+        # first gate which is not before the grid extent
+        low = 0
+        high = ngates
+        while low < high:
+            mid = (low + high) // 2
+            if gate_before(ranges[mid], elevation, s_lo, z_lo, check_z):
+                low = mid + 1
+            else:
+                high = mid
+        gate_start[0] = low
+
+        # first gate which is beyond the grid extent
+        high = ngates
+        while low < high:
+            mid = (low + high) // 2
+            if gate_beyond(ranges[mid], elevation, s_hi, z_hi, check_z):
+                high = mid
+            else:
+                low = mid + 1
+        gate_end[0] = low
+        return 0
 
     @cython.initializedcheck(False)
     @cython.cdivision(True)
     @cython.boundscheck(False)
     @cython.wraparound(False)
     cdef int map_gate(self, float x, float y, float z, float roi,
-                      float[:] values, char[:] masks,
-                      int weighting_function):
+                      float[::1] values, char[::1] masks,
+                      int weighting_function, int y_min_index,
+                      int y_max_index) nogil:
         """ Map a single gate to the grid. """
 
         cdef float xg, yg, zg, dist, weight, roi2, dist2
         cdef int x_min, x_max, y_min, y_max, z_min, z_max
-        cdef int xi, yi, zi
+        cdef int xi, yi, zi, i
 
         # shift positions so that grid starts at 0
         x -= self.x_start
         y -= self.y_start
         z -= self.z_start
 
+        if weighting_function == NEAREST:
+            return self.map_gate_nearest(
+                x, y, z, roi, values, masks, y_min_index, y_max_index)
+
         x_min = find_min(x, roi, self.x_step)
         if x_min > self.nx-1:
             return 0
@@ -334,10 +896,14 @@ cdef class GateToGridMapper:
             return 0
 
         y_min = find_min(y, roi, self.y_step)
-        if y_min > self.ny-1:
+        if y_min < y_min_index:
+            y_min = y_min_index
+        if y_min > y_max_index:
             return 0
         y_max = find_max(y, roi, self.y_step, self.ny)
-        if y_max < 0:
+        if y_max > y_max_index:
+            y_max = y_max_index
+        if y_max < y_min_index:
             return 0
 
         z_min = find_min(z, roi, self.z_step)
@@ -370,9 +936,227 @@ cdef class GateToGridMapper:
                         self.grid_wsum[zi, yi, xi, i] += weight
         return 1
 
+    @cython.initializedcheck(False)
+    @cython.cdivision(True)
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef int map_gate_nearest(self, float x, float y, float z, float roi,
+                              float[::1] values, char[::1] masks,
+                              int y_min_index, int y_max_index) nogil:
+        """
+        Map a single gate to the nearest grid point.
+
+        The positions are relative to the start of the grid.  The gate
+        replaces the values of the grid point when it is closer than any
+        previously mapped gate, the closeness 1 / (1 + distance) is tracked
+        in grid_wsum and the gate value is stored in grid_sum.
+        """
+        cdef float xg, yg, zg, dist2, closeness
+        cdef int xi, yi, zi, i
+
+        yi = nearest_index(y, 0, self.y_step, self.ny)
+        if yi < y_min_index or yi > y_max_index:
+            return 0
+        xi = nearest_index(x, 0, self.x_step, self.nx)
+        zi = nearest_index(z, 0, self.z_step, self.nz)
+
+        xg = self.x_step * xi
+        yg = self.y_step * yi
+        zg = self.z_step * zi
+        dist2 = (xg-x)*(xg-x) + (yg-y)*(yg-y) + (zg-z)*(zg-z)
+        if dist2 > roi * roi:
+            return 0
+
+        closeness = 1. / (1. + sqrt(dist2))
+        for i in range(self.nfields):
+            if masks[i]:
+                continue
+            if closeness > self.grid_wsum[zi, yi, xi, i]:
+                self.grid_sum[zi, yi, xi, i] = values[i]
+                self.grid_wsum[zi, yi, xi, i] = closeness
+        return 1
+
+    @cython.cdivision(True)
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    def find_gate_weights(
+            self, float[::1] elevations, float[::1] azimuths,
+            float[::1] ranges, char[:, ::1] excluded_gates,
+            offset, float toa, RoIFunction roi_func, int weighting_function):
+        """
+        Find the weight of each radar gate at each grid point.
+
+        The grid_sum and grid_wsum arrays used to initalize the class are
+        not used or modified by this method.
+
+        Parameters
+        ----------
+        elevations, azimuths, ranges, excluded_gates, offset, toa, roi_func,
+        weighting_function :
+            See :py:func:`map_gates_to_grid`.
+
+        Returns
+        -------
+        grid_index : 1D intp array
+            Flat index, in z, y, x order, of the grid point for each weight.
+        gate_index : 1D intp array
+            Flat index, in ray, gate order, of the radar gate for each
+            weight.
+        weights : 1D float32 array
+            Weight of the gate at the grid point.
+
+        """
+        cdef int nrays, ngates, nray, ngate, store, gate_start, gate_end
+        cdef Py_ssize_t count, nweights
+        cdef float elevation, azimuth, r, s
+        cdef float roi, max_roi
+        cdef float x, y, z
+        cdef float x_offset, y_offset, z_offset
+        cdef Py_ssize_t[::1] grid_index
+        cdef Py_ssize_t[::1] gate_index
+        cdef float[::1] weights
+
+        if weighting_function == NEAREST:
+            raise ValueError(
+                'nearest weighting can not be described by gate weights')
+        nrays = len(elevations)
+        ngates = len(ranges)
+        z_offset, y_offset, x_offset = offset
+        max_roi = self.find_max_roi(roi_func, ranges, 0, self.ny - 1)
+
+        # the first pass counts the number of weights, the second pass
+        # stores the weights in arrays of the required size.
+        nweights = 0
+        grid_index = np.empty((0, ), dtype=np.intp)
+        gate_index = np.empty((0, ), dtype=np.intp)
+        weights = np.empty((0, ), dtype=np.float32)
+        for store in range(2):
+            if store:
+                grid_index = np.empty((nweights, ), dtype=np.intp)
+                gate_index = np.empty((nweights, ), dtype=np.intp)
+                weights = np.empty((nweights, ), dtype=np.float32)
+            count = 0
+            with nogil:
+                for nray in range(nrays):
+                    elevation = elevations[nray] * PI / 180.0
+                    azimuth = azimuths[nray] * PI / 180.0
+                    self.find_gate_range(
+                        elevation, azimuth, ranges, x_offset, y_offset,
+                        z_offset, max_roi, 0, self.ny - 1,
+                        &gate_start, &gate_end)
+                    for ngate in range(gate_start, gate_end):
+
+                        if excluded_gates[nray, ngate]:
+                            continue
+
+                        r = ranges[ngate]
+                        z = (r**2 + R**2 + 2.0*r*R*sin(elevation))**0.5 - R
+                        if z + z_offset >= toa:
+                            continue
+                        s = R * asin(r * cos(elevation) / (R + z))
+                        x = s * sin(azimuth) + x_offset
+                        y = s * cos(azimuth) + y_offset
+                        z += z_offset
+
+                        roi = roi_func._find_roi(z, y, x)
+                        count = self.weight_gate(
+                            x, y, z, roi, <Py_ssize_t>nray * ngates + ngate,
+                            weighting_function, store, count,
+                            grid_index, gate_index, weights)
+            nweights = count
+        return (np.asarray(grid_index), np.asarray(gate_index),
+                np.asarray(weights))
+
+    @cython.initializedcheck(False)
+    @cython.cdivision(True)
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef Py_ssize_t weight_gate(
+            self, float x, float y, float z, float roi,
+            Py_ssize_t gate, int weighting_function, int store,
+            Py_ssize_t count, Py_ssize_t[::1] grid_index,
+            Py_ssize_t[::1] gate_index, float[::1] weights) nogil:
+        """ Find the weights of a single gate, returning the new count. """
+
+        cdef float xg, yg, zg, weight, roi2, dist2
+        cdef int x_min, x_max, y_min, y_max, z_min, z_max
+        cdef int xi, yi, zi
+
+        # shift positions so that grid starts at 0
+        x -= self.x_start
+        y -= self.y_start
+        z -= self.z_start
+
+        x_min = find_min(x, roi, self.x_step)
+        if x_min > self.nx-1:
+            return count
+        x_max = find_max(x, roi, self.x_step, self.nx)
+        if x_max < 0:
+            return count
+
+        y_min = find_min(y, roi, self.y_step)
+        if y_min > self.ny-1:
+            return count
+        y_max = find_max(y, roi, self.y_step, self.ny)
+        if y_max < 0:
+            return count
+
+        z_min = find_min(z, roi, self.z_step)
+        if z_min > self.nz-1:
+            return count
+        z_max = find_max(z, roi, self.z_step, self.nz)
+        if z_max < 0:
+            return count
+
+        roi2 = roi * roi
+        for xi in range(x_min, x_max+1):
+            for yi in range(y_min, y_max+1):
+                for zi in range(z_min, z_max+1):
+                    xg = self.x_step * xi
+                    yg = self.y_step * yi
+                    zg = self.z_step * zi
+                    dist2 = (xg-x)*(xg-x) + (yg-y)*(yg-y) + (zg-z)*(zg-z)
+
+                    if dist2 > roi2:
+                        continue
+
+                    if store:
+                        if weighting_function == BARNES:
+                            weight = exp(-(dist2) / (2*roi2)) + 1e-5
+                        else:   # CRESSMAN
+                            weight = (roi2 - dist2) / (roi2 + dist2)
+                        grid_index[count] = (
+                            (<Py_ssize_t>zi * self.ny + yi) * self.nx + xi)
+                        gate_index[count] = gate
+                        weights[count] = weight
+                    count += 1
+        return count
+
+
+cdef inline int gate_before(float r, float elevation, double s_lo,
+                            double z_lo, int check_z) nogil:
+    """ True when a gate lies before an arc length or height interval. """
+    cdef float z, s
+    z = (r**2 + R**2 + 2.0*r*R*sin(elevation))**0.5 - R
+    if check_z and z < z_lo:
+        return 1
+    s = R * asin(r * cos(elevation) / (R + z))
+    return s < s_lo
+
+
+cdef inline int gate_beyond(float r, float elevation, double s_hi,
+                            double z_hi, int check_z) nogil:
+    """ True when a gate lies beyond an arc length or height interval. """
+    cdef float z, s
+    z = (r**2 + R**2 + 2.0*r*R*sin(elevation))**0.5 - R
+    if check_z and z > z_hi:
+        return 1
+    s = R * asin(r * cos(elevation) / (R + z))
+    return s > s_hi
+
 
 @cython.cdivision(True)
-cdef int find_min(float a, float roi, float step):
+cdef int find_min(float a, float roi, float step) nogil:
     """ Find the mimumum gate index for a dimension. """
     cdef int a_min
     if step == 0:
@@ -384,7 +1168,7 @@ cdef int find_min(float a, float roi, float step):
 
 
 @cython.cdivision(True)
-cdef int find_max(float a, float roi, float step, int na):
+cdef int find_max(float a, float roi, float step, int na) nogil:
     """ Find the maximum gate index for a dimension. """
     cdef int a_max
     if step == 0:
@@ -393,3 +1177,17 @@ cdef int find_max(float a, float roi, float step, int na):
     if a_max > na-1:
         a_max = na-1
     return a_max
+
+
+@cython.cdivision(True)
+cdef int nearest_index(float a, float start, float step, int na) nogil:
+    """ Find the index of the nearest grid point for a dimension. """
+    cdef int a_index
+    if step == 0:
+        return 0
+    a_index = <int>floor((a - start) / step + 0.5)
+    if a_index < 0:
+        a_index = 0
+    if a_index > na-1:
+        a_index = na-1
+    return a_index
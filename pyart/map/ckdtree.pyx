@@ -39,10 +39,18 @@ DAMAGE.
 # Released under the scipy license
 import numpy as np
 import scipy.sparse
+try:
+    from concurrent import futures
+    _FUTURES_AVAILABLE = True
+except ImportError:
+    _FUTURES_AVAILABLE = False
+
+from ..exceptions import MissingOptionalDependency
 
 cimport numpy as np
 cimport libc.stdlib as stdlib
 cimport cython
+from libc.math cimport sqrt
 
 cdef extern from "limits.h":
     long LONG_MAX
@@ -785,6 +793,94 @@ cdef struct nodeinfo:
     np.float64_t side_distances[0]  # FIXME: Only valid in C99, invalid C++ and C89
 
 
+# Batched query_ball_point
+# ========================
+#
+# The batched ball point query walks the tree without touching any Python
+# objects so that it can run with the GIL released.  The indices and
+# distances of the neighbors are collected in a growable C buffer.
+
+cdef struct neighbor_buffer:
+    np.intp_t *indices
+    np.float64_t *distances
+    np.intp_t size
+    np.intp_t max_size
+
+
+cdef int _buffer_append(neighbor_buffer *buf, np.intp_t index,
+                        np.float64_t distance) nogil:
+    cdef void *tmp
+    cdef np.intp_t new_max_size
+    if buf.size == buf.max_size:
+        new_max_size = 2 * buf.max_size + 64
+        tmp = stdlib.realloc(buf.indices, new_max_size * sizeof(np.intp_t))
+        if tmp == NULL:
+            return -1
+        buf.indices = <np.intp_t*> tmp
+        tmp = stdlib.realloc(buf.distances,
+                             new_max_size * sizeof(np.float64_t))
+        if tmp == NULL:
+            return -1
+        buf.distances = <np.float64_t*> tmp
+        buf.max_size = new_max_size
+    buf.indices[buf.size] = index
+    buf.distances[buf.size] = distance
+    buf.size += 1
+    return 0
+
+
+cdef int _ball_point_traverse(innernode *node, np.float64_t *x,
+                              np.float64_t r2, np.float64_t *mins,
+                              np.float64_t *maxes, np.intp_t m,
+                              np.float64_t *raw_data,
+                              np.intp_t *raw_indices,
+                              neighbor_buffer *buf) nogil:
+    cdef leafnode *lnode
+    cdef np.intp_t i, j, k
+    cdef np.float64_t d, diff, saved
+
+    # squared distance from the point to the node's hyperrectangle
+    d = 0
+    for k in range(m):
+        if x[k] < mins[k]:
+            diff = mins[k] - x[k]
+        elif x[k] > maxes[k]:
+            diff = x[k] - maxes[k]
+        else:
+            diff = 0
+        d += diff * diff
+    if d > r2:
+        return 0
+
+    if node.split_dim == -1:  # leaf node
+        lnode = <leafnode*> node
+        for i in range(lnode.start_idx, lnode.end_idx):
+            j = raw_indices[i]
+            d = 0
+            for k in range(m):
+                diff = x[k] - raw_data[j * m + k]
+                d += diff * diff
+            if d <= r2:
+                if _buffer_append(buf, j, sqrt(d)) == -1:
+                    return -1
+    else:
+        k = node.split_dim
+        saved = maxes[k]
+        maxes[k] = node.split
+        if _ball_point_traverse(node.less, x, r2, mins, maxes, m,
+                                raw_data, raw_indices, buf) == -1:
+            return -1
+        maxes[k] = saved
+
+        saved = mins[k]
+        mins[k] = node.split
+        if _ball_point_traverse(node.greater, x, r2, mins, maxes, m,
+                                raw_data, raw_indices, buf) == -1:
+            return -1
+        mins[k] = saved
+    return 0
+
+
 # Main class
 # ==========
 cdef class cKDTree:
@@ -1437,6 +1533,130 @@ cdef class cKDTree:
                 result[c] = self.__query_ball_point(&xx[0], r, p, eps)
             return result
 
+    # ----------------------
+    # query_ball_point_batch
+    # ----------------------
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef tuple _query_ball_point_range(cKDTree self,
+                                       np.float64_t[:, ::1] x,
+                                       np.float64_t[::1] r,
+                                       np.intp_t start, np.intp_t end,
+                                       np.intp_t[::1] counts):
+        """
+        Query the points start to end, returning the neighbor indices and
+        distances.
+        """
+        cdef neighbor_buffer buf
+        cdef np.float64_t *mins
+        cdef np.float64_t *maxes
+        cdef np.intp_t[::1] indices
+        cdef np.float64_t[::1] distances
+        cdef np.intp_t i, k, size
+        cdef int status = 0
+
+        buf.indices = NULL
+        buf.distances = NULL
+        buf.size = 0
+        buf.max_size = 0
+        mins = <np.float64_t*> stdlib.malloc(
+            2 * self.m * sizeof(np.float64_t))
+        if mins == NULL:
+            raise MemoryError
+        maxes = mins + self.m
+
+        try:
+            with nogil:
+                for i in range(start, end):
+                    for k in range(self.m):
+                        mins[k] = self.raw_mins[k]
+                        maxes[k] = self.raw_maxes[k]
+                    size = buf.size
+                    status = _ball_point_traverse(
+                        self.tree, &x[i, 0], r[i] * r[i], mins, maxes,
+                        self.m, self.raw_data, self.raw_indices, &buf)
+                    if status == -1:
+                        break
+                    counts[i] = buf.size - size
+            if status == -1:
+                raise MemoryError
+
+            indices = np.empty((buf.size, ), dtype=np.intp)
+            distances = np.empty((buf.size, ), dtype=np.float64)
+            for i in range(buf.size):
+                indices[i] = buf.indices[i]
+                distances[i] = buf.distances[i]
+        finally:
+            stdlib.free(mins)
+            stdlib.free(buf.indices)
+            stdlib.free(buf.distances)
+        return (indices.base, distances.base)
+
+    def query_ball_point_batch(cKDTree self, object x, object r,
+                               int nthreads=1):
+        """query_ball_point_batch(self, x, r, nthreads=1)
+
+        Find all points within a per point distance of many points.
+
+        The Euclidean (p=2) norm is used.  The tree is traversed with the GIL
+        released so the query can be split over multiple threads.
+
+        Parameters
+        ----------
+        x : array_like, shape (n, self.m)
+            The points to search for neighbors of.
+        r : float or array_like, shape (n, )
+            The radius within which neighbors are returned for each point.
+        nthreads : int, optional
+            Number of threads used to perform the query.
+
+        Returns
+        -------
+        indptr : array, shape (n + 1, )
+            Offsets into indices and distances, the neighbors of point i are
+            ``indices[indptr[i]:indptr[i + 1]]``.
+        indices : array
+            Indices of the neighbors of all points.
+        distances : array
+            Distances from the points to their neighbors.
+
+        """
+        x = np.ascontiguousarray(x, dtype=np.float64)
+        if x.ndim != 2 or x.shape[1] != self.m:
+            raise ValueError("x must have shape (n, %d)" % (int(self.m)))
+        npoints = x.shape[0]
+        radii = np.empty((npoints, ), dtype=np.float64)
+        radii[:] = r
+        if nthreads < 1:
+            raise ValueError("nthreads must be at least 1")
+
+        nchunks = max(min(nthreads, npoints), 1)
+        bounds = np.linspace(0, npoints, nchunks + 1).astype(np.intp)
+        counts = np.zeros((npoints, ), dtype=np.intp)
+
+        def query_chunk(start, end):
+            return self._query_ball_point_range(x, radii, start, end, counts)
+
+        if nchunks == 1:
+            results = [query_chunk(0, npoints)]
+        else:
+            if not _FUTURES_AVAILABLE:
+                raise MissingOptionalDependency(
+                    "concurrent.futures is required to use multiple threads "
+                    "but is not available")
+            with futures.ThreadPoolExecutor(max_workers=nchunks) as executor:
+                jobs = [executor.submit(query_chunk, bounds[i], bounds[i + 1])
+                        for i in range(nchunks)]
+                # retrieve the results to re-raise any exceptions from the
+                # threads
+                results = [job.result() for job in jobs]
+
+        indptr = np.zeros((npoints + 1, ), dtype=np.intp)
+        np.cumsum(counts, out=indptr[1:])
+        indices = np.concatenate([result[0] for result in results])
+        distances = np.concatenate([result[1] for result in results])
+        return indptr, indices, distances
+
     # ---------------
     # query_ball_tree
     # ---------------
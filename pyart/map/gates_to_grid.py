@@ -8,6 +8,17 @@ Generate a Cartesian grid by mapping from radar gates onto the grid.
     :toctree: generated/
 
     map_gates_to_grid
+    map_gates_to_partial_grid
+    merge_partial_grids
+    normalize_partial_grid
+    _is_nearest
+    _map_gates_job
+    _open_job_result
+    _map_radar_gates
+    _find_radar_mapping_args
+    _create_array
+    _create_named_array
+    _open_named_array
     _detemine_cy_weighting_func
     _parse_grid_origin
     _parse_gatefilters
@@ -18,14 +29,25 @@ Generate a Cartesian grid by mapping from radar gates onto the grid.
 
 """
 
+import os
+import tempfile
+
 import numpy as np
+try:
+    from concurrent import futures
+    _FUTURES_AVAILABLE = True
+except ImportError:
+    _FUTURES_AVAILABLE = False
+
 from ..config import get_field_name
+from ..exceptions import MissingOptionalDependency
 from ..core.radar import Radar
 from ..core.transforms import corner_to_point
 from ..filters import GateFilter, moment_based_gate_filter
 
-from ._gate_to_grid_map import GateToGridMapper
+from ._gate_to_grid_map import GateToGridMapper, FieldBuffers
 from ._gate_to_grid_map import RoIFunction, ConstantRoI, DistBeamRoI, DistRoI
+from ._gate_to_grid_map import LookupRoI
 
 
 def map_gates_to_grid(
@@ -33,7 +55,8 @@ def map_gates_to_grid(
         grid_origin_alt=None, fields=None, gatefilters=False, map_roi=True,
         weighting_function='Barnes', toa=17000.0, roi_func='dist_beam',
         constant_roi=500., z_factor=0.05, xy_factor=0.02, min_radius=500.0,
-        h_factor=1.0, nb=1.5, bsp=1.0, **kwargs):
+        h_factor=1.0, nb=1.5, bsp=1.0, nthreads=1, memmap_dir=None,
+        workers=None, roi_lookup=False, **kwargs):
     """
     Map gates from one or more radars to a Cartesian grid.
 
@@ -49,6 +72,14 @@ def map_gates_to_grid(
 
     Parameters
     ----------
+    weighting_function : 'Barnes', 'Cressman' or 'Nearest'
+        Functions used to weight nearby collected points when interpolating a
+        grid point.  'Nearest' maps each gate only to the closest grid
+        point and sets that grid point to the value of the closest gate
+        within the radius of influence.  This is much faster than the other
+        functions but grid points which are not the closest grid point of
+        any gate are masked, which happens when the grid spacing is finer
+        than the gate spacing.
     roi_func : str or RoIFunction
         Radius of influence function.  A functions which takes an
         z, y, x grid location, in meters, and returns a radius (in meters)
@@ -64,7 +95,39 @@ def map_gates_to_grid(
 
         A custom RoIFunction can be defined using the RoIFunction class
         and defining a get_roi method which returns the radius.  For efficient
-        mapping this class should be implemented in Cython.
+        mapping this class should be implemented in Cython.  Rays and gates
+        which lie further than the largest radius of influence from the grid
+        are skipped before mapping, custom classes should define a max_roi
+        method returning an upper bound of the radius within a box to
+        enable this culling.
+    nthreads : int
+        Number of threads to use when mapping gates onto the grid.  The grid
+        is divided into bands along the y dimension and each thread updates
+        a single band, the results are identical to those produced with a
+        single thread.  RoIFunction subclasses defined in Python hold the
+        GIL when calculating the radius of influence, limiting the speed
+        up.
+    memmap_dir : str or None
+        Directory in which to create temporary memory-mapped files backing the
+        grid accumulators and the mapped fields.  This allows grids larger
+        than the available memory to be created.  None, the default, keeps
+        all arrays in memory.
+    workers : int or None
+        Number of worker processes to use when mapping the radars.  Each
+        radar is mapped to a partial grid in a separate process and the
+        partial grids are merged in the order of the radars.  When
+        memmap_dir is specified the workers create the partial grids in
+        memory-mapped files which are passed to the current process by
+        name rather than by value.  None, the default,
+        maps all radars in the current process.  Requires the
+        concurrent.futures module.
+    roi_lookup : bool
+        True to evaluate the radius of influence function once at each grid
+        point and use the value at the grid point nearest to each gate when
+        mapping the gates.  This is faster for expensive functions, for
+        example 'dist' and 'dist_beam' with many radars, but approximates
+        the radius of influence of each gate.  False, the default,
+        evaluates the function at the location of each gate.
 
     Returns
     -------
@@ -78,12 +141,121 @@ def map_gates_to_grid(
     grid_from_radars : Map to a grid and return a Grid object
     map_to_grid : Create grid by finding the radius of influence around each
                   grid point.
+    map_gates_to_partial_grid : Map gates to unnormalized accumulators which
+                                can be merged.
+
+    """
+    # make a tuple if passed a radar object as the first argument
+    if isinstance(radars, Radar):
+        radars = (radars, )
+
+    if nthreads < 1:
+        raise ValueError('nthreads must be a positive integer')
+
+    if grid_origin_alt is None:
+        grid_origin_alt = float(radars[0].altitude['data'])
+
+    gatefilters = _parse_gatefilters(gatefilters, radars)
+    grid_origin = _parse_grid_origin(grid_origin, radars)
+    fields = _determine_fields(fields, radars)
+    offsets = _find_offsets(radars, grid_origin, grid_origin_alt)
+    grid_starts, grid_steps = _find_grid_params(grid_shape, grid_limits)
+    roi_func = _parse_roi_func(roi_func, constant_roi, z_factor, xy_factor,
+                               min_radius, h_factor, nb, bsp, offsets)
+    if roi_lookup and not isinstance(roi_func, LookupRoI):
+        roi_func = LookupRoI.from_roi_func(
+            roi_func, grid_shape, grid_starts, grid_steps)
+
+    # map the gates from all radars onto the grid accumulators
+    partial_kwargs = dict(
+        grid_origin=grid_origin, grid_origin_alt=grid_origin_alt,
+        fields=fields, weighting_function=weighting_function, toa=toa,
+        roi_func=roi_func, nthreads=nthreads, memmap_dir=memmap_dir)
+    partial_kwargs.update(kwargs)
+    if workers is None:
+        partial_grid = map_gates_to_partial_grid(
+            radars, grid_shape, grid_limits, gatefilters=gatefilters,
+            **partial_kwargs)
+    else:
+        if not _FUTURES_AVAILABLE:
+            raise MissingOptionalDependency(
+                "concurrent.futures is required to use workers but is not " +
+                "available")
+        # only the arrays needed for mapping are sent to the workers
+        cy_weighting_function = _detemine_cy_weighting_func(
+            weighting_function)
+        with futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            jobs = []
+            for radar, radar_offset, gatefilter in zip(
+                    radars, offsets, gatefilters):
+                radar_args = _find_radar_mapping_args(
+                    radar, fields, gatefilter, **kwargs)
+                jobs.append(executor.submit(
+                    _map_gates_job, grid_shape, grid_starts, grid_steps,
+                    len(fields), nthreads, memmap_dir, radar_args,
+                    radar_offset, toa, roi_func, cy_weighting_function))
+            # merge in submission order, the first partial grid is owned
+            # by this process and is merged into in place.
+            results = (_open_job_result(job.result(), grid_shape, len(fields))
+                       for job in jobs)
+            partial_grid = merge_partial_grids(
+                ({'fields': fields, 'grid_sum': s, 'grid_wsum': w,
+                  'weighting_function': weighting_function}
+                 for s, w in results), inplace=True)
+
+    # create and return the grid dictionary
+    grids = normalize_partial_grid(partial_grid, memmap_dir)
+    if map_roi:
+        roi_array = _create_array(grid_shape, 'float32', memmap_dir)
+        empty = np.zeros(grid_shape + (0, ), dtype=np.float32)
+        gatemapper = GateToGridMapper(
+            grid_shape, grid_starts, grid_steps, empty, empty)
+        gatemapper.find_roi_for_grid(roi_array, roi_func)
+        grids['ROI'] = roi_array
+    return grids
+
+
+def map_gates_to_partial_grid(
+        radars, grid_shape, grid_limits, grid_origin=None,
+        grid_origin_alt=None, fields=None, gatefilters=False,
+        weighting_function='Barnes', toa=17000.0, roi_func='dist_beam',
+        constant_roi=500., z_factor=0.05, xy_factor=0.02, min_radius=500.0,
+        h_factor=1.0, nb=1.5, bsp=1.0, nthreads=1, memmap_dir=None,
+        roi_lookup=False, **kwargs):
+    """
+    Map gates from one or more radars to unnormalized grid accumulators.
+
+    Partial grids created from different subsets of radars, for example in
+    separate processes or on separate machines, can be combined using
+    :py:func:`merge_partial_grids` and the mapped fields found using
+    :py:func:`normalize_partial_grid`.  For the merged result to match
+    :py:func:`map_gates_to_grid` the same grid_origin, grid_origin_alt and
+    fields should be specified for all subsets.  The 'dist' and 'dist_beam'
+    radius of influence functions depend on the location of all radars,
+    when these are used roi_func should be a RoIFunction created from the
+    offsets of all the radars.
+
+    Parameters are identical to those in :py:func:`map_gates_to_grid`.
+
+    Returns
+    -------
+    partial_grid : dict
+        Dictionary containing the list of mapped fields under the 'fields'
+        key and the weighted sum and sum of weights for each grid point and
+        field under the 'grid_sum' and 'grid_wsum' keys.  These are float32
+        arrays with dimensions z, y, x, and fields.  The weighting function
+        used is stored under the 'weighting_function' key.  For 'nearest'
+        weighting the accumulators contain the value and closeness,
+        1 / (1 + distance), of the closest gate.
 
     """
     # make a tuple if passed a radar object as the first argument
     if isinstance(radars, Radar):
         radars = (radars, )
 
+    if nthreads < 1:
+        raise ValueError('nthreads must be a positive integer')
+
     if grid_origin_alt is None:
         grid_origin_alt = float(radars[0].altitude['data'])
 
@@ -95,52 +267,298 @@ def map_gates_to_grid(
     grid_starts, grid_steps = _find_grid_params(grid_shape, grid_limits)
     roi_func = _parse_roi_func(roi_func, constant_roi, z_factor, xy_factor,
                                min_radius, h_factor, nb, bsp, offsets)
+    if roi_lookup and not isinstance(roi_func, LookupRoI):
+        roi_func = LookupRoI.from_roi_func(
+            roi_func, grid_shape, grid_starts, grid_steps)
 
     # prepare grid storage arrays
     nfields = len(fields)
-    grid_sum = np.zeros(grid_shape + (nfields, ), dtype=np.float32)
-    grid_wsum = np.zeros(grid_shape + (nfields, ), dtype=np.float32)
+    grid_sum = _create_array(grid_shape + (nfields, ), 'float32', memmap_dir)
+    grid_wsum = _create_array(grid_shape + (nfields, ), 'float32', memmap_dir)
     gatemapper = GateToGridMapper(
         grid_shape, grid_starts, grid_steps, grid_sum, grid_wsum)
 
     # project gates from each radar onto the grid
     for radar, radar_offset, gatefilter in zip(radars, offsets, gatefilters):
+        radar_args = _find_radar_mapping_args(
+            radar, fields, gatefilter, **kwargs)
+        _map_radar_gates(
+            gatemapper, grid_shape, nthreads, radar_args, radar_offset, toa,
+            roi_func, cy_weighting_function)
+
+    return {'fields': list(fields), 'grid_sum': grid_sum,
+            'grid_wsum': grid_wsum, 'weighting_function': weighting_function}
+
+
+def merge_partial_grids(partial_grids, inplace=False, memmap_dir=None):
+    """
+    Merge partial grids created by :py:func:`map_gates_to_partial_grid`.
+
+    Parameters
+    ----------
+    partial_grids : iterable of dict
+        Partial grids to merge, all must have the same fields and grid
+        shape.
+    inplace : bool
+        True to accumulate into the arrays of the first partial grid, which
+        is modified, rather than a copy of these arrays.  False, the
+        default, does not modify any of the partial grids.
+    memmap_dir : str or None
+        Directory in which to create temporary memory-mapped files backing
+        the merged accumulators when inplace is False.  None, the default,
+        keeps the merged accumulators in memory.
+
+    Returns
+    -------
+    partial_grid : dict
+        Partial grid with accumulators summed over all of the partial grids.
+        For partial grids mapped with 'nearest' weighting the values of the
+        closest gate are kept instead.
+
+    """
+    merged = None
+    for partial_grid in partial_grids:
+        weighting_function = partial_grid.get('weighting_function', 'Barnes')
+        if merged is None:
+            grid_sum = partial_grid['grid_sum']
+            grid_wsum = partial_grid['grid_wsum']
+            if not inplace:
+                grid_sum = _create_array(
+                    grid_sum.shape, 'float32', memmap_dir)
+                grid_sum[:] = partial_grid['grid_sum']
+                grid_wsum = _create_array(
+                    grid_wsum.shape, 'float32', memmap_dir)
+                grid_wsum[:] = partial_grid['grid_wsum']
+            merged = {
+                'fields': list(partial_grid['fields']),
+                'grid_sum': grid_sum,
+                'grid_wsum': grid_wsum,
+                'weighting_function': weighting_function}
+            nearest = _is_nearest(merged)
+            continue
+        if (list(partial_grid['fields']) != merged['fields'] or
+                partial_grid['grid_sum'].shape != merged['grid_sum'].shape):
+            raise ValueError('partial grids have different fields or shapes')
+        if _is_nearest(partial_grid) != nearest:
+            raise ValueError(
+                'partial grids have incompatible weighting functions')
+        # merge one vertical level at a time to limit the size of
+        # temporary arrays
+        for iz in range(merged['grid_sum'].shape[0]):
+            grid_sum = partial_grid['grid_sum'][iz]
+            grid_wsum = partial_grid['grid_wsum'][iz]
+            if nearest:
+                closer = grid_wsum > merged['grid_wsum'][iz]
+                np.copyto(merged['grid_sum'][iz], grid_sum, where=closer)
+                np.copyto(merged['grid_wsum'][iz], grid_wsum, where=closer)
+            else:
+                merged['grid_sum'][iz] += grid_sum
+                merged['grid_wsum'][iz] += grid_wsum
+    if merged is None:
+        raise ValueError('no partial grids to merge')
+    return merged
+
+
+def normalize_partial_grid(partial_grid, memmap_dir=None):
+    """
+    Find the mapped fields from the accumulators of a partial grid.
+
+    Parameters
+    ----------
+    partial_grid : dict
+        Partial grid created by :py:func:`map_gates_to_partial_grid` or
+        :py:func:`merge_partial_grids`.
+    memmap_dir : str or None
+        Directory in which to create temporary memory-mapped files backing
+        the mapped fields.  None, the default, keeps the fields in memory.
+
+    Returns
+    -------
+    grids : dict
+        Dictionary of mapped fields.  Each element is a masked float32 array
+        containing the interpolated grid for that field.
+
+    """
+    # normalize one vertical level at a time to limit the size of temporary
+    # arrays
+    grid_sum = partial_grid['grid_sum']
+    grid_wsum = partial_grid['grid_wsum']
+    grid_shape = grid_sum.shape[:3]
+    nearest = _is_nearest(partial_grid)
+    grids = {}
+    for i, field in enumerate(partial_grid['fields']):
+        data = _create_array(grid_shape, 'float32', memmap_dir)
+        mask = _create_array(grid_shape, 'bool', memmap_dir)
+        for iz in range(grid_shape[0]):
+            wsum = grid_wsum[iz, ..., i]
+            mask[iz] = wsum == 0
+            if nearest:
+                # grid_sum holds the value of the closest gate
+                data[iz] = grid_sum[iz, ..., i]
+            else:
+                np.divide(grid_sum[iz, ..., i], wsum, out=data[iz],
+                          where=~mask[iz])
+        grids[field] = np.ma.masked_array(data, mask)
+    return grids
+
+
+def _is_nearest(partial_grid):
+    """ True when a partial grid was mapped using 'nearest' weighting. """
+    weighting_function = partial_grid.get('weighting_function', 'Barnes')
+    return weighting_function.upper() == 'NEAREST'
+
+
+def _map_gates_job(grid_shape, grid_starts, grid_steps, nfields, nthreads,
+                   memmap_dir, radar_args, *args):
+    """
+    Map the gates from a single radar onto new grid accumulators.
+
+    This function is executed by worker processes, all of the arguments are
+    picklable.  Returns the grid_sum and grid_wsum accumulators, or the
+    filenames of the memory-mapped files containing them when memmap_dir is
+    not None, as memory maps are pickled by value.
+    """
+    shape = grid_shape + (nfields, )
+    if memmap_dir is None:
+        grid_sum = _create_array(shape, 'float32')
+        grid_wsum = _create_array(shape, 'float32')
+    else:
+        grid_sum, sum_filename = _create_named_array(
+            shape, 'float32', memmap_dir)
+        grid_wsum, wsum_filename = _create_named_array(
+            shape, 'float32', memmap_dir)
+    gatemapper = GateToGridMapper(
+        grid_shape, grid_starts, grid_steps, grid_sum, grid_wsum)
+    _map_radar_gates(gatemapper, grid_shape, nthreads, radar_args, *args)
+    if memmap_dir is None:
+        return grid_sum, grid_wsum
+    grid_sum.flush()
+    grid_wsum.flush()
+    return sum_filename, wsum_filename
+
+
+def _open_job_result(result, grid_shape, nfields):
+    """
+    Return the accumulators from the result of a :py:func:`_map_gates_job`.
+    """
+    grid_sum, grid_wsum = result
+    if isinstance(grid_sum, np.ndarray):
+        return grid_sum, grid_wsum
+    shape = grid_shape + (nfields, )
+    return (_open_named_array(grid_sum, shape, 'float32'),
+            _open_named_array(grid_wsum, shape, 'float32'))
+
+
+def _map_radar_gates(gatemapper, grid_shape, nthreads, radar_args, *args):
+    """
+    Map the gates from a single radar using one or more threads.
+
+    Each thread maps all of the gates onto a band of y indices of the grid,
+    the bands do not overlap so the threads never update the same grid
+    point and no locking or reduction of the accumulators is required.
+    """
+    elevations, azimuths, ranges, field_arrays, excluded_gates = radar_args
+    field_buffers = FieldBuffers(*field_arrays)
+    args = (elevations, azimuths, ranges, field_buffers,
+            excluded_gates) + args
+
+    ny = grid_shape[1]
+    nthreads = min(nthreads, ny)
+    if nthreads == 1:
+        gatemapper.map_gates_to_grid(*args)
+        return
+
+    if not _FUTURES_AVAILABLE:
+        raise MissingOptionalDependency(
+            "concurrent.futures is required to use multiple threads but is " +
+            "not available")
+    bounds = np.linspace(0, ny, nthreads + 1).astype('int')
+    with futures.ThreadPoolExecutor(max_workers=nthreads) as executor:
+        jobs = [
+            executor.submit(gatemapper.map_gates_to_grid,
+                            *(args + (int(y_min_index), int(y_end_index) - 1)))
+            for y_min_index, y_end_index in zip(bounds[:-1], bounds[1:])]
+        # retrieve the results to re-raise any exceptions from the threads
+        for job in jobs:
+            job.result()
+    return
+
+
+def _find_radar_mapping_args(radar, fields, gatefilter, **kwargs):
+    """
+    Return the arrays from a radar needed to map its gates onto a grid.
 
-        # Copy the field data and masks.
-        # TODO method that does not copy field data into new array
-        shape = (radar.nrays, radar.ngates, nfields)
-        field_data = np.empty(shape, dtype='float32')
-        field_mask = np.empty(shape, dtype='uint8')
-        for i, field in enumerate(fields):
-            fdata = radar.fields[field]['data']
-            field_data[:, :, i] = np.ma.getdata(fdata)
-            field_mask[:, :, i] = np.ma.getmaskarray(fdata)
-
-        # find excluded gates from the gatefilter
-        if gatefilter is False:
-            gatefilter = GateFilter(radar)  # include all gates
-        elif gatefilter is None:
-            gatefilter = moment_based_gate_filter(radar, **kwargs)
-        excluded_gates = gatefilter.gate_excluded.astype('uint8')
-
-        # map the gates onto the grid
-        gatemapper.map_gates_to_grid(
-            radar.elevation['data'].astype('float32'),
+    The field data and masks are not copied.  Integer data is scaled using
+    the 'scale_factor' and 'add_offset' keys of the field dictionary when
+    present.
+    """
+    field_data = []
+    field_mask = []
+    scales = []
+    add_offsets = []
+    for field in fields:
+        fdic = radar.fields[field]
+        fdata = fdic['data']
+        data = np.ma.getdata(fdata)
+        mask = np.ma.getmask(fdata)
+        if mask is np.ma.nomask:
+            mask = None
+        if data.dtype.kind in 'iu':
+            scales.append(fdic.get('scale_factor', 1.0))
+            add_offsets.append(fdic.get('add_offset', 0.0))
+        else:
+            scales.append(1.0)
+            add_offsets.append(0.0)
+        field_data.append(data)
+        field_mask.append(mask)
+    field_arrays = (field_data, field_mask, scales, add_offsets)
+
+    # find excluded gates from the gatefilter
+    if gatefilter is False:
+        gatefilter = GateFilter(radar)  # include all gates
+    elif gatefilter is None:
+        gatefilter = moment_based_gate_filter(radar, **kwargs)
+    excluded_gates = gatefilter.gate_excluded.astype('uint8')
+
+    return (radar.elevation['data'].astype('float32'),
             radar.azimuth['data'].astype('float32'),
             radar.range['data'].astype('float32'),
-            field_data, field_mask, excluded_gates,
-            radar_offset, toa, roi_func, cy_weighting_function)
+            field_arrays, excluded_gates)
 
-    # create and return the grid dictionary
-    mweight = np.ma.masked_equal(grid_wsum, 0)
-    msum = np.ma.masked_array(grid_sum, mweight.mask)
-    grids = dict(
-        [(f, msum[..., i] / mweight[..., i]) for i, f in enumerate(fields)])
-    if map_roi:
-        roi_array = np.empty(grid_shape, dtype=np.float32)
-        gatemapper.find_roi_for_grid(roi_array, roi_func)
-        grids['ROI'] = roi_array
-    return grids
+
+def _create_array(shape, dtype, memmap_dir=None):
+    """
+    Return a zero filled array, memory-mapped to a temporary file in
+    memmap_dir when this is not None.
+    """
+    if memmap_dir is None or np.prod(shape) == 0:
+        return np.zeros(shape, dtype=dtype)
+    # the file is removed when closed but the memory map remains valid
+    with tempfile.TemporaryFile(dir=memmap_dir) as tmpfile:
+        array = np.memmap(tmpfile, dtype=dtype, mode='w+', shape=shape)
+    return array
+
+
+def _create_named_array(shape, dtype, memmap_dir):
+    """
+    Return a zero filled array memory-mapped to a named file in memmap_dir
+    and the filename.  The file must be removed by the caller, typically
+    using :py:func:`_open_named_array`.
+    """
+    with tempfile.NamedTemporaryFile(dir=memmap_dir, delete=False) as tmp:
+        array = np.memmap(tmp, dtype=dtype, mode='w+', shape=shape)
+    return array, tmp.name
+
+
+def _open_named_array(filename, shape, dtype):
+    """
+    Return an array memory-mapped to a file created by
+    :py:func:`_create_named_array`, removing the file.
+    """
+    array = np.memmap(filename, dtype=dtype, mode='r+', shape=shape)
+    # the memory map remains valid after the file is removed
+    os.remove(filename)
+    return array
 
 
 def _detemine_cy_weighting_func(weighting_function):
@@ -149,6 +567,8 @@ def _detemine_cy_weighting_func(weighting_function):
         cy_weighting_function = 1
     elif weighting_function.upper() == 'BARNES':
         cy_weighting_function = 0
+    elif weighting_function.upper() == 'NEAREST':
+        cy_weighting_function = 2
     else:
         raise ValueError('unknown weighting_function')
     return cy_weighting_function
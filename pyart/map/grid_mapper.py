@@ -12,6 +12,7 @@ Utilities for mapping radar objects to Cartesian grids.
     example_roi_func_constant
     example_roi_func_dist
     _unify_times_for_radars
+    _find_cache_keys
     _load_nn_field_data
     _gen_roi_func_constant
     _gen_roi_func_dist
@@ -25,6 +26,8 @@ Utilities for mapping radar objects to Cartesian grids.
 
 """
 
+import hashlib
+
 import numpy as np
 import scipy.spatial
 import netCDF4
@@ -33,13 +36,13 @@ from ..config import get_fillvalue, get_metadata
 from ..core.transforms import corner_to_point
 from ..core.transforms import antenna_to_cartesian
 from ..core.grid import Grid
-from ..core.radar import Radar
+from ..core.radar import Radar, _unpack_field_data
 from ..filters import GateFilter, moment_based_gate_filter
 from ..io.common import make_time_unit_str
 from ._load_nn_field_data import _load_nn_field_data
 from .ckdtree import cKDTree
 from .ball_tree import BallTree
-from .gates_to_grid import map_gates_to_grid
+from .gates_to_grid import map_gates_to_grid, _create_array
 
 
 def grid_from_radars(radars, grid_shape, grid_limits,
@@ -104,11 +107,16 @@ def grid_from_radars(radars, grid_shape, grid_limits,
                 '_FillValue': get_fillvalue()}
         else:
             fields[field] = {'data': grids[field]}
-            # copy the metadata from the radar to the grid
-            for key in first_radar.fields[field].keys():
-                if key == 'data':
+            # copy the metadata from the radar to the grid, the packing
+            # attributes of radar fields stored as packed integers do not
+            # apply to the grid.
+            radar_field = first_radar.fields[field]
+            for key in radar_field.keys():
+                if key in ['data', 'scale_factor', 'add_offset']:
                     continue
-                fields[field][key] = first_radar.fields[field][key]
+                fields[field][key] = radar_field[key]
+            if 'scale_factor' in radar_field or 'add_offset' in radar_field:
+                fields[field]['_FillValue'] = get_fillvalue()
 
     # time dictionaries
     time = get_metadata('grid_time')
@@ -251,6 +259,49 @@ class NNLocator:
             ind, dist = self.tree.query_radius(q, r, return_distance=True)
             return ind[0], dist[0]
 
+    def find_neighbors_and_dists_batch(self, q, r, nthreads=1):
+        """
+        Find all neighbors and distances for a number of points.
+
+        Parameters
+        ----------
+        q : array_like, (n_points, n_dimensions)
+            Points to query.
+        r : float or array_like, (n_points, )
+            Distance within which neighbors are returned for each point.
+        nthreads : int
+            Number of threads used to query the 'kd_tree' locator.  The
+            'ball_tree' locator is always queried in a single thread.
+
+        Returns
+        -------
+        indptr : array of integers, (n_points + 1, )
+            Offsets of the neighbors of each point in `ind` and `dist`, the
+            neighbors of point i are ``ind[indptr[i]:indptr[i + 1]]``.
+        ind : array of integers
+            Indices of the neighbors of all points.
+        dist : array of floats
+            Distances to the neighbors of all points.
+
+        """
+        if self._algorithm == 'kd_tree':
+            return self.tree.query_ball_point_batch(q, r, nthreads=nthreads)
+
+        elif self._algorithm == 'ball_tree':
+            q = np.asarray(q, dtype=np.float64)
+            radii = np.empty((len(q), ), dtype=np.float64)
+            radii[:] = r
+            ind, dist = self.tree.query_radius(
+                q, radii, return_distance=True)
+            indptr = np.zeros((len(q) + 1, ), dtype=np.intp)
+            np.cumsum([len(i) for i in ind], out=indptr[1:])
+            if len(q) == 0:
+                return (indptr, np.empty((0, ), dtype=np.intp),
+                        np.empty((0, ), dtype=np.float64))
+            ind = np.concatenate(ind).astype(np.intp)
+            dist = np.concatenate(dist).astype(np.float64)
+            return indptr, ind, dist
+
 
 def map_to_grid(radars, grid_shape, grid_limits, grid_origin=None,
                 grid_origin_alt=None, fields=None, gatefilters=False,
@@ -258,7 +309,8 @@ def map_to_grid(radars, grid_shape, grid_limits, grid_origin=None,
                 copy_field_data=True, algorithm='kd_tree', leafsize=10.,
                 roi_func='dist_beam', constant_roi=500.,
                 z_factor=0.05, xy_factor=0.02, min_radius=500.0,
-                h_factor=1.0, nb=1.5, bsp=1.0, **kwargs):
+                h_factor=1.0, nb=1.5, bsp=1.0, memmap_dir=None, cache=None,
+                nthreads=1, **kwargs):
     """
     Map one or more radars to a Cartesian grid.
 
@@ -321,9 +373,10 @@ def map_to_grid(radars, grid_shape, grid_limits, grid_origin=None,
         True to include a radius of influence field in the returned
         dictionary under the 'ROI' key.  This is the value of roi_func at all
         grid points.
-    weighting_function : 'Barnes' or 'Cressman'
+    weighting_function : 'Barnes', 'Cressman' or 'Nearest'
         Functions used to weight nearby collected points when interpolating a
-        grid point.
+        grid point.  'Nearest' uses the value of the closest collected point
+        within the radius of influence.
     toa : float
         Top of atmosphere in meters. Collected points above this height are
         not included in the interpolation.
@@ -367,6 +420,26 @@ def map_to_grid(radars, grid_shape, grid_limits, grid_origin=None,
         to store the tree. The optimal value depends on the nature of the
         problem. This value should only effect the speed of the gridding,
         not the results.
+    memmap_dir : str or None
+        Directory in which to create temporary memory-mapped files backing the
+        interpolated grid data.  This allows grids larger than the available
+        memory to be created.  None, the default, keeps the grid data in
+        memory.
+    cache : dict or None
+        Dictionary in which the nearest neighbor locator and the neighbors
+        and distances of the grid points are stored, one entry per z level.
+        Entries are keyed on a hash of the filtered gate locations, the grid
+        parameters, the radius of influence function and the z level.
+        Passing the same dictionary to subsequent calls which map radars
+        with identical gate geometry and filtering, for example volumes from
+        a repeated scan strategy, will skip building the locator and
+        querying the neighbors.  None, the default, disables caching.
+        Entries can be large, the dictionary should be cleared when the scan
+        strategy changes.
+    nthreads : int
+        Number of threads used to query the neighbors of the grid points.
+        The queries are performed with the GIL released.  This parameter
+        only has an effect when `algorithm` is 'kd_tree'.
 
     Returns
     -------
@@ -395,7 +468,7 @@ def map_to_grid(radars, grid_shape, grid_limits, grid_origin=None,
         raise ValueError('Length of gatefilters must match length of radars')
 
     # check the parameters
-    if weighting_function.upper() not in ['CRESSMAN', 'BARNES']:
+    if weighting_function.upper() not in ['CRESSMAN', 'BARNES', 'NEAREST']:
         raise ValueError('unknown weighting_function')
     if algorithm not in ['kd_tree', 'ball_tree']:
         raise ValueError('unknow algorithm: %s' % algorithm)
@@ -490,7 +563,9 @@ def map_to_grid(radars, grid_shape, grid_limits, grid_origin=None,
 
         # copy/store references to field data for lookup
         for ifield, field in enumerate(fields):
-            flat_field_data = radar.fields[field]['data'].ravel()
+            fdic = radar.fields[field]
+            # unpack fields stored as packed integers
+            flat_field_data = _unpack_field_data(fdic, fdic['data'].ravel())
             if copy_field_data:
                 field_data[start:end, ifield] = flat_field_data
             else:
@@ -523,10 +598,6 @@ def map_to_grid(radars, grid_shape, grid_limits, grid_origin=None,
             gates_before = gate_offset[i]
             lookup[l_start:l_end] += (total_gates * i - gates_before)
 
-    # populate the nearest neighbor locator with the filtered gate locations
-    nnlocator = NNLocator(gate_locations[include_gate], algorithm=algorithm,
-                          leafsize=leafsize)
-
     # unpack the grid parameters
     nz, ny, nx = grid_shape
     zr, yr, xr = grid_limits
@@ -547,6 +618,16 @@ def map_to_grid(radars, grid_shape, grid_limits, grid_origin=None,
     else:
         x_step = (x_stop - x_start) / (nx - 1.)
 
+    # the neighbors of the grid points are cached one z level at a time
+    if cache is not None:
+        locator_key, neighbors_key = _find_cache_keys(
+            gate_locations, include_gate, algorithm, leafsize, grid_shape,
+            grid_limits, roi_func, (constant_roi, z_factor, xy_factor,
+                                    min_radius, h_factor, nb, bsp))
+    filtered_gate_locations = gate_locations[include_gate]
+    del gate_locations
+    nnlocator = None
+
     if not hasattr(roi_func, '__call__'):
         if roi_func == 'constant':
             roi_func = _gen_roi_func_constant(constant_roi)
@@ -560,31 +641,57 @@ def map_to_grid(radars, grid_shape, grid_limits, grid_origin=None,
             raise ValueError('unknown roi_func: %s' % roi_func)
 
     # create array to hold interpolated grid data and roi if requested
-    grid_data = np.ma.empty((nz, ny, nx, nfields), dtype=np.float64)
+    grid_data = np.ma.masked_array(
+        _create_array((nz, ny, nx, nfields), 'float64', memmap_dir),
+        _create_array((nz, ny, nx, nfields), 'bool', memmap_dir))
     grid_data.set_fill_value(badval)
 
     if map_roi:
-        roi = np.empty((nz, ny, nx), dtype=np.float64)
-
-    # interpolate field values for each point in the grid
-    for iz, iy, ix in np.ndindex(nz, ny, nx):
+        roi = _create_array((nz, ny, nx), 'float64', memmap_dir)
+
+    # interpolate field values one z level at a time, the neighbors of all
+    # grid points in a level are found in one query and the weighted sums
+    # of the neighbors are reduced over the neighbors of each grid point.
+    npoints = ny * nx
+    yg, xg = np.meshgrid(
+        y_start + y_step * np.arange(ny),
+        x_start + x_step * np.arange(nx), indexing='ij')
+    yg = yg.ravel()
+    xg = xg.ravel()
+    for iz in range(nz):
+        neighbors = None
+        if cache is not None and neighbors_key + (iz, ) in cache:
+            neighbors, roi_values = cache[neighbors_key + (iz, )]
+        if neighbors is None:
+            if nnlocator is None:
+                if cache is not None and locator_key in cache:
+                    nnlocator = cache[locator_key]
+                else:
+                    nnlocator = NNLocator(
+                        filtered_gate_locations, algorithm=algorithm,
+                        leafsize=leafsize)
+                    if cache is not None:
+                        cache[locator_key] = nnlocator
+            # calculate the location and radius of influence of the grid
+            # points in the level and find their neighbors and distances.
+            grid_points = np.column_stack(
+                (np.full(npoints, z_start + z_step * iz), yg, xg))
+            roi_values = np.array(
+                [roi_func(z, y, x) for z, y, x in grid_points],
+                dtype=np.float64)
+            neighbors = nnlocator.find_neighbors_and_dists_batch(
+                grid_points, roi_values, nthreads=nthreads)
+            del grid_points
+            if cache is not None:
+                cache[neighbors_key + (iz, )] = (neighbors, roi_values)
+        indptr, ind, dist = neighbors
 
-        # calculate the grid point
-        x = x_start + x_step * ix
-        y = y_start + y_step * iy
-        z = z_start + z_step * iz
-        r = roi_func(z, y, x)
         if map_roi:
-            roi[iz, iy, ix] = r
-
-        # find neighbors and distances
-        ind, dist = nnlocator.find_neighbors_and_dists((z, y, x), r)
+            roi[iz] = roi_values.reshape(ny, nx)
 
-        if len(ind) == 0:
-            # when there are no neighbors, mark the grid point as bad
-            grid_data[iz, iy, ix] = np.ma.masked
-            grid_data.data[iz, iy, ix] = badval
-            continue
+        nneighbors = np.diff(indptr)
+        point_index = np.repeat(np.arange(npoints), nneighbors)
+        r = np.repeat(roi_values, nneighbors)
 
         # find the field values for all neighbors
         if copy_field_data:
@@ -596,12 +703,36 @@ def map_to_grid(radars, grid_shape, grid_limits, grid_origin=None,
             # use the _load_nn_field_data function to load this data from
             # the field data object array.  This is done in Cython for speed.
             r_nums, e_nums = divmod(lookup[ind], total_gates)
-            npoints = r_nums.size
+            nn_points = r_nums.size
             r_nums = r_nums.astype(np.intc)
             e_nums = e_nums.astype(np.intc)
-            nn_field_data = np.empty((npoints, nfields), np.float64)
-            _load_nn_field_data(field_data_objs, nfields, npoints, r_nums,
+            nn_field_data = np.empty((nn_points, nfields), np.float64)
+            _load_nn_field_data(field_data_objs, nfields, nn_points, r_nums,
                                 e_nums, nn_field_data)
+        nn_mask = np.ma.getmaskarray(nn_field_data)
+        nn_field_data = np.ma.getdata(nn_field_data)
+
+        level_data = grid_data.data[iz].reshape(npoints, nfields)
+        level_mask = grid_data.mask[iz].reshape(npoints, nfields)
+
+        if weighting_function.upper() == 'NEAREST':
+            # the closest unmasked neighbor of each grid point is found by
+            # sorting the neighbors of each grid point by distance.
+            has_neighbors = nneighbors > 0
+            first = indptr[:-1][has_neighbors]
+            for ifield in range(nfields):
+                field_dist = np.where(nn_mask[:, ifield], np.inf, dist)
+                order = np.lexsort((field_dist, point_index))
+                closest = order[first]
+                masked = np.ones((npoints, ), dtype=bool)
+                masked[has_neighbors] = ~np.isfinite(field_dist[closest])
+                level_data[:, ifield] = badval
+                level_data[has_neighbors, ifield] = np.where(
+                    masked[has_neighbors], badval,
+                    nn_field_data[closest, ifield])
+                level_mask[:, ifield] = np.logical_or(
+                    masked, ~np.isfinite(level_data[:, ifield]))
+            continue
 
         # preforms weighting of neighbors.
         dist2 = dist * dist
@@ -611,9 +742,23 @@ def map_to_grid(radars, grid_shape, grid_limits, grid_origin=None,
             weights = (r2 - dist2) / (r2 + dist2)
         elif weighting_function.upper() == 'BARNES':
             weights = np.exp(-dist2 / (2.0 * r2)) + 1e-5
-        value = np.ma.average(nn_field_data, weights=weights, axis=0)
 
-        grid_data[iz, iy, ix] = value
+        # masked neighbors do not contribute to the weighted average, grid
+        # points without any contributing neighbors or with non-finite
+        # neighbors are masked.
+        for ifield in range(nfields):
+            field_weights = np.where(nn_mask[:, ifield], 0., weights)
+            field_values = np.where(
+                nn_mask[:, ifield], 0., nn_field_data[:, ifield])
+            wsum = np.bincount(
+                point_index, weights=field_weights, minlength=npoints)
+            vsum = np.bincount(
+                point_index, weights=field_weights * field_values,
+                minlength=npoints)
+            masked = np.logical_or(wsum == 0, ~np.isfinite(vsum))
+            level_data[:, ifield] = badval
+            np.divide(vsum, wsum, out=level_data[:, ifield], where=~masked)
+            level_mask[:, ifield] = masked
 
     # create and return the grid dictionary
     grids = dict([(f, grid_data[..., i]) for i, f in enumerate(fields)])
@@ -622,6 +767,23 @@ def map_to_grid(radars, grid_shape, grid_limits, grid_origin=None,
     return grids
 
 
+def _find_cache_keys(gate_locations, include_gate, algorithm, leafsize,
+                     grid_shape, grid_limits, roi_func, roi_params):
+    """
+    Return the keys used to cache the locator and the grid point neighbors.
+    """
+    sha1 = hashlib.sha1()
+    sha1.update(np.ascontiguousarray(gate_locations[include_gate]).data)
+    sha1.update(np.ascontiguousarray(include_gate).data)
+    gates_digest = sha1.hexdigest()
+    locator_key = ('nnlocator', gates_digest, algorithm, leafsize)
+    grid_params = (tuple(grid_shape),
+                   tuple(tuple(limit) for limit in grid_limits))
+    neighbors_key = ('neighbors', gates_digest, grid_params, roi_func,
+                     tuple(roi_params))
+    return locator_key, neighbors_key
+
+
 # Radius of Influence (RoI) functions
 
 
@@ -0,0 +1,428 @@
+"""
+pyart.map.mapping_plan
+======================
+
+Reusable gate to grid mappings for radars with a fixed scan strategy.
+
+.. autosummary::
+    :toctree: generated/
+
+    create_grid_mapping_plan
+    load_grid_mapping_plan
+    _find_ray_sweeps
+    _find_swept_angles
+    _match_angles
+
+.. autosummary::
+    :toctree: generated/
+    :template: dev_template.rst
+
+    GridMappingPlan
+
+"""
+
+import warnings
+
+import numpy as np
+import scipy.sparse
+
+from ..core.radar import _unpack_field_data
+from ..filters import GateFilter, moment_based_gate_filter
+from ._gate_to_grid_map import GateToGridMapper
+from .gates_to_grid import _detemine_cy_weighting_func, _parse_grid_origin
+from .gates_to_grid import _determine_fields, _find_offsets
+from .gates_to_grid import _find_grid_params, _parse_roi_func
+
+
+class GridMappingPlan(object):
+    """
+    Precomputed weights for mapping the gates of a radar onto a grid.
+
+    The weight of each radar gate at each grid point, as calculated by
+    :py:func:`map_gates_to_grid`, is stored in a sparse matrix which can be
+    applied to the fields of any radar with the same scan geometry.  Plans
+    should be created using :py:func:`create_grid_mapping_plan` or loaded
+    from disk using :py:func:`load_grid_mapping_plan`.
+
+    Each ray in the plan is matched to the ray in the same sweep of a radar
+    with the nearest swept angle, the azimuth angle in PPI sweeps and the
+    elevation angle in RHI sweeps.  Rays may be collected in a different
+    order than those used to create the plan.  Rays in the plan with no
+    radar ray within the azimuth tolerance are excluded from the mapping and
+    a warning is issued.
+
+    Attributes
+    ----------
+    weights : scipy.sparse.csr_matrix
+        Weight of each gate at each grid point.  Rows correspond to the
+        grid points in z, y, x order, columns to the gates in the plan in
+        ray, gate order.
+    grid_shape : tuple of ints
+        Shape of the grid along the z, y, and x dimensions.
+    ray_sweeps : array of int
+        Sweep number of each ray.
+    ray_angles : array
+        Swept angle of each ray in degrees, the elevation angle for rays in
+        RHI sweeps and the azimuth angle for rays in all other sweeps.
+    ranges : array
+        Gate ranges in meters.
+    fixed_angles : array
+        Fixed angle of each sweep in degrees.
+    azimuth_tolerance : float
+        Tolerance in degrees used when matching swept angles.
+    elevation_tolerance : float
+        Tolerance in degrees used when matching sweep fixed angles.
+    roi : array or None
+        Radius of influence at each grid point, None if not available.
+
+    """
+
+    def __init__(self, weights, grid_shape, ray_sweeps, ray_angles,
+                 ranges, fixed_angles, azimuth_tolerance,
+                 elevation_tolerance, roi=None):
+        """ initialize. """
+        self.weights = weights.tocsr()
+        self.grid_shape = tuple(int(i) for i in grid_shape)
+        self.ray_sweeps = np.asarray(ray_sweeps, dtype=np.intp)
+        self.ray_angles = np.asarray(ray_angles, dtype=np.float64)
+        self.ranges = np.asarray(ranges)
+        self.fixed_angles = np.asarray(fixed_angles)
+        self.azimuth_tolerance = float(azimuth_tolerance)
+        self.elevation_tolerance = float(elevation_tolerance)
+        self.roi = roi
+
+    @property
+    def nrays(self):
+        """ Number of rays in the plan. """
+        return len(self.ray_sweeps)
+
+    @property
+    def ngates(self):
+        """ Number of gates per ray in the plan. """
+        return len(self.ranges)
+
+    def find_ray_index(self, radar):
+        """
+        Find the ray in a radar corresponding to each ray in the plan.
+
+        Parameters
+        ----------
+        radar : Radar
+            Radar with a scan geometry matching that used to create the plan.
+
+        Returns
+        -------
+        ray_index : array of intp
+            Index of the ray in the radar matching each ray in the plan,
+            -1 when a plan ray has no ray in the same sweep of the radar
+            with a swept angle within the azimuth tolerance.
+
+        """
+        if radar.ngates != self.ngates or not np.allclose(
+                radar.range['data'], self.ranges):
+            raise ValueError('radar gate ranges do not match the plan')
+        if radar.nsweeps != len(self.fixed_angles) or np.any(
+                np.abs(radar.fixed_angle['data'] - self.fixed_angles) >
+                self.elevation_tolerance):
+            raise ValueError('radar sweeps do not match the plan')
+
+        ray_index = np.full((self.nrays, ), -1, dtype=np.intp)
+        radar_angles = _find_swept_angles(radar)
+        for i, (start, end) in enumerate(radar.iter_start_end()):
+            in_sweep = self.ray_sweeps == i
+            match = _match_angles(
+                self.ray_angles[in_sweep], radar_angles[start:end + 1],
+                self.azimuth_tolerance)
+            ray_index[in_sweep] = np.where(match >= 0, match + start, -1)
+
+        nunmatched = np.count_nonzero(ray_index < 0)
+        if nunmatched:
+            warnings.warn(
+                '%d of %d rays in the plan have no matching ray in the '
+                'radar, these rays are excluded from the mapping' %
+                (nunmatched, self.nrays))
+        return ray_index
+
+    def map_fields(self, radar, fields=None, gatefilter=False, map_roi=True,
+                   **kwargs):
+        """
+        Map the fields of a radar onto the grid.
+
+        Gates which are masked in a field or excluded by the gatefilter are
+        not included in the mapping, the weights of the remaining gates are
+        renormalized for each field.
+
+        Parameters
+        ----------
+        radar : Radar
+            Radar with a scan geometry matching that used to create the plan.
+        fields : list or None
+            List of fields to map, None will map all fields in the radar.
+        gatefilter : GateFilter, None or False
+            GateFilter specifying the gates to include in the mapping.  False
+            includes all gates, None creates a GateFilter from the radar
+            moments using any additional arguments by passing them to
+            :py:func:`moment_based_gate_filter`.
+        map_roi : bool
+            True to include the radius of influence field in the returned
+            dictionary under the 'ROI' key, when available.
+
+        Returns
+        -------
+        grids : dict
+            Dictionary of mapped fields.  Each element is a masked float32
+            array with shape `grid_shape` containing the mapped field.
+
+        """
+        fields = _determine_fields(fields, (radar, ))
+        ray_index = self.find_ray_index(radar)
+        matched = ray_index >= 0
+        radar_rays = ray_index[matched]
+
+        if gatefilter is False:
+            gatefilter = GateFilter(radar)  # include all gates
+        elif gatefilter is None:
+            gatefilter = moment_based_gate_filter(radar, **kwargs)
+        gate_included = gatefilter.gate_included[radar_rays]
+
+        # gather the field values and inclusion flags in plan gate order
+        nfields = len(fields)
+        shape = (self.nrays, self.ngates, nfields)
+        values = np.zeros(shape, dtype=np.float64)
+        included = np.zeros(shape, dtype=np.float64)
+        for i, field in enumerate(fields):
+            fdic = radar.fields[field]
+            # unpack fields stored as packed integers
+            fdata = _unpack_field_data(fdic, fdic['data'][radar_rays])
+            finclude = np.logical_and(
+                gate_included, ~np.ma.getmaskarray(fdata))
+            values[matched, :, i] = np.where(
+                finclude, np.ma.getdata(fdata), 0)
+            included[matched, :, i] = finclude
+        values = values.reshape(-1, nfields)
+        included = included.reshape(-1, nfields)
+
+        # weighted sum and sum of weights for each field at each grid point
+        grid_sum = self.weights.dot(values).astype(np.float32)
+        grid_wsum = self.weights.dot(included).astype(np.float32)
+        grid_sum = grid_sum.reshape(self.grid_shape + (nfields, ))
+        grid_wsum = grid_wsum.reshape(self.grid_shape + (nfields, ))
+
+        mweight = np.ma.masked_equal(grid_wsum, 0)
+        msum = np.ma.masked_array(grid_sum, mweight.mask)
+        grids = dict(
+            [(f, msum[..., i] / mweight[..., i]) for i, f in
+             enumerate(fields)])
+        if map_roi and self.roi is not None:
+            grids['ROI'] = self.roi
+        return grids
+
+    def save(self, filename):
+        """
+        Save the plan to a NumPy .npz file.
+
+        Parameters
+        ----------
+        filename : str
+            Filename to save the plan to, a .npz extension is appended to
+            the filename if it is not already present.
+
+        """
+        weights = self.weights
+        arrays = {
+            'weights_data': weights.data,
+            'weights_indices': weights.indices,
+            'weights_indptr': weights.indptr,
+            'weights_shape': np.array(weights.shape),
+            'grid_shape': np.array(self.grid_shape),
+            'ray_sweeps': self.ray_sweeps,
+            'ray_angles': self.ray_angles,
+            'ranges': self.ranges,
+            'fixed_angles': self.fixed_angles,
+            'tolerances': np.array(
+                [self.azimuth_tolerance, self.elevation_tolerance])}
+        if self.roi is not None:
+            arrays['roi'] = self.roi
+        np.savez(filename, **arrays)
+
+
+def create_grid_mapping_plan(
+        radar, grid_shape, grid_limits, grid_origin=None,
+        grid_origin_alt=None, map_roi=True, weighting_function='Barnes',
+        toa=17000.0, roi_func='dist_beam', constant_roi=500., z_factor=0.05,
+        xy_factor=0.02, min_radius=500.0, h_factor=1.0, nb=1.5, bsp=1.0,
+        azimuth_tolerance=0.1, elevation_tolerance=0.5):
+    """
+    Create a GridMappingPlan from the scan geometry of a radar.
+
+    Parameters not defined below are identical to those in
+    :py:func:`map_gates_to_grid`.
+
+    Parameters
+    ----------
+    radar : Radar
+        Radar whose range, azimuth and elevation geometry will be used to
+        create the plan.  The fields of the radar are not used.
+    map_roi : bool
+        True to store the radius of influence at each grid point in the plan.
+    azimuth_tolerance : float
+        Maximum difference in degrees between the swept angles of matching
+        rays, the azimuth angle in PPI sweeps and the elevation angle in RHI
+        sweeps, as determined from the sweep_mode of each sweep.  This must
+        be smaller than half the angular spacing of the rays in each sweep.
+    elevation_tolerance : float
+        Maximum difference in degrees between the fixed angles of the
+        sweeps in the plan and a radar for the plan to be applied.
+
+    Returns
+    -------
+    plan : GridMappingPlan
+        Plan for mapping radars with the same scan geometry onto the grid.
+
+    """
+    radars = (radar, )
+    if grid_origin_alt is None:
+        grid_origin_alt = float(radar.altitude['data'])
+
+    cy_weighting_function = _detemine_cy_weighting_func(weighting_function)
+    grid_origin = _parse_grid_origin(grid_origin, radars)
+    offsets = _find_offsets(radars, grid_origin, grid_origin_alt)
+    grid_starts, grid_steps = _find_grid_params(grid_shape, grid_limits)
+    roi_func = _parse_roi_func(roi_func, constant_roi, z_factor, xy_factor,
+                               min_radius, h_factor, nb, bsp, offsets)
+
+    ray_sweeps = _find_ray_sweeps(radar)
+    ray_angles = _find_swept_angles(radar)
+    for start, end in radar.iter_start_end():
+        angles = ray_angles[start:end + 1]
+        match = _match_angles(angles, angles, 2. * azimuth_tolerance,
+                              exclude_self=True)
+        if np.any(match >= 0):
+            raise ValueError(
+                'azimuth_tolerance too large, multiple rays in a sweep match '
+                'the same swept angle')
+
+    # the accumulators are not used when finding weights
+    empty = np.zeros(grid_shape + (0, ), dtype=np.float32)
+    gatemapper = GateToGridMapper(
+        grid_shape, grid_starts, grid_steps, empty, empty)
+    excluded_gates = np.zeros((radar.nrays, radar.ngates), dtype=np.uint8)
+    grid_index, gate_index, weights = gatemapper.find_gate_weights(
+        radar.elevation['data'].astype('float32'),
+        radar.azimuth['data'].astype('float32'),
+        radar.range['data'].astype('float32'),
+        excluded_gates, offsets[0], toa, roi_func, cy_weighting_function)
+    ngrid = int(np.prod(grid_shape))
+    weights = scipy.sparse.coo_matrix(
+        (weights, (grid_index, gate_index)),
+        shape=(ngrid, radar.nrays * radar.ngates)).tocsr()
+
+    roi = None
+    if map_roi:
+        roi = np.empty(grid_shape, dtype=np.float32)
+        gatemapper.find_roi_for_grid(roi, roi_func)
+
+    return GridMappingPlan(
+        weights, grid_shape, ray_sweeps, ray_angles,
+        radar.range['data'].copy(),
+        radar.fixed_angle['data'].copy(), azimuth_tolerance,
+        elevation_tolerance, roi)
+
+
+def load_grid_mapping_plan(filename):
+    """
+    Load a GridMappingPlan saved using the :py:func:`GridMappingPlan.save`.
+
+    Parameters
+    ----------
+    filename : str
+        Filename of the saved plan.
+
+    Returns
+    -------
+    plan : GridMappingPlan
+        Plan loaded from disk.
+
+    """
+    with np.load(filename) as npz:
+        weights = scipy.sparse.csr_matrix(
+            (npz['weights_data'], npz['weights_indices'],
+             npz['weights_indptr']), shape=tuple(npz['weights_shape']))
+        azimuth_tolerance, elevation_tolerance = npz['tolerances']
+        roi = None
+        if 'roi' in npz.files:
+            roi = npz['roi']
+        plan = GridMappingPlan(
+            weights, tuple(npz['grid_shape']), npz['ray_sweeps'],
+            npz['ray_angles'], npz['ranges'], npz['fixed_angles'],
+            azimuth_tolerance, elevation_tolerance, roi)
+    return plan
+
+
+def _find_ray_sweeps(radar):
+    """
+    Return the sweep number of each ray in a radar.
+    """
+    ray_sweeps = np.empty((radar.nrays, ), dtype=np.intp)
+    for i, (start, end) in enumerate(radar.iter_start_end()):
+        ray_sweeps[start:end + 1] = i
+    return ray_sweeps
+
+
+def _find_swept_angles(radar):
+    """
+    Return the swept angle of each ray in a radar.
+
+    The swept angle is the elevation angle for rays in sweeps with a
+    sweep_mode of 'rhi' or 'manual_rhi' and the azimuth angle for rays in
+    all other sweeps.
+    """
+    angles = np.array(radar.azimuth['data'], dtype=np.float64)
+    for i, (start, end) in enumerate(radar.iter_start_end()):
+        mode = np.asarray(radar.sweep_mode['data'][i])
+        if mode.dtype.kind == 'S':
+            # modes stored as character arrays or bytes
+            mode = b''.join(mode.ravel().tolist()).decode('ascii', 'ignore')
+        if str(mode).strip().lower().endswith('rhi'):
+            angles[start:end + 1] = radar.elevation['data'][start:end + 1]
+    return angles
+
+
+def _match_angles(angles, candidates, tolerance, exclude_self=False):
+    """
+    Return the index of the candidate angle nearest to each angle.
+
+    Angles without a candidate within the tolerance are assigned an index
+    of -1.  When exclude_self is True, angles and candidates must be the
+    same array and each angle is not matched to itself.  Angles wrap at 360
+    degrees.
+    """
+    angles = np.asarray(angles, dtype=np.float64) % 360.
+    candidates = np.asarray(candidates, dtype=np.float64) % 360.
+    match = np.full((len(angles), ), -1, dtype=np.intp)
+    if len(angles) == 0 or len(candidates) < 1 + exclude_self:
+        return match
+
+    # the nearest candidates are the neighbors in sorted order on either
+    # side of each angle, wrapping around at 360 degrees.
+    sorter = np.argsort(candidates, kind='mergesort')
+    sorted_candidates = candidates[sorter]
+    ncand = len(sorted_candidates)
+    if exclude_self:
+        # each angle is a candidate, its neighbors are on either side
+        pos = np.empty((ncand, ), dtype=np.intp)
+        pos[sorter] = np.arange(ncand)
+        neighbors = ((pos - 1) % ncand, (pos + 1) % ncand)
+    else:
+        pos = np.searchsorted(sorted_candidates, angles)
+        neighbors = ((pos - 1) % ncand, pos % ncand)
+
+    best_diff = np.full((len(angles), ), np.inf)
+    for neighbor in neighbors:
+        diff = np.abs(sorted_candidates[neighbor] - angles)
+        diff = np.minimum(diff, 360. - diff)
+        closer = diff < best_diff
+        best_diff[closer] = diff[closer]
+        match[closer] = sorter[neighbor[closer]]
+    match[best_diff > tolerance] = -1
+    return match
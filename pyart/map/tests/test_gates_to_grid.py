@@ -2,6 +2,9 @@
 
 from __future__ import print_function
 
+import os
+import pickle
+
 import numpy as np
 from numpy.testing import assert_almost_equal, assert_raises
 
@@ -115,6 +118,298 @@ def test_map_to_grid_masked_refl_field():
     assert_almost_equal(np.round(center_slice), EXPECTED_CENTER_SLICE)
 
 
+def test_map_to_grid_nthreads():
+    radar = pyart.testing.make_target_radar()
+    grids = pyart.map.map_gates_to_grid((radar,),
+                                        **COMMON_MAP_TO_GRID_ARGS)
+    grids_threaded = pyart.map.map_gates_to_grid(
+        (radar,), nthreads=4, **COMMON_MAP_TO_GRID_ARGS)
+    assert np.all(grids_threaded['reflectivity'] == grids['reflectivity'])
+    assert np.all(grids_threaded['reflectivity'].mask ==
+                  grids['reflectivity'].mask)
+
+
+class _NoBoundRoI(pyart.map._gate_to_grid_map.ConstantRoI):
+    """ RoI function which does not provide a bound, disabling culling. """
+
+    def max_roi(self, z_limits, y_limits, x_limits):
+        return -1.
+
+
+def test_map_to_grid_ray_culling():
+    # a grid which only covers part of the radar coverage
+    radar = pyart.testing.make_target_radar()
+    kwargs = dict(COMMON_MAP_TO_GRID_ARGS)
+    kwargs['grid_limits'] = ((0, 400), (300, 900), (-300, 300))
+    grids = pyart.map.map_gates_to_grid(radar, **kwargs)
+    assert grids['reflectivity'].count() > 0
+    kwargs['roi_func'] = _NoBoundRoI(30.)
+    grids_no_cull = pyart.map.map_gates_to_grid(radar, **kwargs)
+    assert np.all(grids['reflectivity'] == grids_no_cull['reflectivity'])
+    assert np.all(grids['reflectivity'].mask ==
+                  grids_no_cull['reflectivity'].mask)
+
+
+class _OverrideRoI(pyart.map._gate_to_grid_map.ConstantRoI):
+    """ RoI function which overrides get_roi in Python. """
+
+    def get_roi(self, z, y, x):
+        return 30.
+
+    def max_roi(self, z_limits, y_limits, x_limits):
+        return 30.
+
+
+def test_map_to_grid_python_roi_override():
+    # get_roi overrides in Python subclasses are used when mapping
+    radar = pyart.testing.make_target_radar()
+    grids = pyart.map.map_gates_to_grid(radar, **COMMON_MAP_TO_GRID_ARGS)
+    kwargs = dict(COMMON_MAP_TO_GRID_ARGS)
+    kwargs['roi_func'] = _OverrideRoI(500.)
+    for nthreads in [1, 2]:
+        grids_override = pyart.map.map_gates_to_grid(
+            radar, nthreads=nthreads, **kwargs)
+        assert np.all(grids_override['ROI'] == 30.)
+        assert np.all(grids_override['reflectivity'] ==
+                      grids['reflectivity'])
+        assert np.all(grids_override['reflectivity'].mask ==
+                      grids['reflectivity'].mask)
+
+
+def test_map_to_grid_workers_python_roi_override():
+    # Python subclasses are passed to the workers with their overrides
+    radar = pyart.testing.make_target_radar()
+    kwargs = dict(COMMON_MAP_TO_GRID_ARGS)
+    kwargs['roi_func'] = _OverrideRoI(500.)
+    grids = pyart.map.map_gates_to_grid((radar, radar), **kwargs)
+    grids_workers = pyart.map.map_gates_to_grid(
+        (radar, radar), workers=2, **kwargs)
+    assert np.all(grids_workers['ROI'] == 30.)
+    assert_almost_equal(
+        grids_workers['reflectivity'], grids['reflectivity'], 4)
+
+
+def test_roi_pickle():
+    roi_funcs = [
+        _OverrideRoI(500.),
+        pyart.map._gate_to_grid_map.DistRoI(0.05, 0.02, 500., [(0, 0, 0)]),
+        pyart.map._gate_to_grid_map.DistBeamRoI(
+            1.0, 1.5, 1.0, 500., [(0, 0, 0)]),
+        pyart.map._gate_to_grid_map.LookupRoI(
+            np.full((2, 2, 2), 700., dtype='float32'), (0, 0, 0),
+            (1, 1, 1)),
+    ]
+    roi_funcs[0].label = 'override'
+    for roi_func in roi_funcs:
+        roi_func2 = pickle.loads(pickle.dumps(roi_func))
+        assert type(roi_func2) is type(roi_func)
+        assert roi_func2.get_roi(0, 0, 0) == roi_func.get_roi(0, 0, 0)
+    assert pickle.loads(pickle.dumps(roi_funcs[0])).label == 'override'
+
+
+def test_roi_max_roi():
+    limits = ((0, 1000), (-2000, 3000), (-4000, 4000))
+    roi = pyart.map._gate_to_grid_map.ConstantRoI(500.)
+    assert_almost_equal(roi.max_roi(*limits), 500.)
+    roi = pyart.map._gate_to_grid_map.DistRoI(
+        0.05, 0.02, 500., [(0, 0, 0)])
+    assert_almost_equal(roi.max_roi(*limits), 50. + 100. + 500., 3)
+    roi = pyart.map._gate_to_grid_map.DistBeamRoI(
+        1.0, 1.5, 1.0, 500., [(0, 0, 0), (0, 3000, 4000)])
+    expected = 1000. / 20. + 5000. * np.tan(1.5 * np.pi / 180.) + 500.
+    assert_almost_equal(roi.max_roi(*limits), expected, 3)
+    assert roi.max_roi(*limits) >= roi.get_roi(1000., -2000., -4000.)
+
+
+def test_roi_get_roi_array():
+    roi = pyart.map._gate_to_grid_map.DistBeamRoI(
+        1.0, 1.5, 1.0, 500., [(0, 0, 0), (0, 3000, 4000)])
+    z = np.array([0., 100., 1000.])
+    y = np.array([-2000., 0., 3000.])
+    rois = roi.get_roi_array(z, y, 5000.)
+    assert rois.shape == (3, )
+    for i in range(3):
+        assert_almost_equal(rois[i], roi.get_roi(z[i], y[i], 5000.), 3)
+
+
+def test_lookup_roi():
+    roi_array = np.arange(24, dtype='float32').reshape(2, 3, 4)
+    roi = pyart.map._gate_to_grid_map.LookupRoI(
+        roi_array, (0., -100., -150.), (500., 100., 100.))
+    assert roi.get_roi(0., -100., -150.) == 0.
+    assert roi.get_roi(260., 100., 160.) == 23.
+    assert roi.get_roi(-1000., 5000., -5000.) == 8.   # clipped to edges
+    assert roi.max_roi((0, 1), (0, 1), (0, 1)) == 23.
+
+    # the lookup volume can be created from any RoIFunction
+    dist_roi = pyart.map._gate_to_grid_map.DistRoI(
+        0.05, 0.02, 500., [(0, 0, 0)])
+    roi = pyart.map._gate_to_grid_map.LookupRoI.from_roi_func(
+        dist_roi, (2, 3, 4), (0., -100., -150.), (500., 100., 100.))
+    assert_almost_equal(roi.get_roi(500., 0., 50.),
+                        dist_roi.get_roi(500., 0., 50.), 3)
+
+
+def test_map_to_grid_roi_lookup():
+    radar = pyart.testing.make_target_radar()
+    grids = pyart.map.map_gates_to_grid(radar, **COMMON_MAP_TO_GRID_ARGS)
+    grids_lookup = pyart.map.map_gates_to_grid(
+        radar, roi_lookup=True, **COMMON_MAP_TO_GRID_ARGS)
+    assert np.all(grids_lookup['reflectivity'] == grids['reflectivity'])
+    assert_almost_equal(grids_lookup['ROI'], grids['ROI'])
+
+    kwargs = dict(COMMON_MAP_TO_GRID_ARGS)
+    kwargs['roi_func'] = 'dist_beam'
+    kwargs['min_radius'] = 30.
+    grids_lookup = pyart.map.map_gates_to_grid(
+        radar, roi_lookup=True, **kwargs)
+    assert grids_lookup['reflectivity'].count() > 0
+
+
+def test_map_to_grid_field_dtypes():
+    radar = pyart.testing.make_target_radar()
+    fdata = radar.fields['reflectivity']['data']
+    grids = pyart.map.map_gates_to_grid(radar, **COMMON_MAP_TO_GRID_ARGS)
+    expected = grids['reflectivity']
+
+    # float64 data
+    radar.fields['reflectivity']['data'] = fdata.astype('float64')
+    grids = pyart.map.map_gates_to_grid(radar, **COMMON_MAP_TO_GRID_ARGS)
+    assert_almost_equal(grids['reflectivity'], expected)
+
+    # scaled integer data
+    radar.fields['reflectivity']['data'] = (fdata * 2).astype('int16')
+    radar.fields['reflectivity']['scale_factor'] = 0.5
+    radar.fields['reflectivity']['add_offset'] = 0.0
+    grids = pyart.map.map_gates_to_grid(radar, **COMMON_MAP_TO_GRID_ARGS)
+    assert_almost_equal(grids['reflectivity'], expected)
+
+    # scaled 64-bit integer data
+    radar.fields['reflectivity']['data'] = (fdata * 2).astype('int64')
+    grids = pyart.map.map_gates_to_grid(radar, **COMMON_MAP_TO_GRID_ARGS)
+    assert_almost_equal(grids['reflectivity'], expected)
+
+    # scaled big and little endian integer data
+    for dtype in ['>i2', '<i2', '>u2', '<u2']:
+        radar.fields['reflectivity']['data'] = (fdata * 2).astype(dtype)
+        grids = pyart.map.map_gates_to_grid(
+            radar, **COMMON_MAP_TO_GRID_ARGS)
+        assert_almost_equal(grids['reflectivity'], expected)
+
+    # big endian float data
+    radar.fields['reflectivity']['data'] = fdata.astype('>f4')
+    grids = pyart.map.map_gates_to_grid(radar, **COMMON_MAP_TO_GRID_ARGS)
+    assert_almost_equal(grids['reflectivity'], expected)
+
+    # non-contiguous data
+    radar.fields['reflectivity'] = {
+        'data': np.asfortranarray(np.ma.masked_invalid(fdata))}
+    grids = pyart.map.map_gates_to_grid(radar, **COMMON_MAP_TO_GRID_ARGS)
+    assert_almost_equal(grids['reflectivity'], expected)
+
+
+def test_map_to_grid_memmap():
+    radar = pyart.testing.make_target_radar()
+    grids = pyart.map.map_gates_to_grid(radar, **COMMON_MAP_TO_GRID_ARGS)
+    with pyart.testing.InTemporaryDirectory():
+        grids_memmap = pyart.map.map_gates_to_grid(
+            radar, memmap_dir='.', **COMMON_MAP_TO_GRID_ARGS)
+    assert isinstance(grids_memmap['reflectivity'].data, np.memmap)
+    assert isinstance(grids_memmap['ROI'], np.memmap)
+    assert np.all(grids_memmap['reflectivity'] == grids['reflectivity'])
+    assert np.all(grids_memmap['reflectivity'].mask ==
+                  grids['reflectivity'].mask)
+
+
+def test_map_to_partial_grid_merge():
+    radar = pyart.testing.make_target_radar()
+    grids = pyart.map.map_gates_to_grid((radar, radar),
+                                        **COMMON_MAP_TO_GRID_ARGS)
+
+    partial1 = pyart.map.map_gates_to_partial_grid(
+        radar, **COMMON_MAP_TO_GRID_ARGS)
+    partial2 = pyart.map.map_gates_to_partial_grid(
+        radar, **COMMON_MAP_TO_GRID_ARGS)
+    assert partial1['fields'] == ['reflectivity']
+    assert partial1['grid_sum'].shape == (3, 9, 10, 1)
+    merged = pyart.map.merge_partial_grids([partial1, partial2])
+    assert_almost_equal(merged['grid_wsum'], partial1['grid_wsum'] * 2)
+    merged_grids = pyart.map.normalize_partial_grid(merged)
+    assert_almost_equal(
+        merged_grids['reflectivity'], grids['reflectivity'], 4)
+    assert np.all(merged_grids['reflectivity'].mask ==
+                  grids['reflectivity'].mask)
+
+    # merged into memory-mapped arrays
+    with pyart.testing.InTemporaryDirectory():
+        merged_memmap = pyart.map.merge_partial_grids(
+            [partial1, partial2], memmap_dir='.')
+    assert isinstance(merged_memmap['grid_sum'], np.memmap)
+    assert np.all(merged_memmap['grid_sum'] == merged['grid_sum'])
+
+    # merged in place into the first partial grid
+    merged_inplace = pyart.map.merge_partial_grids(
+        [partial1, partial2], inplace=True)
+    assert merged_inplace['grid_sum'] is partial1['grid_sum']
+    assert np.all(partial1['grid_sum'] == merged['grid_sum'])
+    assert np.all(partial1['grid_wsum'] == merged['grid_wsum'])
+
+    # mismatched fields
+    partial2['fields'] = ['foo']
+    assert_raises(ValueError, pyart.map.merge_partial_grids,
+                  [partial1, partial2])
+    assert_raises(ValueError, pyart.map.merge_partial_grids, [])
+
+
+def test_map_to_grid_nearest():
+    radar = pyart.testing.make_target_radar()
+    kwargs = dict(COMMON_MAP_TO_GRID_ARGS)
+    kwargs['weighting_function'] = 'nearest'
+    grids = pyart.map.map_gates_to_grid(radar, **kwargs)
+    refl = grids['reflectivity']
+    assert refl.count() > 0
+    # grid points take the value of a single gate
+    gate_values = np.unique(radar.fields['reflectivity']['data'])
+    assert np.all(np.in1d(refl.compressed(), gate_values))
+
+    grids_threaded = pyart.map.map_gates_to_grid(radar, nthreads=3, **kwargs)
+    assert np.all(grids_threaded['reflectivity'] == refl)
+    assert np.all(grids_threaded['reflectivity'].mask == refl.mask)
+
+    # merging partial grids keeps the closest gate
+    partial1 = pyart.map.map_gates_to_partial_grid(radar, **kwargs)
+    partial2 = pyart.map.map_gates_to_partial_grid(radar, **kwargs)
+    assert partial1['weighting_function'] == 'nearest'
+    merged = pyart.map.merge_partial_grids([partial1, partial2])
+    assert_almost_equal(merged['grid_wsum'], partial1['grid_wsum'])
+    merged_grids = pyart.map.normalize_partial_grid(merged)
+    assert np.all(merged_grids['reflectivity'] == refl)
+
+    partial2['weighting_function'] = 'Barnes'
+    assert_raises(ValueError, pyart.map.merge_partial_grids,
+                  [partial1, partial2])
+
+
+def test_map_to_grid_workers():
+    radar = pyart.testing.make_target_radar()
+    grids = pyart.map.map_gates_to_grid((radar, radar),
+                                        **COMMON_MAP_TO_GRID_ARGS)
+    grids_workers = pyart.map.map_gates_to_grid(
+        (radar, radar), workers=2, **COMMON_MAP_TO_GRID_ARGS)
+    assert_almost_equal(
+        grids_workers['reflectivity'], grids['reflectivity'], 4)
+    assert np.all(grids_workers['ROI'] == grids['ROI'])
+
+    # partial grids are passed from the workers in memory-mapped files
+    with pyart.testing.InTemporaryDirectory():
+        grids_workers = pyart.map.map_gates_to_grid(
+            (radar, radar), workers=2, memmap_dir='.',
+            **COMMON_MAP_TO_GRID_ARGS)
+        assert os.listdir('.') == []
+    assert_almost_equal(
+        grids_workers['reflectivity'], grids['reflectivity'], 4)
+
+
 def test_map_to_grid_tiny_grid():
     radar = pyart.testing.make_target_radar()
     grids = pyart.map.map_gates_to_grid(
@@ -151,6 +446,10 @@ def test_map_to_grid_errors():
                   (1, 1, 1), ((-1, 1), (-1, 1), (-1, 1)),
                   weighting_function='foo')
 
+    # invalid nthreads
+    assert_raises(ValueError, pyart.map.map_gates_to_grid, (radar, ),
+                  (1, 1, 1), ((-1, 1), (-1, 1), (-1, 1)), nthreads=0)
+
     # invalid roi_func
     assert_raises(ValueError, pyart.map.map_gates_to_grid, (radar, ),
                   (1, 1, 1), ((-1, 1), (-1, 1), (-1, 1)),
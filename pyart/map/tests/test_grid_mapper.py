@@ -155,6 +155,120 @@ def test_map_to_grid_balltree():
     assert_almost_equal(center_slice, EXPECTED_CENTER_SLICE)
 
 
+def test_map_to_grid_memmap():
+    radar = pyart.testing.make_target_radar()
+    grids = pyart.map.map_to_grid((radar,), **COMMON_MAP_TO_GRID_ARGS)
+    with pyart.testing.InTemporaryDirectory():
+        grids_memmap = pyart.map.map_to_grid(
+            (radar,), memmap_dir='.', **COMMON_MAP_TO_GRID_ARGS)
+    assert isinstance(grids_memmap['reflectivity'].data, np.memmap)
+    assert np.all(grids_memmap['reflectivity'] == grids['reflectivity'])
+    assert np.all(grids_memmap['reflectivity'].mask ==
+                  grids['reflectivity'].mask)
+
+
+def test_map_to_grid_cache():
+    radar = pyart.testing.make_target_radar()
+    cache = {}
+    kwargs = dict(COMMON_MAP_TO_GRID_ARGS)
+    kwargs['roi_func'] = 'constant'
+    kwargs['constant_roi'] = 30.
+    grids = pyart.map.map_to_grid((radar,), **kwargs)
+    grids_cached = pyart.map.map_to_grid((radar,), cache=cache, **kwargs)
+    assert len(cache) == 4
+    assert np.all(grids_cached['reflectivity'] == grids['reflectivity'])
+
+    # a second volume with the same geometry uses the cached neighbors
+    radar.fields['reflectivity']['data'] = (
+        radar.fields['reflectivity']['data'] + 1.)
+    grids_cached = pyart.map.map_to_grid((radar,), cache=cache, **kwargs)
+    assert len(cache) == 4
+    assert_almost_equal(grids_cached['reflectivity'],
+                        grids['reflectivity'] + 1.)
+    assert np.all(grids_cached['ROI'] == 30.)
+
+    # a different radius of influence reuses only the locator
+    kwargs['constant_roi'] = 40.
+    pyart.map.map_to_grid((radar,), cache=cache, **kwargs)
+    assert len(cache) == 7
+
+
+def test_map_to_grid_nearest():
+    radar = pyart.testing.make_target_radar()
+    grids = pyart.map.map_to_grid(
+        (radar,), weighting_function='nearest', **COMMON_MAP_TO_GRID_ARGS)
+    center_slice = grids['reflectivity'][1, 4, :]
+    assert_almost_equal(np.round(center_slice), EXPECTED_CENTER_SLICE)
+    gate_values = np.unique(radar.fields['reflectivity']['data'])
+    assert np.all(np.in1d(grids['reflectivity'].compressed(), gate_values))
+
+
+def test_map_to_grid_nthreads():
+    radar = pyart.testing.make_target_radar()
+    grids = pyart.map.map_to_grid((radar,), **COMMON_MAP_TO_GRID_ARGS)
+    grids_threaded = pyart.map.map_to_grid(
+        (radar,), nthreads=3, **COMMON_MAP_TO_GRID_ARGS)
+    assert np.all(grids_threaded['reflectivity'] == grids['reflectivity'])
+    assert np.all(grids_threaded['ROI'] == grids['ROI'])
+
+
+def test_find_neighbors_and_dists_batch():
+    points = np.random.RandomState(0).uniform(0, 100, (500, 3))
+    q = np.array([[50., 50., 50.], [0., 0., 0.], [500., 500., 500.]])
+    r = np.array([20., 30., 10.])
+    for algorithm in ['kd_tree', 'ball_tree']:
+        nnlocator = pyart.map.grid_mapper.NNLocator(
+            points, algorithm=algorithm)
+        indptr, ind, dist = nnlocator.find_neighbors_and_dists_batch(
+            q, r, nthreads=2)
+        assert indptr.shape == (4, )
+        assert indptr[-1] == len(ind) == len(dist)
+        assert indptr[3] == indptr[2]   # no neighbors for the last point
+        for i in range(3):
+            sl = slice(indptr[i], indptr[i + 1])
+            ref_ind = np.nonzero(
+                np.sqrt(((points - q[i]) ** 2).sum(axis=1)) <= r[i])[0]
+            assert_almost_equal(np.sort(ind[sl]), ref_ind)
+            assert_almost_equal(
+                dist[sl], np.sqrt(((points[ind[sl]] - q[i]) ** 2).sum(1)))
+
+
+def test_ckdtree_query_ball_point_batch():
+    points = np.random.RandomState(0).uniform(0, 100, (500, 3))
+    q = np.random.RandomState(1).uniform(0, 100, (50, 3))
+    tree = pyart.map.ckdtree.cKDTree(points)
+    ref = tree.query_ball_point_batch(q, 15.)
+    for nthreads in [2, 4, 100]:
+        result = tree.query_ball_point_batch(q, 15., nthreads=nthreads)
+        for ref_array, array in zip(ref, result):
+            assert_almost_equal(array, ref_array)
+    assert_raises(ValueError, tree.query_ball_point_batch, q, 15., 0)
+    # the per chunk query is not part of the public interface
+    assert not hasattr(tree, '_query_ball_point_range')
+
+
+def test_grid_from_radars_packed_field():
+    radar = pyart.testing.make_target_radar()
+    packed_radar = pyart.testing.make_target_radar()
+    packed_radar.fields['reflectivity']['data'] = (
+        radar.fields['reflectivity']['data'] * 4).astype('uint8')
+    packed_radar.fields['reflectivity']['scale_factor'] = 0.25
+    packed_radar.fields['reflectivity']['add_offset'] = 0.0
+    packed_radar.fields['reflectivity']['_FillValue'] = 255
+    kwargs = dict(COMMON_MAP_TO_GRID_ARGS)
+    kwargs['roi_func'] = 'constant'
+    kwargs['constant_roi'] = 30.
+    for algo in ['map_to_grid', 'map_gates_to_grid']:
+        grid = pyart.map.grid_from_radars(
+            (radar,), gridding_algo=algo, **kwargs)
+        packed_grid = pyart.map.grid_from_radars(
+            (packed_radar,), gridding_algo=algo, **kwargs)
+        fdic = packed_grid.fields['reflectivity']
+        assert 'scale_factor' not in fdic
+        assert fdic['_FillValue'] == pyart.config.get_fillvalue()
+        assert_almost_equal(fdic['data'], grid.fields['reflectivity']['data'])
+
+
 def test_map_to_grid_tiny_grid():
     radar = pyart.testing.make_target_radar()
     grids = pyart.map.map_to_grid(
@@ -0,0 +1,154 @@
+""" Unit Tests for Py-ART's map/mapping_plan.py. """
+
+from __future__ import print_function
+
+import numpy as np
+from numpy.testing import assert_almost_equal, assert_raises, assert_warns
+
+import pyart
+
+EXPECTED_CENTER_SLICE = [40, 30, 20, 10, 0, 0, 10, 20, 30, 40]
+
+COMMON_MAP_TO_GRID_ARGS = {
+    'grid_shape': (3, 9, 10),
+    'grid_limits': ((-400.0, 400.0), (-900.0, 900.0), (-900, 900)),
+    'roi_func': 'constant',
+    'constant_roi': 30., }
+
+
+def test_plan_matches_map_gates_to_grid():
+    radar = pyart.testing.make_target_radar()
+    plan = pyart.map.create_grid_mapping_plan(
+        radar, **COMMON_MAP_TO_GRID_ARGS)
+    grids = plan.map_fields(radar)
+    center_slice = grids['reflectivity'][1, 4, :]
+    assert_almost_equal(np.round(center_slice), EXPECTED_CENTER_SLICE)
+
+    ref = pyart.map.map_gates_to_grid(radar, **COMMON_MAP_TO_GRID_ARGS)
+    assert np.all(grids['reflectivity'].mask == ref['reflectivity'].mask)
+    assert_almost_equal(grids['reflectivity'], ref['reflectivity'], 4)
+    assert np.all(grids['ROI'] == 30.)
+
+
+def test_plan_masked_gates():
+    radar = pyart.testing.make_target_radar()
+    plan = pyart.map.create_grid_mapping_plan(
+        radar, **COMMON_MAP_TO_GRID_ARGS)
+
+    fdata = np.ma.masked_invalid(radar.fields['reflectivity']['data'])
+    fdata[:, 40:] = np.ma.masked
+    radar.fields['reflectivity']['data'] = fdata
+    grids = plan.map_fields(radar)
+    ref = pyart.map.map_gates_to_grid(radar, **COMMON_MAP_TO_GRID_ARGS)
+    assert np.all(grids['reflectivity'].mask == ref['reflectivity'].mask)
+    assert_almost_equal(grids['reflectivity'], ref['reflectivity'], 4)
+
+
+def test_plan_packed_field():
+    radar = pyart.testing.make_target_radar()
+    plan = pyart.map.create_grid_mapping_plan(
+        radar, **COMMON_MAP_TO_GRID_ARGS)
+    ref = plan.map_fields(radar)
+
+    fdata = radar.fields['reflectivity']['data']
+    radar.fields['reflectivity']['data'] = (fdata * 10).astype('int16')
+    radar.fields['reflectivity']['scale_factor'] = 0.1
+    radar.fields['reflectivity']['add_offset'] = 0.0
+    grids = plan.map_fields(radar)
+    assert_almost_equal(grids['reflectivity'], ref['reflectivity'], 4)
+    grids2 = pyart.map.map_gates_to_grid(radar, **COMMON_MAP_TO_GRID_ARGS)
+    assert_almost_equal(grids['reflectivity'], grids2['reflectivity'], 4)
+
+
+def test_plan_reordered_jittered_rays():
+    radar = pyart.testing.make_target_radar()
+    plan = pyart.map.create_grid_mapping_plan(
+        radar, azimuth_tolerance=0.4, **COMMON_MAP_TO_GRID_ARGS)
+    grids = plan.map_fields(radar)
+
+    # rotate the start of the sweep and add jitter to the azimuths
+    radar2 = pyart.testing.make_target_radar()
+    radar2.azimuth['data'] = np.roll(radar2.azimuth['data'], 90) + 0.3
+    radar2.fields['reflectivity']['data'] = np.roll(
+        radar2.fields['reflectivity']['data'], 90, axis=0)
+    grids2 = plan.map_fields(radar2)
+    assert_almost_equal(grids2['reflectivity'], grids['reflectivity'])
+
+
+def test_plan_unmatched_rays():
+    radar = pyart.testing.make_target_radar()
+    plan = pyart.map.create_grid_mapping_plan(
+        radar, azimuth_tolerance=0.4, **COMMON_MAP_TO_GRID_ARGS)
+
+    # rays shifted outside of the tolerance are excluded with a warning
+    radar.azimuth['data'][:10] += 0.5
+    ray_index = assert_warns(UserWarning, plan.find_ray_index, radar)
+    assert np.all(ray_index[:10] == -1)
+    assert np.all(ray_index[10:] == np.arange(10, radar.nrays))
+
+
+def test_plan_rhi_sweeps():
+    radar = pyart.testing.make_empty_rhi_radar(50, 90, 1)
+    fdata = np.tile(np.arange(50, dtype='float32'), (90, 1))
+    fdata += np.arange(90, dtype='float32')[:, np.newaxis]
+    radar.add_field('reflectivity', {'data': fdata})
+    grid_args = {
+        'grid_shape': (3, 5, 3),
+        'grid_limits': ((0., 800.), (0., 800.), (-50., 50.)),
+        'roi_func': 'constant',
+        'constant_roi': 100., }
+
+    # rays in RHI sweeps are matched on the elevation angle
+    plan = pyart.map.create_grid_mapping_plan(
+        radar, azimuth_tolerance=0., **grid_args)
+    assert_almost_equal(plan.ray_angles, radar.elevation['data'])
+    grids = plan.map_fields(radar)
+    ref = pyart.map.map_gates_to_grid(radar, **grid_args)
+    assert np.all(grids['reflectivity'].mask == ref['reflectivity'].mask)
+    assert_almost_equal(grids['reflectivity'], ref['reflectivity'], 4)
+
+    # sweep modes stored as character arrays
+    radar2 = pyart.testing.make_empty_rhi_radar(50, 90, 1)
+    radar2.sweep_mode['data'] = np.array([list('rhi')], dtype='S1')
+    radar2.elevation['data'] = radar2.elevation['data'][::-1].copy()
+    radar2.add_field('reflectivity', {'data': fdata[::-1]})
+    grids2 = plan.map_fields(radar2)
+    assert_almost_equal(grids2['reflectivity'], grids['reflectivity'])
+
+
+def test_plan_save_load():
+    radar = pyart.testing.make_target_radar()
+    plan = pyart.map.create_grid_mapping_plan(
+        radar, **COMMON_MAP_TO_GRID_ARGS)
+    with pyart.testing.InTemporaryDirectory():
+        plan.save('plan.npz')
+        plan2 = pyart.map.load_grid_mapping_plan('plan.npz')
+    assert plan2.grid_shape == plan.grid_shape
+    assert plan2.azimuth_tolerance == plan.azimuth_tolerance
+    assert (plan2.weights != plan.weights).nnz == 0
+    grids = plan.map_fields(radar)
+    grids2 = plan2.map_fields(radar)
+    assert np.all(grids2['reflectivity'] == grids['reflectivity'])
+
+
+def test_plan_errors():
+    radar = pyart.testing.make_target_radar()
+
+    # multiple rays mapped to the same swept angle
+    assert_raises(ValueError, pyart.map.create_grid_mapping_plan, radar,
+                  azimuth_tolerance=5., **COMMON_MAP_TO_GRID_ARGS)
+
+    # nearest weighting is not described by weights
+    assert_raises(ValueError, pyart.map.create_grid_mapping_plan, radar,
+                  weighting_function='nearest', **COMMON_MAP_TO_GRID_ARGS)
+
+    # mismatched gates
+    plan = pyart.map.create_grid_mapping_plan(
+        radar, **COMMON_MAP_TO_GRID_ARGS)
+    radar.range['data'] = radar.range['data'] * 2.
+    assert_raises(ValueError, plan.map_fields, radar)
+
+    # mismatched sweeps
+    radar = pyart.testing.make_target_radar()
+    radar.fixed_angle['data'] = radar.fixed_angle['data'] + 5.
+    assert_raises(ValueError, plan.map_fields, radar)